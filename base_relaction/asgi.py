@@ -1,5 +1,5 @@
 """
-ASGI config for vacancies project.
+ASGI config for base_relaction project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
@@ -11,6 +11,6 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "vacancies.settings")
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "base_relaction.settings")
 
 application = get_asgi_application()
@@ -11,8 +11,11 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 import os
+from importlib.util import find_spec
 from pathlib import Path
+
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -23,13 +26,41 @@ AUTH_USER_MODEL = "recreation.CustomUser"
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
 
+# Профиль настроек выбирается переменной DJANGO_PROFILE:
+# dev   — разработка: DEBUG, debug_toolbar, подробные логи, метрики
+#         (MetricsMiddleware) и профилирование (ProfilingMiddleware);
+# prod  — без отладки, статика из процесса (WhiteNoise) с долгим кешем,
+#         SECRET_KEY и ALLOWED_HOSTS из окружения, метрики и профилирование;
+# bench — как prod, но с локальным ключом, только ошибками в логах и
+#         минимальным набором middleware: без профилирования, метрики
+#         по умолчанию выключены (METRICS_ENABLED=1 включает), чтобы
+#         нагрузочные замеры не включали накладные расходы инструментов.
+PROFILES = ("dev", "prod", "bench")
+PROFILE = os.environ.get("DJANGO_PROFILE", "dev")
+if PROFILE not in PROFILES:
+    raise ImproperlyConfigured(
+        f"DJANGO_PROFILE={PROFILE!r}: ожидается одно из {', '.join(PROFILES)}"
+    )
+
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = "django-insecure-+o)%wo9aq84zi9p@n3w-o(i$5q)76(t%*w6xoqkf@d#5vunr+1"
+SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY")
+if not SECRET_KEY:
+    if PROFILE == "prod":
+        raise ImproperlyConfigured("Для профиля prod задайте DJANGO_SECRET_KEY")
+    SECRET_KEY = "django-insecure-+o)%wo9aq84zi9p@n3w-o(i$5q)76(t%*w6xoqkf@d#5vunr+1"
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = PROFILE == "dev"
 
-ALLOWED_HOSTS = ["*"]
+ALLOWED_HOSTS = [
+    host.strip()
+    for host in os.environ.get("DJANGO_ALLOWED_HOSTS", "").split(",")
+    if host.strip()
+]
+if not ALLOWED_HOSTS:
+    if PROFILE == "prod":
+        raise ImproperlyConfigured("Для профиля prod задайте DJANGO_ALLOWED_HOSTS")
+    ALLOWED_HOSTS = ["*"]
 
 
 # Application definition
@@ -41,7 +72,6 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
-    "debug_toolbar",
     "django_filters",
     "modeltranslation",
     "simple_history",
@@ -58,7 +88,32 @@ REST_FRAMEWORK = {
         "django_filters.rest_framework.DjangoFilterBackend",
         "rest_framework.filters.SearchFilter",
     ],
+    # JSON через orjson (recreation.renderers); без orjson или при
+    # FAST_JSON=0 — стандартный модуль json
+    "DEFAULT_RENDERER_CLASSES": [
+        "recreation.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "recreation.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
+FAST_JSON = os.environ.get("FAST_JSON", "1") != "0"
+# Лента изменений (/api/changes/) отдаёт записи старше этого числа секунд,
+# чтобы не пропустить изменения из ещё не закоммиченных транзакций.
+# Записи журнала вставляются после коммита короткими транзакциями
+# (ChangeLog.record_many), поэтому окно не зависит от длины транзакций
+# изменений и должно покрывать только вставку пачки записей журнала
+CHANGE_FEED_SETTLE_SECONDS = 2
+
+# События бронирований для открытых страниц (/events/bookings/, только ASGI).
+# InProcessBroker работает в пределах одного процесса; для нескольких
+# процессов указывается брокер с тем же интерфейсом поверх внешней шины
+EVENT_BROKER = "recreation.events.InProcessBroker"
+EVENT_BUFFER_SIZE = 32  # событий в очереди одного соединения
+EVENT_HEARTBEAT_SECONDS = 15
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
@@ -66,11 +121,59 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # Нужен во всех профилях: представления читают request.client_profile
+    "recreation.middleware.ClientProfileMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
 ]
 
+# Метрики запросов для Prometheus (/metrics, recreation.metrics);
+# METRICS_ENABLED=0 — без middleware (в bench — по умолчанию). /metrics доступен персоналу,
+# с заголовком «Authorization: Bearer <METRICS_TOKEN>» (bearer_token
+# в scrape_config Prometheus) и адресам из METRICS_ALLOWED_IPS (через
+# запятую; адрес клиента за прокси — см. LOGIN_THROTTLE_PROXY_COUNT)
+METRICS_ENABLED = (
+    os.environ.get("METRICS_ENABLED", "0" if PROFILE == "bench" else "1") != "0"
+)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+METRICS_ALLOWED_IPS = [
+    address
+    for address in os.environ.get("METRICS_ALLOWED_IPS", "").split(",")
+    if address
+]
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, "recreation.middleware.MetricsMiddleware")
+
+# Профилирование отдельных запросов (recreation.profiling): ?_profile=1
+# для персонала, заголовок X-Profile-Token (manage.py profile_token)
+# или каждый N-й запрос. Профили лежат вне MEDIA_ROOT и смотрятся в админке
+PROFILE_ROOT = os.environ.get("PROFILE_ROOT", os.path.join(BASE_DIR, "profiles"))
+PROFILE_SAMPLE_EVERY = int(os.environ.get("PROFILE_SAMPLE_EVERY", 0))  # 0 — выкл.
+PROFILE_INTERVAL = 0.001  # интервал снимков стека, секунд
+PROFILE_TOKEN_MAX_AGE = 60 * 60
+PROFILE_KEEP = 500  # сколько последних профилей хранить
+if PROFILE != "bench":
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("recreation.middleware.ClientProfileMiddleware"),
+        "recreation.middleware.ProfilingMiddleware",
+    )
+
+# Статику вне dev отдаёт WhiteNoise (сразу после SecurityMiddleware):
+# файлы с хешем в имени — с Cache-Control на год, готовые .br/.gz —
+# без сжатия на лету. Без WhiteNoise статику отдаёт
+# recreation.storage.serve_static (SERVE_STATIC), в dev — runserver.
+SERVE_STATIC = False
+if DEBUG:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.append("debug_toolbar.middleware.DebugToolbarMiddleware")
+elif find_spec("whitenoise"):
+    MIDDLEWARE.insert(1, "whitenoise.middleware.WhiteNoiseMiddleware")
+else:
+    SERVE_STATIC = True
+
+# Загруженные файлы (MEDIA) отдаёт Django, если перед ним нет веб-сервера
+SERVE_MEDIA = os.environ.get("SERVE_MEDIA", "1") != "0"
+
 INTERNAL_IPS = ["127.0.0.1"]
 
 ROOT_URLCONF = "base_relaction.urls"
@@ -94,7 +197,20 @@ TEMPLATES = [
     },
 ]
 
+# Скомпилированные шаблоны хранятся в памяти процесса (cached.Loader).
+# Django включает его и сам, если loaders не заданы; здесь он задан явно,
+# чтобы его можно было отключить при правке шаблонов: TEMPLATE_CACHE=0.
+template_loaders = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+if os.environ.get("TEMPLATE_CACHE", "1") != "0":
+    template_loaders = [("django.template.loaders.cached.Loader", template_loaders)]
+TEMPLATES[0]["APP_DIRS"] = False  # вместе с loaders не допускается
+TEMPLATES[0]["OPTIONS"]["loaders"] = template_loaders
+
 WSGI_APPLICATION = "base_relaction.wsgi.application"
+ASGI_APPLICATION = "base_relaction.asgi.application"
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 DATABASES = {
     'default': {
@@ -109,6 +225,35 @@ if os.environ.get('DOCKER_CONTAINER'):
         default='postgres://postgres:postgres@db:5432/base_relaction',
         conn_max_age=600
     )
+# Кеш: Redis, если задан REDIS_URL, иначе память процесса (только для
+# разработки — у каждого процесса свой кеш)
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+
+# Хранилище сессий выбирается переменной SESSION_BACKEND.
+# cached_db читает сессию из кеша и пишет в БД только при изменении;
+# cache без общего кеша (Redis) теряет сессии между процессами;
+# signed_cookies хранит данные в подписанной cookie без обращений к БД.
+# По умолчанию cached_db только с общим кешем: с кешем в памяти процесса
+# выход (flush) в одном воркере оставил бы сессию живой в кеше других.
+SESSION_ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "cache": "django.contrib.sessions.backends.cache",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+SESSION_ENGINE = SESSION_ENGINES[
+    os.environ.get(
+        "SESSION_BACKEND", "cached_db" if os.environ.get("REDIS_URL") else "db"
+    )
+]
+SESSION_COOKIE_AGE = int(os.environ.get("SESSION_COOKIE_AGE", 14 * 24 * 60 * 60))
+
 # Password validation https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -135,9 +280,18 @@ USE_L10N = True
 # Static files (CSS, JavaScript, Images) https://docs.djangoproject.com/en/5.1/howto/static-files/
 
 STATIC_URL = "/static/"
-STATICFILES_DIRS = [os.path.join(BASE_DIR, "static"), BASE_DIR / "static"]
+STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 
+# Бандлы собираются командой build_assets; collectstatic добавляет к именам
+# хеш содержимого и пишет сжатые копии .gz/.br (recreation.storage)
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "recreation.storage.CompressedManifestStaticFilesStorage"
+    },
+}
+
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 # Default primary key field type https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -153,9 +307,53 @@ SECURE_CONTENT_TYPE_NOSNIFF = True
 X_FRAME_OPTIONS = "DENY"
 
 AUTHENTICATION_BACKENDS = [
+    "recreation.backends.LoginThrottleBackend",  # Должен быть первым
+    # Наследует ModelBackend: вход по имени и права. Стандартный бэкенд
+    # не добавляем, иначе неизвестный email хешировался бы второй раз
     "recreation.backends.EmailPhoneBackend",
-    "django.contrib.auth.backends.ModelBackend",  # Оставляем стандартный бэкенд
 ]
+
+# Пароли: PBKDF2 с настраиваемым числом итераций и замером времени.
+# При изменении числа итераций пароль перехешируется при следующем входе.
+# Стандартного PBKDF2PasswordHasher в списке нет: у него тот же алгоритм
+# pbkdf2_sha256, и identify_hasher выбрал бы его, а проверки паролей при
+# входе прошли бы без замера времени.
+PASSWORD_HASHERS = [
+    "recreation.hashers.TimedPBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get("PASSWORD_PBKDF2_ITERATIONS", 1_000_000))
+
+# Лимиты неудачных попыток входа: (число попыток, окно в секундах).
+# Счётчики хранятся в кеше; при нескольких процессах нужен общий кеш.
+LOGIN_THROTTLE_RATES = {
+    "ip": (50, 300),
+    "identifier": (5, 300),
+}
+LOGIN_THROTTLE_PROXY_COUNT = int(os.environ.get("LOGIN_THROTTLE_PROXY_COUNT", 0))
+
+# Логи в stdout; уровень по профилю, можно переопределить LOG_LEVEL
+LOG_LEVEL = os.environ.get(
+    "LOG_LEVEL", {"dev": "INFO", "prod": "WARNING", "bench": "ERROR"}[PROFILE]
+)
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "simple": {"format": "%(asctime)s %(levelname)s %(name)s: %(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "simple"},
+    },
+    "root": {"handlers": ["console"], "level": LOG_LEVEL},
+    "loggers": {
+        "django": {"handlers": ["console"], "level": LOG_LEVEL, "propagate": False},
+    },
+}
+
 CKEDITOR_BASEPATH = "/static/ckeditor/ckeditor/"
 CKEDITOR_CONFIGS = {
     "default": {
@@ -0,0 +1,14 @@
+"""Настройки для тестов.
+
+``python manage.py test --settings=base_relaction.settings_test``
+(для pytest-django — DJANGO_SETTINGS_MODULE). Тестовая база создаётся
+миграциями, статика отдаётся без манифеста collectstatic.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import STORAGES
+
+STORAGES = {
+    **STORAGES,
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
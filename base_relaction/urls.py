@@ -1,18 +1,38 @@
-import debug_toolbar
+import re
+
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+from django.views.static import serve
 from recreation.admin import PostAdmin
 from recreation.models import Post  # Добавьте импорт модели Post
+from recreation.storage import serve_static
 
 urlpatterns = [
-    path("debug/", include(debug_toolbar.urls)),  # Добавлено для django-debug-toolbar
     path("admin/", admin.site.urls),
     path("", include("recreation.urls")),
 ]
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+# debug_toolbar подключается только в профиле dev
+if "debug_toolbar" in settings.INSTALLED_APPS:
+    import debug_toolbar
+
+    urlpatterns.insert(0, path("debug/", include(debug_toolbar.urls)))
+
+
+def _prefix(url):
+    return r"^%s(?P<path>.*)$" % re.escape(url.lstrip("/"))
+
+
+# Статику в dev отдаёт runserver (staticfiles), вне dev — WhiteNoise или
+# serve_static; загруженные файлы — Django, если не выключен SERVE_MEDIA
+if settings.SERVE_STATIC:
+    urlpatterns.append(re_path(_prefix(settings.STATIC_URL), serve_static))
+if settings.DEBUG or settings.SERVE_MEDIA:
+    urlpatterns.append(
+        re_path(
+            _prefix(settings.MEDIA_URL), serve, {"document_root": settings.MEDIA_ROOT}
+        )
+    )
 # Добавляем маршрут для печати поста
 admin_instance = PostAdmin(Post, admin.site)
 urlpatterns.append(
@@ -1,5 +1,5 @@
 """
-WSGI config for vacancies project.
+WSGI config for base_relaction project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
 
@@ -11,6 +11,6 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "vacancies.settings")
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "base_relaction.settings")
 
 application = get_wsgi_application()
@@ -1,22 +1,35 @@
+import json
+from datetime import timedelta
+
 from django.contrib import admin
 from django.contrib.admin import DateFieldListFilter
+from django.contrib.admin.views.main import ChangeList
 from django.contrib.auth.admin import UserAdmin
-from django.http import HttpResponse
+from django.core.exceptions import FieldDoesNotExist, PermissionDenied
+from django.db.models import DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import Substr
+from django.http import FileResponse, Http404, HttpResponse
+from django.shortcuts import get_object_or_404
 from django.template.loader import render_to_string
-from django.urls import path
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
 from django.utils import timezone
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
 from django.utils.translation import gettext_lazy as _
 from import_export import fields, resources
-from import_export.admin import ExportMixin
+from import_export.admin import ExportMixin as BaseExportMixin
 from weasyprint import CSS, HTML
 
+from . import profiling
 from .forms import CustomUserChangeForm, CustomUserCreationForm
+from .metrics import timed
 from .models import (
+    AnalyticsDirtyDate,
     Booking,
     BookingService,
     Client,
     CustomUser,
+    DailyKpiSnapshot,
     DZexam,
     Employee,
     Event,
@@ -26,16 +39,164 @@ from .models import (
     Position,
     Post,
     PostTag,
+    RequestProfile,
     Review,
+    ReviewStats,
     Service,
     Tag,
 )
+from .normalizers import search_q
+from .pagination import DEFAULT_THRESHOLD, EstimatedCountPaginator
 
 admin.site.site_header = _('Администрирование базы отдыха "FurTree"')
 admin.site.site_title = _("База отдыха")
 admin.site.index_title = _("Управление базой отдыха")
 
 
+def list_query(*fields, **annotations):
+    """Объявляет, какие поля (в том числе через связи) и аннотации читает
+    метод-колонка списка. По этим данным ListQueryMixin строит запрос."""
+
+    def decorator(func):
+        func.list_fields = fields
+        func.list_annotations = annotations
+        return func
+
+    return decorator
+
+
+class ListQueryChangeList(ChangeList):
+    def apply_select_related(self, qs):
+        # Аннотации нужны уже здесь: по ним может идти сортировка
+        related, _, annotations = self.model_admin.get_list_query(self.list_display)
+        return qs.select_related(*related).annotate(**annotations)
+
+    def get_results(self, request):
+        # only() применяется только к странице списка: действия и экспорт
+        # получают полный queryset через get_queryset()
+        _, fields, _ = self.model_admin.get_list_query(self.list_display)
+        if fields is not None:
+            self.queryset = self.queryset.only(*fields)
+        super().get_results(request)
+
+
+class ListQueryMixin:
+    """Список без N+1: select_related и only() выводятся из list_display.
+
+    Поля модели берутся как есть (для внешних ключей — с select_related),
+    методы-колонки описывают свои потребности декоратором ``list_query``.
+    Чекбокс действий подписывается str(obj), поэтому поля, которые читает
+    ``__str__`` модели, перечисляются в ``list_str_fields``.
+
+    Если хотя бы одна колонка ничего не объявила (или включён list_editable),
+    only() не применяется, но select_related по известным связям остаётся.
+    """
+
+    list_str_fields = None
+
+    def get_changelist(self, request, **kwargs):
+        return ListQueryChangeList
+
+    def _column_query(self, name):
+        """Возвращает (поля, связи, аннотации) колонки или None, если неизвестно."""
+        if name == "action_checkbox":
+            if self.list_str_fields is None:
+                return None
+            return self.list_str_fields, (), {}
+        if callable(name):
+            column = name
+        elif hasattr(self, name):
+            column = getattr(self, name)
+        else:
+            try:
+                field = self.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                column = getattr(self.model, name, None)
+            else:
+                # Внешний ключ выводится через str() связанного объекта
+                return (name,), (name,) if field.is_relation else (), {}
+        if not hasattr(column, "list_fields"):
+            return None
+        return column.list_fields, (), column.list_annotations
+
+    def get_list_query(self, list_display):
+        """Возвращает (связи для select_related, поля для only() или None, аннотации)."""
+        opts = self.model._meta
+        related, fields, annotations = set(), {opts.pk.name}, {}
+        restrict = not self.list_editable
+        for name in list_display:
+            query = self._column_query(name)
+            if query is None:
+                restrict = False
+                continue
+            column_fields, column_related, column_annotations = query
+            for path in column_fields:
+                fields.add(path)
+                if "__" in path:
+                    related.add(path.rsplit("__", 1)[0])
+            related.update(column_related)
+            annotations.update(column_annotations)
+        return sorted(related), sorted(fields) if restrict else None, annotations
+
+
+class EstimatedCountMixin:
+    """Большие списки: оценочный подсчёт строк и кеш иерархии дат.
+
+    Вместо точного COUNT(*) выше порога используется оценка по статистике
+    БД, второй подсчёт (всей таблицы без фильтров) не выполняется, а списки
+    лет/месяцев date_hierarchy кешируются (шаблон admin/recreation/change_list.html).
+    Для отдельного ModelAdmin отключается через ``estimated_count = False``.
+    """
+
+    estimated_count = True
+    estimated_count_threshold = DEFAULT_THRESHOLD
+    date_hierarchy_cache_timeout = 300
+
+    @property
+    def show_full_result_count(self):
+        return not self.estimated_count
+
+    def get_paginator(
+        self, request, queryset, per_page, orphans=0, allow_empty_first_page=True
+    ):
+        if not self.estimated_count:
+            return super().get_paginator(
+                request, queryset, per_page, orphans, allow_empty_first_page
+            )
+        return EstimatedCountPaginator(
+            queryset,
+            per_page,
+            orphans,
+            allow_empty_first_page,
+            threshold=self.estimated_count_threshold,
+        )
+
+
+class NormalizedSearchMixin:
+    """Поиск (и автодополнение) по ФИО, телефону или email.
+
+    Вместо icontains по каждому из search_fields запрос идёт по поисковым
+    колонкам модели (см. recreation.normalizers): телефон и email — по
+    началу через индекс, ФИО — по подстроке в одной колонке, чтобы
+    находились и имя, и часть фамилии. search_fields остаются заданными:
+    без них не работает autocomplete_fields.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        condition = search_q(search_term, using=queryset.db, contains=True)
+        if condition is None:
+            return queryset, False
+        return queryset.filter(condition), False
+
+
+class ExportMixin(BaseExportMixin):
+    """ExportMixin с замером времени выгрузки (метрика export:<модель>)."""
+
+    def get_export_data(self, file_format, request, queryset, **kwargs):
+        with timed(f"export:{self.model._meta.model_name}"):
+            return super().get_export_data(file_format, request, queryset, **kwargs)
+
+
 class BaseExportAdmin(ExportMixin, admin.ModelAdmin):
     def get_export_formats(self):
         return [CustomXLSXFormat]
@@ -45,7 +206,7 @@ class BaseExportAdmin(ExportMixin, admin.ModelAdmin):
         return f"{model_name}_export_{timezone.now().strftime('%Y-%m-%d')}.xlsx"
 
 
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(NormalizedSearchMixin, UserAdmin):
     form = CustomUserChangeForm
     add_form = CustomUserCreationForm
 
@@ -139,8 +300,9 @@ class PostResource(resources.ModelResource):
 
 
 @admin.register(Post)
-class PostAdmin(ExportMixin, admin.ModelAdmin):
+class PostAdmin(EstimatedCountMixin, ListQueryMixin, ExportMixin, admin.ModelAdmin):
     resource_class = PostResource
+    list_str_fields = ("title",)
     list_display = [
         "title",
         "slug",
@@ -163,10 +325,12 @@ class PostAdmin(ExportMixin, admin.ModelAdmin):
     verbose_name_plural = _("Посты")
 
     @admin.display(description=_("Пользовательский метод"))
+    @list_query("title")
     def custom_method(self, obj):
         return _("Пользовательское значение для {}").format(obj.title)
 
     @admin.display(description=_("Изображение"))
+    @list_query("image")
     def image_preview(self, obj):
         if obj.image:
             return format_html(
@@ -199,7 +363,8 @@ class PostAdmin(ExportMixin, admin.ModelAdmin):
             img { max-width: 100%; height: auto; }
         """
         )
-        HTML(string=html).write_pdf(response, stylesheets=[css])
+        with timed("pdf:post"):
+            HTML(string=html).write_pdf(response, stylesheets=[css])
         return response
 
     def print_post_action(self, request, queryset):
@@ -242,11 +407,12 @@ class ClientResource(resources.ModelResource):
 
 
 @admin.register(Client)
-class ClientAdmin(ExportMixin, admin.ModelAdmin):
+class ClientAdmin(NormalizedSearchMixin, ListQueryMixin, ExportMixin, admin.ModelAdmin):
+    list_str_fields = ("last_name", "first_name", "patronymic")
     list_display = ("last_name", "first_name", "phone_number", "email", "document_link")
     search_fields = ["last_name", "first_name", "patronymic", "phone_number", "email"]
     list_filter = ("last_name",)
-    raw_id_fields = ["user"]
+    autocomplete_fields = ["user"]
     list_per_page = 50
 
     def document_status(self, obj):
@@ -255,6 +421,7 @@ class ClientAdmin(ExportMixin, admin.ModelAdmin):
     document_status.short_description = "Документ"
 
     @admin.display(description="Документ")
+    @list_query("document")
     def document_link(self, obj):
         if obj.document:
             return format_html('<a href="{}">📄</a>', obj.document.url)
@@ -328,7 +495,7 @@ class HouseResource(resources.ModelResource):
 
 
 @admin.register(House)
-class HouseAdmin(ExportMixin, admin.ModelAdmin):
+class HouseAdmin(ListQueryMixin, ExportMixin, admin.ModelAdmin):
     list_display = (
         "name",
         "price_per_night",
@@ -371,11 +538,13 @@ class HouseAdmin(ExportMixin, admin.ModelAdmin):
             return [CustomXLSXFormat]
         return super().get_export_formats()
 
+    @list_query("location")
     def get_address_specified(self, obj):
         return "Да" if obj.location else "Нет"
 
     get_address_specified.short_description = "Адрес указан"
 
+    @list_query("employee_id__last_name", "employee_id__first_name")
     def get_manager(self, obj):
         if obj.employee_id:
             return f"{obj.employee_id.last_name} {obj.employee_id.first_name}"
@@ -391,10 +560,12 @@ class HouseAdmin(ExportMixin, admin.ModelAdmin):
         return f"{obj.price_per_night} ₽"
 
     @admin.display(description="Местоположение")
+    @list_query("location")
     def location_short(self, obj):
         return obj.location[:50] + "..." if len(obj.location) > 50 else obj.location
 
     @admin.display(description="Статус")
+    @list_query("is_active")
     def status_badge(self, obj):
         color = "green" if obj.is_active else "red"
         text = "Активен" if obj.is_active else "Неактивен"
@@ -403,6 +574,7 @@ class HouseAdmin(ExportMixin, admin.ModelAdmin):
         )
 
     @admin.display(description="Изображение")
+    @list_query("image")
     def image_preview(self, obj):
         if obj.image:
             return format_html(
@@ -412,7 +584,8 @@ class HouseAdmin(ExportMixin, admin.ModelAdmin):
 
 
 @admin.register(Facility)
-class FacilityAdmin(admin.ModelAdmin):
+class FacilityAdmin(ListQueryMixin, admin.ModelAdmin):
+    list_str_fields = ("name",)
     list_display = ("facility_id", "house_link", "name", "description", "status")
     search_fields = ("name", "description")
     list_display_links = ("name",)
@@ -423,16 +596,17 @@ class FacilityAdmin(admin.ModelAdmin):
     verbose_name_plural = _("Удобства")
 
     @admin.display(description=_("Коттедж"))
+    @list_query("house_id__name")
     def house_link(self, obj):
         return format_html(
             '<a href="/admin/recreation/house/{}/change/">{}</a>',
-            obj.house_id.house_id,
+            obj.house_id_id,
             obj.house_id.name,
         )
 
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(EstimatedCountMixin, ListQueryMixin, admin.ModelAdmin):
     list_display = (
         "review_id",
         "client_link",
@@ -448,29 +622,62 @@ class ReviewAdmin(admin.ModelAdmin):
         ("created_at", DateFieldListFilter),
     )
     readonly_fields = ("review_id", "created_at")
-    raw_id_fields = ["client_id", "house_id"]
+    autocomplete_fields = ["client_id", "house_id"]
     date_hierarchy = "created_at"
+    list_str_fields = (
+        "client_id__last_name",
+        "client_id__first_name",
+        "client_id__patronymic",
+        "house_id__name",
+    )
 
-    @admin.display(description="Клиент")
+    @admin.display(description="Клиент", ordering="client_last_name")
+    @list_query(
+        client_last_name=F("client_id__last_name"),
+        client_initial=Substr("client_id__first_name", 1, 1),
+    )
     def client_link(self, obj):
-        if obj.client_id:
-            first_initial = (
-                obj.client_id.first_name[0] if obj.client_id.first_name else ""
-            )
-            return f"{obj.client_id.last_name} {first_initial}."
+        if obj.client_last_name is not None:
+            return f"{obj.client_last_name} {obj.client_initial}."
         return "-"
 
-    @admin.display(description="Коттедж")
+    @admin.display(description="Коттедж", ordering="house_id__name")
+    @list_query("house_id__name")
     def house_link(self, obj):
         return obj.house_id.name if obj.house_id else "-"
 
     @admin.display(description="Комментарий")
+    @list_query("comment")
     def short_comment(self, obj):
         if obj.comment:
             return obj.comment[:50] + "..." if len(obj.comment) > 50 else obj.comment
         return "-"
 
 
+@admin.register(ReviewStats)
+class ReviewStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        "__str__",
+        "total",
+        "average_display",
+        "rating_1",
+        "rating_2",
+        "rating_3",
+        "rating_4",
+        "rating_5",
+        "last_review_at",
+    )
+    list_select_related = ("house",)
+    readonly_fields = [field.name for field in ReviewStats._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description="Средняя оценка")
+    def average_display(self, obj):
+        return f"{obj.average:.2f}"
+
+
 class EmployeeResource(resources.ModelResource):
     full_name = fields.Field(column_name="ФИО")
     position = fields.Field(column_name="Должность")
@@ -506,22 +713,26 @@ class EmployeeResource(resources.ModelResource):
 
 
 @admin.register(Employee)
-class EmployeeAdmin(BaseExportAdmin, admin.ModelAdmin):
+class EmployeeAdmin(ListQueryMixin, BaseExportAdmin, admin.ModelAdmin):
     resource_class = EmployeeResource
     list_display = ("get_full_name", "get_position", "get_contacts", "get_hire_date")
+    list_str_fields = ("last_name", "first_name", "patronymic")
     list_filter = ("position_id",)
     search_fields = ("last_name", "first_name", "phone", "email", "position_id__name")
 
+    @list_query("last_name", "first_name", "patronymic")
     def get_full_name(self, obj):
         return f"{obj.last_name} {obj.first_name} {obj.patronymic or ''}".strip()
 
     get_full_name.short_description = "ФИО"
 
+    @list_query("position_id__name")
     def get_position(self, obj):
         return str(obj.position_id) if obj.position_id else "-"
 
     get_position.short_description = "Должность"
 
+    @list_query("phone", "email", "contact_info")
     def get_contacts(self, obj):
         contacts = []
         if obj.phone:
@@ -532,6 +743,7 @@ class EmployeeAdmin(BaseExportAdmin, admin.ModelAdmin):
 
     get_contacts.short_description = "Контакты"
 
+    @list_query("hire_date")
     def get_hire_date(self, obj):
         return obj.hire_date.strftime("%d.%m.%Y") if obj.hire_date else "-"
 
@@ -556,7 +768,7 @@ class BookingServiceInline(admin.TabularInline):
 
 
 @admin.register(Booking)
-class BookingAdmin(ExportMixin, admin.ModelAdmin):
+class BookingAdmin(EstimatedCountMixin, ListQueryMixin, ExportMixin, admin.ModelAdmin):
     list_display = (
         "booking_id",
         "get_client",
@@ -568,13 +780,15 @@ class BookingAdmin(ExportMixin, admin.ModelAdmin):
     )
     list_filter = ("house", "check_in_date", "check_out_date")
     date_hierarchy = "created_at"
-    raw_id_fields = ("client_id", "house", "user")
-    list_select_related = True
+    autocomplete_fields = ("client_id", "house", "user")
+    list_str_fields = ("house",)
     readonly_fields = ("get_nights_readonly",)
 
     @admin.display(description="Ночи")
     def get_nights_readonly(self, obj):
-        return self.get_nights(obj)
+        if obj.check_in_date and obj.check_out_date:
+            return (obj.check_out_date - obj.check_in_date).days
+        return "-"
 
     fieldsets = (
         (
@@ -593,31 +807,41 @@ class BookingAdmin(ExportMixin, admin.ModelAdmin):
         ("Дополнительно", {"fields": ("comment",), "classes": ("collapse",)}),
     )
 
-    @admin.display(description="Клиент")
+    @admin.display(description="Клиент", ordering="client_last_name")
+    @list_query(
+        "client_name",
+        client_last_name=F("client_id__last_name"),
+        client_initial=Substr("client_id__first_name", 1, 1),
+    )
     def get_client(self, obj):
-        if obj.client_id:
-            return f"{obj.client_id.last_name} {obj.client_id.first_name[0]}."
+        if obj.client_last_name is not None:
+            return f"{obj.client_last_name} {obj.client_initial}."
         return obj.client_name or "-"
 
-    @admin.display(description="Ночи")
+    @admin.display(description="Ночи", ordering="nights_count")
+    @list_query(
+        nights_count=ExpressionWrapper(
+            F("check_out_date") - F("check_in_date"), output_field=DurationField()
+        )
+    )
     def get_nights(self, obj):
-        if obj.check_in_date and obj.check_out_date:
-            return (obj.check_out_date - obj.check_in_date).days
-        return "-"
+        return obj.nights_count.days if obj.nights_count is not None else "-"
 
-    @admin.display(description="Коттедж")
+    @admin.display(description="Коттедж", ordering="house__name")
+    @list_query("house__name")
     def get_house(self, obj):
         if obj.house:
             return format_html(
                 '<a href="/admin/recreation/house/{}/change/">{}</a>',
-                obj.house.house_id,
+                obj.house_id,
                 obj.house.name,
             )
         return "-"
 
 
 @admin.register(Event)
-class EventAdmin(admin.ModelAdmin):
+class EventAdmin(ListQueryMixin, admin.ModelAdmin):
+    list_str_fields = ("name",)
     list_display = ("event_id", "name", "date", "location", "booking_link")
     search_fields = ("name", "location")
     list_filter = ("date",)
@@ -627,18 +851,19 @@ class EventAdmin(admin.ModelAdmin):
     verbose_name_plural = _("Мероприятия")
 
     @admin.display(description="Бронирование")
+    @list_query("booking_id")
     def booking_link(self, obj):
-        if obj.booking_id:  # Используем booking_id вместо booking
-            return format_html(
-                '<a href="/admin/recreation/booking/{}/change/">{}</a>',
-                obj.booking_id.booking_id,
-                f"Бронирование #{obj.booking_id.booking_id}",
-            )
-        return "-"
+        # Для ссылки достаточно значения внешнего ключа, без JOIN
+        return format_html(
+            '<a href="/admin/recreation/booking/{}/change/">{}</a>',
+            obj.booking_id_id,
+            f"Бронирование #{obj.booking_id_id}",
+        )
 
 
 @admin.register(Service)
-class ServiceAdmin(admin.ModelAdmin):
+class ServiceAdmin(ListQueryMixin, admin.ModelAdmin):
+    list_str_fields = ("name",)
     list_display = (
         "service_id",
         "name",
@@ -655,6 +880,7 @@ class ServiceAdmin(admin.ModelAdmin):
     verbose_name_plural = _("Услуги")
 
     @admin.display(description=_("Описание"))
+    @list_query("description")
     def short_description(self, obj):
         return (
             obj.description[:50] + "..."
@@ -663,6 +889,7 @@ class ServiceAdmin(admin.ModelAdmin):
         )
 
     @admin.display(description=_("Изображение"))
+    @list_query("image")
     def image_preview(self, obj):
         if obj.image:
             return format_html(
@@ -672,7 +899,8 @@ class ServiceAdmin(admin.ModelAdmin):
 
 
 @admin.register(BookingService)
-class BookingServiceAdmin(admin.ModelAdmin):
+class BookingServiceAdmin(ListQueryMixin, admin.ModelAdmin):
+    list_str_fields = ("service_id__name", "booking_id__house")
     list_display = ("id", "service_link", "booking_link", "booking_date", "return_date")
     search_fields = ("service_id__name", "booking_id__booking_id")
     list_display_links = ("service_link", "booking_link")
@@ -681,29 +909,28 @@ class BookingServiceAdmin(admin.ModelAdmin):
     verbose_name = "Бронирование услуги"
     verbose_name_plural = "Бронирования услуг"
 
-    @admin.display(description="Услуга")
+    @admin.display(description="Услуга", ordering="service_id__name")
+    @list_query("service_id__name")
     def service_link(self, obj):
-        if obj.service_id:  # Используем service_id вместо service
-            return format_html(
-                '<a href="/admin/recreation/service/{}/change/">{}</a>',
-                obj.service_id.service_id,
-                obj.service_id.name,
-            )
-        return "-"
+        return format_html(
+            '<a href="/admin/recreation/service/{}/change/">{}</a>',
+            obj.service_id_id,
+            obj.service_id.name,
+        )
 
-    @admin.display(description="Бронирование")
+    @admin.display(description="Бронирование", ordering="booking_id")
+    @list_query("booking_id")
     def booking_link(self, obj):
-        if obj.booking_id:  # Используем booking_id вместо booking
-            return format_html(
-                '<a href="/admin/recreation/booking/{}/change/">{}</a>',
-                obj.booking_id.booking_id,
-                f"Бронирование #{obj.booking_id.booking_id}",
-            )
-        return "-"
+        return format_html(
+            '<a href="/admin/recreation/booking/{}/change/">{}</a>',
+            obj.booking_id_id,
+            f"Бронирование #{obj.booking_id_id}",
+        )
 
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
+class PaymentAdmin(ListQueryMixin, admin.ModelAdmin):
+    list_str_fields = ("booking__booking_id",)
     list_display = (
         "payment_id",
         "booking_link",
@@ -719,15 +946,14 @@ class PaymentAdmin(admin.ModelAdmin):
     verbose_name = _("Платеж")
     verbose_name_plural = _("Платежи")
 
-    @admin.display(description="Бронирование")
+    @admin.display(description="Бронирование", ordering="booking")
+    @list_query("booking")
     def booking_link(self, obj):
-        if obj.booking:
-            return format_html(
-                '<a href="/admin/recreation/booking/{}/change/">{}</a>',
-                obj.booking.booking_id,
-                f"Бронирование #{obj.booking.booking_id}",
-            )
-        return "-"
+        return format_html(
+            '<a href="/admin/recreation/booking/{}/change/">{}</a>',
+            obj.booking_id,
+            f"Бронирование #{obj.booking_id}",
+        )
 
 
 @admin.register(Tag)
@@ -740,7 +966,7 @@ class TagAdmin(admin.ModelAdmin):
 
 
 @admin.register(DZexam)
-class DZexamAdmin(admin.ModelAdmin):
+class DZexamAdmin(EstimatedCountMixin, admin.ModelAdmin):
     list_display = ("title", "created_at", "exam_date", "is_public")
     search_fields = ("title", "users__email")
     list_filter = ("is_public", "created_at")
@@ -754,3 +980,232 @@ class DZexamAdmin(admin.ModelAdmin):
                 '<img src="{}" style="max-height: 50px;" />', obj.image.url
             )
         return "-"
+
+
+@admin.register(DailyKpiSnapshot)
+class KpiDashboardAdmin(admin.ModelAdmin):
+    """Панель показателей: читает только готовые снимки DailyKpiSnapshot.
+
+    Снимки строит команда build_analytics (полностью ночью и с ключом
+    --incremental для дат, затронутых изменениями бронирований и платежей).
+    """
+
+    change_list_template = "admin/kpi_dashboard.html"
+    period_choices = (7, 30, 90, 365)
+    totals_fields = (
+        "bookings_created",
+        "bookings_value",
+        "nights_available",
+        "nights_sold",
+        "room_revenue",
+        "service_revenue",
+        "payments",
+        "reviews",
+        "rating_sum",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def _kpis(self, totals):
+        sold = totals["nights_sold"] or 0
+        available = totals["nights_available"] or 0
+        revenue = (totals["room_revenue"] or 0) + (totals["service_revenue"] or 0)
+        reviews = totals["reviews"] or 0
+        return {
+            "bookings": totals["bookings_created"] or 0,
+            "revenue": revenue,
+            "payments": totals["payments"] or 0,
+            "occupancy": sold / available * 100 if available else 0,
+            "rating": (totals["rating_sum"] or 0) / reviews if reviews else 0,
+            "reviews": reviews,
+        }
+
+    def changelist_view(self, request, extra_context=None):
+        # Представление целиком заменено, поэтому права проверяются здесь:
+        # выручку и загрузку видят только с правом просмотра снимков
+        if not self.has_view_or_change_permission(request):
+            raise PermissionDenied
+        try:
+            days = int(request.GET.get("days", 30))
+        except ValueError:
+            days = 30
+        if days not in self.period_choices:
+            days = 30
+        end = timezone.localdate()
+        start = end - timedelta(days=days - 1)
+
+        rows = list(
+            DailyKpiSnapshot.objects.filter(date__range=(start, end)).order_by("date")
+        )
+        current = {
+            name: sum(getattr(row, name) for row in rows) for name in self.totals_fields
+        }
+        previous = DailyKpiSnapshot.objects.filter(
+            date__range=(start - timedelta(days=days), start - timedelta(days=1))
+        ).aggregate(**{name: Sum(name) for name in self.totals_fields})
+
+        kpis = self._kpis(current)
+        previous_kpis = self._kpis(previous)
+        cards = []
+        for key, title in (
+            ("bookings", "Бронирования"),
+            ("revenue", "Выручка, ₽"),
+            ("payments", "Поступления, ₽"),
+            ("occupancy", "Загрузка, %"),
+            ("rating", "Средняя оценка"),
+        ):
+            value, before = kpis[key], previous_kpis[key]
+            change = (value - before) / before * 100 if before else None
+            cards.append({"title": title, "value": value, "change": change})
+
+        peak = max((row.room_revenue + row.service_revenue for row in rows), default=0)
+        for row in rows:
+            revenue = row.room_revenue + row.service_revenue
+            row.revenue = revenue
+            row.revenue_bar = revenue / peak * 100 if peak else 0
+            row.occupancy_pct = row.occupancy * 100
+
+        context = {
+            **self.admin_site.each_context(request),
+            "title": "Панель показателей",
+            "opts": self.model._meta,
+            "cards": cards,
+            "rows": rows,
+            "days": days,
+            "period_choices": self.period_choices,
+            "start": start,
+            "end": end,
+            "pending_dates": AnalyticsDirtyDate.objects.count(),
+            **(extra_context or {}),
+        }
+        return TemplateResponse(request, self.change_list_template, context)
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Профили запросов (recreation.profiling): сводка по функциям и
+    запросам к БД, скачивание файла для speedscope или flamegraph.pl."""
+
+    list_display = (
+        "created_at",
+        "method",
+        "path",
+        "view_name",
+        "status_code",
+        "duration_ms",
+        "db_ms",
+        "query_count",
+        "trigger",
+    )
+    list_filter = ("trigger", "view_name")
+    search_fields = ("path",)
+    date_hierarchy = "created_at"
+    exclude = ("queries", "profile")
+    readonly_fields = [
+        field.name
+        for field in RequestProfile._meta.fields
+        if field.name not in ("queries", "profile")
+    ] + ["downloads", "functions", "sql_sites"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:pk>/speedscope/",
+                self.admin_site.admin_view(self.download_speedscope),
+                name="recreation_requestprofile_speedscope",
+            ),
+            path(
+                "<int:pk>/collapsed/",
+                self.admin_site.admin_view(self.download_collapsed),
+                name="recreation_requestprofile_collapsed",
+            ),
+        ] + super().get_urls()
+
+    def _get_profile(self, request, pk):
+        # admin_view проверяет только is_staff, а в профиле пути и SQL
+        obj = get_object_or_404(RequestProfile, pk=pk)
+        if not self.has_view_permission(request, obj):
+            raise PermissionDenied
+        return obj
+
+    def _document(self, obj):
+        """Профиль speedscope или None, если файла нет (удалён вручную)."""
+        try:
+            with obj.profile.open("rb") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def download_speedscope(self, request, pk):
+        obj = self._get_profile(request, pk)
+        try:
+            file = obj.profile.open("rb")
+        except FileNotFoundError:
+            raise Http404("Файл профиля не найден")
+        return FileResponse(
+            file,
+            as_attachment=True,
+            filename=f"profile_{obj.pk}.speedscope.json",
+            content_type="application/json",
+        )
+
+    def download_collapsed(self, request, pk):
+        obj = self._get_profile(request, pk)
+        document = self._document(obj)
+        if document is None:
+            raise Http404("Файл профиля не найден")
+        response = HttpResponse(
+            profiling.collapsed(document),
+            content_type="text/plain; charset=utf-8",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="profile_{obj.pk}.collapsed.txt"'
+        )
+        return response
+
+    @admin.display(description="Файлы профиля")
+    def downloads(self, obj):
+        return format_html(
+            '<a href="{}">speedscope</a> (открыть на speedscope.app) · '
+            '<a href="{}">collapsed stacks</a> (flamegraph.pl)',
+            reverse("admin:recreation_requestprofile_speedscope", args=[obj.pk]),
+            reverse("admin:recreation_requestprofile_collapsed", args=[obj.pk]),
+        )
+
+    @admin.display(description="Собственное время функций, мс")
+    def functions(self, obj):
+        document = self._document(obj)
+        if document is None:
+            return "Файл профиля не найден"
+        rows = profiling.top_functions(document)
+        return format_html(
+            "<table>{}</table>",
+            format_html_join(
+                "", "<tr><td>{}</td><td>{}</td></tr>", ((ms, name) for name, ms in rows)
+            ),
+        )
+
+    @admin.display(description="Запросы к БД по месту вызова (число, мс)")
+    def sql_sites(self, obj):
+        rows = profiling.queries_by_site(obj.queries)
+        return format_html(
+            "<table>{}</table>",
+            format_html_join(
+                "",
+                "<tr><td>{}</td><td>{}</td><td>{}</td></tr>",
+                ((count, ms, site or "—") for site, count, ms in rows),
+            ),
+        )
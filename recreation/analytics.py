@@ -0,0 +1,310 @@
+"""Аналитика загрузки и выручки коттеджей.
+
+Расчёт идёт в два этапа:
+
+1. ``build_daily_stats`` выгружает бронирования, суммы услуг и платежи за
+   период тремя агрегирующими запросами, раскладывает каждое бронирование
+   по ночам и сохраняет снимок ``HouseDailyStats`` — строку на каждый
+   коттедж и день (в том числе пустые дни, чтобы знать число доступных ночей).
+2. Отчёты (``occupancy_report``, ``summary``) читают только снимки и
+   группируют их средствами БД по дням, неделям или месяцам, поэтому не
+   зависят от объёма истории бронирований.
+3. ``build_kpi_snapshots`` сворачивает дневные снимки, новые бронирования
+   и отзывы в ``DailyKpiSnapshot`` — одну строку на день для панели
+   администратора. Сигналы помечают затронутые изменениями даты в
+   ``AnalyticsDirtyDate``, и ``rebuild_dirty`` пересчитывает только их.
+
+Показатели:
+    occupancy — продано ночей / доступно ночей;
+    ADR       — выручка за проживание / продано ночей;
+    RevPAR    — выручка за проживание / доступно ночей.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate, TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import (
+    AnalyticsDirtyDate,
+    Booking,
+    DailyKpiSnapshot,
+    House,
+    HouseDailyStats,
+    Payment,
+    Review,
+)
+
+PERIODS = {"day": TruncDay, "week": TruncWeek, "month": TruncMonth}
+CENTS = Decimal("0.01")
+
+
+def _daterange(start, end):
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+def _service_totals(bookings):
+    """{booking_id: сумма цен услуг} одним запросом по промежуточной таблице."""
+    through = Booking.services.through
+    return dict(
+        through.objects.filter(booking_id__in=bookings.values("booking_id"))
+        .values("booking_id")
+        .order_by()
+        .annotate(total=Sum("service__price"))
+        .values_list("booking_id", "total")
+    )
+
+
+def build_daily_stats(start, end, houses=None):
+    """Пересчитывает снимки HouseDailyStats за даты [start, end] включительно.
+
+    ``houses`` — список id коттеджей для частичного пересчёта.
+    Возвращает число записанных строк.
+    """
+    house_qs = House.objects.all()
+    if houses is not None:
+        house_qs = house_qs.filter(house_id__in=houses)
+    house_ids = list(house_qs.values_list("house_id", flat=True))
+    bookings = Booking.objects.filter(
+        house_id__in=house_ids,
+        check_in_date__lte=end,
+        check_out_date__gt=start,
+    )
+    services = _service_totals(bookings)
+
+    sold = defaultdict(int)
+    room = defaultdict(Decimal)
+    extra = defaultdict(Decimal)
+    started = defaultdict(int)
+    for (
+        booking_id,
+        house_id,
+        check_in,
+        check_out,
+        base_cost,
+        total_cost,
+    ) in bookings.values_list(
+        "booking_id",
+        "house_id",
+        "check_in_date",
+        "check_out_date",
+        "base_cost",
+        "total_cost",
+    ).iterator():
+        nights = (check_out - check_in).days
+        if nights <= 0:
+            continue
+        service_total = services.get(booking_id) or Decimal(0)
+        # base_cost заполняется не всегда: тогда проживание = итог минус услуги
+        stay_total = base_cost or max(total_cost - service_total, Decimal(0))
+        per_night = stay_total / nights
+        last_night = check_out - timedelta(days=1)
+        for day in _daterange(max(check_in, start), min(last_night, end)):
+            sold[house_id, day] = 1  # пересекающиеся старые брони — одна ночь
+            room[house_id, day] += per_night
+        if start <= check_in <= end:
+            started[house_id, check_in] += 1
+            extra[house_id, check_in] += service_total
+
+    paid = defaultdict(Decimal)
+    for house_id, day, amount in (
+        Payment.objects.filter(
+            booking__house_id__in=house_ids, payment_date__range=(start, end)
+        )
+        .values("booking__house_id", "payment_date")
+        .order_by()
+        .annotate(amount=Sum("amount"))
+        .values_list("booking__house_id", "payment_date", "amount")
+    ):
+        paid[house_id, day] += amount
+
+    rows = [
+        HouseDailyStats(
+            house_id=house_id,
+            date=day,
+            nights_sold=sold[house_id, day],
+            room_revenue=room[house_id, day].quantize(CENTS, ROUND_HALF_UP),
+            service_revenue=extra[house_id, day],
+            payments=paid[house_id, day],
+            bookings_started=started[house_id, day],
+        )
+        for house_id in house_ids
+        for day in _daterange(start, end)
+    ]
+    with transaction.atomic():
+        HouseDailyStats.objects.filter(
+            house_id__in=house_ids, date__range=(start, end)
+        ).delete()
+        HouseDailyStats.objects.bulk_create(rows, batch_size=2000)
+    return len(rows)
+
+
+def _local_date(value):
+    if value is None or not hasattr(value, "hour"):
+        return value
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+def build_kpi_snapshots(start, end):
+    """Пересчитывает DailyKpiSnapshot за даты [start, end] (снимки домов готовы)."""
+    days = {day: DailyKpiSnapshot(date=day) for day in _daterange(start, end)}
+    for row in (
+        HouseDailyStats.objects.filter(date__range=(start, end))
+        .values("date")
+        .order_by()
+        .annotate(
+            available=Count("id"),
+            sold=Sum("nights_sold"),
+            room=Sum("room_revenue"),
+            extra=Sum("service_revenue"),
+            paid=Sum("payments"),
+        )
+    ):
+        snapshot = days[row["date"]]
+        snapshot.nights_available = row["available"]
+        snapshot.nights_sold = row["sold"] or 0
+        snapshot.room_revenue = row["room"] or 0
+        snapshot.service_revenue = row["extra"] or 0
+        snapshot.payments = row["paid"] or 0
+
+    for row in (
+        Booking.objects.filter(created_at__date__range=(start, end))
+        .annotate(day=TruncDate("created_at"))
+        .values("day")
+        .order_by()
+        .annotate(count=Count("booking_id"), value=Sum("total_cost"))
+    ):
+        days[row["day"]].bookings_created = row["count"]
+        days[row["day"]].bookings_value = row["value"] or 0
+
+    for row in (
+        Review.objects.filter(created_at__date__range=(start, end))
+        .annotate(day=TruncDate("created_at"))
+        .values("day")
+        .order_by()
+        .annotate(count=Count("review_id"), ratings=Sum("rating"))
+    ):
+        days[row["day"]].reviews = row["count"]
+        days[row["day"]].rating_sum = row["ratings"] or 0
+
+    DailyKpiSnapshot.objects.bulk_create(
+        days.values(),
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["date"],
+        update_fields=[
+            field.name
+            for field in DailyKpiSnapshot._meta.concrete_fields
+            if field.name not in ("id", "date")
+        ],
+    )
+    return len(days)
+
+
+def rebuild(start, end):
+    """Полный пересчёт снимков коттеджей и сводных показателей за период."""
+    with transaction.atomic():
+        build_daily_stats(start, end)
+        build_kpi_snapshots(start, end)
+        AnalyticsDirtyDate.objects.filter(date__range=(start, end)).delete()
+
+
+def mark_dirty(*dates, start=None, end=None):
+    """Помечает даты (и/или интервал [start, end)) для инкрементального пересчёта."""
+    days = {_local_date(day) for day in dates if day is not None}
+    if start is not None and end is not None:
+        days.update(_daterange(start, end - timedelta(days=1)))
+    if days:
+        AnalyticsDirtyDate.objects.bulk_create(
+            [AnalyticsDirtyDate(date=day) for day in days], ignore_conflicts=True
+        )
+
+
+def _contiguous(days):
+    """Разбивает отсортированные даты на непрерывные интервалы."""
+    start = previous = None
+    for day in days:
+        if start is None:
+            start = previous = day
+        elif day == previous + timedelta(days=1):
+            previous = day
+        else:
+            yield start, previous
+            start = previous = day
+    if start is not None:
+        yield start, previous
+
+
+def rebuild_dirty():
+    """Пересчитывает только помеченные даты. Возвращает число дат."""
+    with transaction.atomic():
+        days = list(
+            AnalyticsDirtyDate.objects.select_for_update()
+            .order_by("date")
+            .values_list("date", flat=True)
+        )
+        for start, end in _contiguous(days):
+            build_daily_stats(start, end)
+            build_kpi_snapshots(start, end)
+        AnalyticsDirtyDate.objects.filter(date__in=days).delete()
+    return len(days)
+
+
+def _ratio(numerator, denominator, places=CENTS):
+    if not denominator:
+        return Decimal(0)
+    return (Decimal(numerator) / Decimal(denominator)).quantize(places, ROUND_HALF_UP)
+
+
+def _with_kpis(row):
+    available = row["nights_available"]
+    sold = row["nights_sold"] or 0
+    revenue = row["room_revenue"] or Decimal(0)
+    row.update(
+        nights_sold=sold,
+        room_revenue=revenue,
+        occupancy=_ratio(sold, available, Decimal("0.0001")),
+        adr=_ratio(revenue, sold),
+        revpar=_ratio(revenue, available),
+    )
+    return row
+
+
+_AGGREGATES = {
+    "nights_available": Count("id"),
+    "nights_sold": Sum("nights_sold"),
+    "room_revenue": Sum("room_revenue"),
+    "service_revenue": Sum("service_revenue"),
+    "payments": Sum("payments"),
+    "bookings": Sum("bookings_started"),
+}
+
+
+def occupancy_report(start, end, period="month", house=None, by_house=True):
+    """Загрузка, ADR и RevPAR по периодам (day/week/month) из снимков."""
+    stats = HouseDailyStats.objects.filter(date__range=(start, end))
+    if house is not None:
+        stats = stats.filter(house_id=house)
+    group = ["period", "house_id", "house__name"] if by_house else ["period"]
+    rows = (
+        stats.annotate(period=PERIODS[period]("date"))
+        .values(*group)
+        .order_by(*group)
+        .annotate(**_AGGREGATES)
+    )
+    return [_with_kpis(row) for row in rows]
+
+
+def summary(start, end):
+    """Итоговые показатели за период по всем коттеджам."""
+    row = HouseDailyStats.objects.filter(date__range=(start, end)).aggregate(
+        **_AGGREGATES
+    )
+    return _with_kpis(row)
@@ -1,18 +1,166 @@
-from django.db.models import Avg
+from datetime import date
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Avg, Count
+from django.db.models.functions import TruncMonth
+from django.http import Http404
+from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.filters import SearchFilter  # Добавляем импорт
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.parsers import FileUploadParser, MultiPartParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .analytics import PERIODS, occupancy_report, summary
+from .changefeed import (
+    DEFAULT_LIMIT,
+    FEED_MODELS,
+    CursorExpired,
+    head_cursor,
+    read_changes,
+)
+from .conditional import conditional_get, house_version
+from .hashers import auth_metrics_per_minute
+from .ingest import (
+    FORMATS,
+    IngestReport,
+    ingest_booking_rows,
+    ingest_bookings,
+    ingest_review_rows,
+    iter_items,
+    text_stream,
+)
+from .models import (
+    Booking,
+    Client,
+    House,
+    HouseReviewInsights,
+    Review,
+    ReviewAnalysis,
+    ReviewStats,
+)
+from .normalizers import search_q
+from .serializers import (
+    BookingSerializer,
+    HouseSerializer,
+    ReviewSerializer,
+    ReviewStatsSerializer,
+    booking_reader,
+    house_reader,
+    review_reader,
+)
+
+BULK_MAX_ITEMS = 10_000
+
+
+def _split_param(value):
+    return [name.strip() for name in value.split(",") if name.strip()] if value else []
+
+
+def report_status(report):
+    """201 — что-то создано; 400 — ни одна строка не прошла проверку;
+    200 — проверка без записи (dry_run) или пустой ввод."""
+    if report.created:
+        return 201
+    if report.errors and not report.validated:
+        return 400
+    return 200
+
+
+def bulk_response(request, ingest_rows):
+    """Общая часть bulk-эндпоинтов: массив объектов в теле запроса,
+    импорт одной транзакцией и результат по каждому элементу (по индексу)."""
+    items = request.data
+    if not isinstance(items, list):
+        return Response({"detail": "Ожидался массив объектов"}, status=400)
+    if len(items) > BULK_MAX_ITEMS:
+        return Response(
+            {"detail": f"Не больше {BULK_MAX_ITEMS} объектов за запрос"}, status=400
+        )
+    dry_run = request.query_params.get("dry_run") == "1"
+    report = IngestReport(track_created=True)
+    with transaction.atomic():
+        ingest_rows(iter_items(items), dry_run=dry_run, report=report)
+    errors = {error["line"]: error["errors"] for error in report.errors}
+
+    def result(index):
+        if index in errors:
+            return {"index": index, "errors": errors[index]}
+        if dry_run:
+            return {"index": index, "validated": True}
+        return {"index": index, "id": report.created_ids.get(index)}
+
+    results = [result(index) for index in range(len(items))]
+    return Response(
+        {
+            "processed": report.processed,
+            "created": report.created,
+            "validated": report.validated,
+            "failed": len(report.errors),
+            "results": results,
+        },
+        status=report_status(report),
+    )
+
+
+class ValuesListMixin:
+    """Чтение через ValuesReader: строки из values_list() без создания
+    моделей и полей ModelSerializer. Запись (create, update) работает через
+    serializer_class как обычно.
 
-from .models import Booking, House, Review
-from .serializers import BookingSerializer, HouseSerializer, ReviewSerializer
+    ``?fields=a,b,связь.поле`` оставляет в ответе только эти поля,
+    ``?expand=связь`` вкладывает связанный объект. Выбираются только нужные
+    колонки, связи — JOIN в том же запросе, так что число запросов не
+    зависит ни от размера страницы, ни от числа раскрытых связей.
+    """
 
+    values_reader = None
 
-class HouseViewSet(viewsets.ModelViewSet):
+    def get_values_reader(self):
+        params = self.request.query_params
+        fields = _split_param(params.get("fields"))
+        expand = _split_param(params.get("expand"))
+        if not fields and not expand:
+            return self.values_reader
+        return self.values_reader.shape(fields or None, expand)
+
+    def values_response(self, queryset, paginate=True):
+        reader = self.get_values_reader()
+        rows = reader.values(queryset)
+        page = self.paginate_queryset(rows) if paginate else None
+        if page is not None:
+            return self.get_paginated_response(reader.to_dicts(page))
+        return Response(reader.to_dicts(rows))
+
+    def list(self, request, *args, **kwargs):
+        return self.values_response(self.filter_queryset(self.get_queryset()))
+
+    def retrieve(self, request, *args, **kwargs):
+        # Как get_object(), но одной строкой values_list; объектных
+        # разрешений у этих viewset нет
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        reader = self.get_values_reader()
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]}
+            )
+            data = reader.to_dicts(reader.values(queryset)[:1])
+        except (TypeError, ValueError, DjangoValidationError):
+            data = None
+        if not data:
+            raise Http404
+        return Response(data[0])
+
+
+class HouseViewSet(ValuesListMixin, viewsets.ModelViewSet):
     queryset = House.objects.all()
     serializer_class = HouseSerializer
+    values_reader = house_reader
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [
         DjangoFilterBackend,
@@ -25,14 +173,23 @@ class HouseViewSet(viewsets.ModelViewSet):
     }
     search_fields = ["name", "description", "location"]
 
+    # Условный GET: версия — дата последней записи в истории коттеджей,
+    # при совпадении ETag ответ 304 отдаётся без выборки и сериализации
+    @method_decorator(conditional_get(house_version))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @method_decorator(conditional_get(house_version))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=False, methods=["GET"])
     def top_rated(self, request):
         """Возвращает 5 коттеджей с самым высоким рейтингом."""
-        houses = House.objects.annotate(avg_rating=Avg("reviews__rating")).order_by(
+        houses = House.objects.annotate(avg_rating=Avg("review__rating")).order_by(
             "-avg_rating"
         )[:5]
-        serializer = HouseSerializer(houses, many=True)
-        return Response(serializer.data)
+        return self.values_response(houses, paginate=False)
 
     @action(detail=True, methods=["POST"])
     def book(self, request, pk=None):
@@ -48,8 +205,7 @@ class HouseViewSet(viewsets.ModelViewSet):
     def cheapest(self, request):
         """Топ-5 самых дешёвых коттеджей"""
         queryset = self.get_queryset().order_by("price_per_night")[:5]
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.values_response(queryset, paginate=False)
 
     @action(detail=True, methods=["POST"])
     def set_inactive(self, request, pk=None):
@@ -59,27 +215,107 @@ class HouseViewSet(viewsets.ModelViewSet):
         house.save()
         return Response({"status": "house set to inactive"})
 
+    @action(detail=True, methods=["GET"])
+    def keywords(self, request, pk=None):
+        """Облако ключевых слов по отзывам коттеджа (из analyze_reviews)."""
+        house = self.get_object()
+        insights = HouseReviewInsights.objects.filter(house=house).first()
+        if insights is None:
+            return Response({"keywords": {}, "avg_sentiment": None, "reviews": 0})
+        return Response(
+            {
+                "keywords": insights.keywords,
+                "avg_sentiment": insights.avg_sentiment,
+                "reviews": insights.reviews_analyzed,
+                "updated": insights.updated,
+            }
+        )
+
+    @action(detail=True, methods=["GET"])
+    def sentiment(self, request, pk=None):
+        """Средняя тональность отзывов коттеджа по месяцам."""
+        house = self.get_object()
+        trend = (
+            ReviewAnalysis.objects.filter(house=house)
+            .annotate(month=TruncMonth("review__created_at"))
+            .values("month")
+            .annotate(avg_sentiment=Avg("sentiment"), reviews=Count("review"))
+            .order_by("month")
+        )
+        return Response(list(trend))
+
     @action(detail=False, methods=["GET"])
     def inactive(self, request):
         """Получение списка неактивных домов (GET запрос без указания объекта)"""
         queryset = self.get_queryset().filter(is_active=False)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.values_response(queryset, paginate=False)
 
 
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(ValuesListMixin, viewsets.ModelViewSet):
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
+    values_reader = booking_reader
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    @action(
+        detail=False,
+        methods=["POST"],
+        permission_classes=[IsAdminUser],
+        parser_classes=[MultiPartParser, FileUploadParser],
+    )
+    def ingest(self, request):
+        """Пакетный импорт бронирований из файла CSV/JSON Lines (поле file)."""
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"detail": "Не передан файл"}, status=400)
+        fmt = request.query_params.get("input_format", "csv")
+        if fmt not in FORMATS:
+            return Response({"detail": f"Неизвестный формат: {fmt}"}, status=400)
+
+        report = ingest_bookings(
+            text_stream(upload.file),
+            fmt=fmt,
+            dry_run=request.query_params.get("dry_run") == "1",
+        )
+        return Response(report.as_dict(), status=report_status(report))
+
+    @action(detail=False, methods=["POST"], permission_classes=[IsAdminUser])
+    def bulk(self, request):
+        """Пакетное создание бронирований: JSON-массив объектов с полями как
+        в импорте (house, check_in_date, check_out_date, guests, email, ...)."""
+        return bulk_response(request, ingest_booking_rows)
 
-class ReviewViewSet(viewsets.ModelViewSet):
+
+class ReviewViewSet(ValuesListMixin, viewsets.ModelViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
+    values_reader = review_reader
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [SearchFilter]
     search_fields = ["comment", "client_id__last_name"]
 
+    @action(detail=False, methods=["POST"], permission_classes=[IsAdminUser])
+    def bulk(self, request):
+        """Пакетное создание отзывов: JSON-массив объектов с полями house_id,
+        client_id, rating, comment."""
+        return bulk_response(request, ingest_review_rows)
+
+    @action(detail=False, methods=["GET"])
+    def stats(self, request):
+        """Гистограммы оценок: общая и по коттеджам (?house=<id> — один коттедж)."""
+        houses = ReviewStats.objects.filter(house__isnull=False).order_by("house_id")
+        house_id = request.query_params.get("house")
+        if house_id:
+            if not house_id.isdigit():
+                return Response({"detail": "Некорректный коттедж"}, status=400)
+            houses = houses.filter(house_id=house_id)
+        return Response(
+            {
+                "global": ReviewStatsSerializer(ReviewStats.get_global()).data,
+                "houses": ReviewStatsSerializer(houses, many=True).data,
+            }
+        )
+
 
 class HouseHistoryViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = HouseSerializer
@@ -87,3 +323,135 @@ class HouseHistoryViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         house_id = self.kwargs["house_id"]
         return House.history.filter(id=house_id)
+
+
+class OccupancyReportAPI(APIView):
+    """Загрузка, ADR, RevPAR и выручка по снимкам HouseDailyStats (для персонала).
+
+    Параметры: start, end (ГГГГ-ММ-ДД), period (day/week/month), house,
+    by_house=0 — без разбивки по коттеджам.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        today = timezone.now().date()
+        params = request.query_params
+        try:
+            start = date.fromisoformat(params.get("start", str(today.replace(day=1))))
+            end = date.fromisoformat(params.get("end", str(today)))
+        except ValueError:
+            return Response(
+                {"detail": "Даты должны быть в формате ГГГГ-ММ-ДД"}, status=400
+            )
+        period = params.get("period", "month")
+        if period not in PERIODS:
+            return Response({"detail": f"Неизвестный период: {period}"}, status=400)
+        house = params.get("house")
+        if house is not None and not house.isdigit():
+            return Response({"detail": "Некорректный коттедж"}, status=400)
+
+        return Response(
+            {
+                "summary": summary(start, end),
+                "periods": occupancy_report(
+                    start,
+                    end,
+                    period=period,
+                    house=house,
+                    by_house=params.get("by_house") != "0",
+                ),
+            }
+        )
+
+
+class ClientSearchAPI(APIView):
+    """Поиск клиентов по началу ФИО, телефона или email (для персонала).
+
+    Параметры: q — строка поиска, limit — число результатов (до 50).
+    Запрос идёт по индексированным поисковым колонкам и читает только
+    нужные поля, без создания объектов моделей.
+    """
+
+    permission_classes = [IsAdminUser]
+    max_limit = 50
+
+    def get(self, request):
+        condition = search_q(request.query_params.get("q", ""))
+        if condition is None:
+            return Response({"results": []})
+        try:
+            limit = min(int(request.query_params.get("limit", 20)), self.max_limit)
+        except ValueError:
+            return Response({"detail": "limit должен быть числом"}, status=400)
+        results = (
+            Client.objects.filter(condition)
+            .order_by("search_name", "client_id")
+            .values(
+                "client_id",
+                "last_name",
+                "first_name",
+                "patronymic",
+                "phone_number",
+                "email",
+            )[: max(limit, 1)]
+        )
+        return Response({"results": list(results)})
+
+
+class AuthMetricsAPI(APIView):
+    """Поминутные счётчики входа: число и время хеширований паролей,
+    неудачные и отклонённые лимитом попытки (для персонала).
+
+    Параметры: minutes — глубина истории в минутах (до 120).
+    """
+
+    permission_classes = [IsAdminUser]
+    max_minutes = 120
+
+    def get(self, request):
+        try:
+            minutes = int(request.query_params.get("minutes", 60))
+        except ValueError:
+            return Response({"detail": "minutes должен быть числом"}, status=400)
+        minutes = min(max(minutes, 1), self.max_minutes)
+        return Response({"results": auth_metrics_per_minute(minutes)})
+
+
+class ChangeFeedAPI(APIView):
+    """Лента изменений коттеджей, отзывов, услуг и постов.
+
+    Без cursor возвращает только текущий курсор: клиент запоминает его,
+    загружает списки целиком и дальше запрашивает ?cursor=<последний>.
+    Параметры: limit — размер страницы (до 1000), models — через запятую
+    (house, review, service, post). 410 — курсор устарел, нужна полная
+    загрузка.
+    """
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get(self, request):
+        params = request.query_params
+        if "cursor" not in params:
+            return Response({"changes": [], "cursor": head_cursor(), "has_more": False})
+        try:
+            cursor = int(params["cursor"])
+            limit = int(params.get("limit", DEFAULT_LIMIT))
+        except ValueError:
+            return Response(
+                {"detail": "cursor и limit должны быть числами"}, status=400
+            )
+        models = _split_param(params.get("models")) or None
+        unknown = set(models or ()) - set(FEED_MODELS)
+        if unknown:
+            return Response(
+                {"detail": f"Неизвестные модели: {', '.join(sorted(unknown))}"},
+                status=400,
+            )
+        try:
+            feed = read_changes(max(cursor, 0), max(limit, 1), models)
+        except CursorExpired:
+            return Response(
+                {"detail": "Курсор устарел, загрузите данные заново"}, status=410
+            )
+        return Response(feed)
@@ -5,3 +5,6 @@ class RecreationConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "recreation"
     verbose_name = "База отдыха"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,197 @@
+"""Сборка статики: сторонние библиотеки и общие бандлы (``manage.py build_assets``).
+
+Библиотеки, которые раньше подключались с нескольких CDN, скачиваются один
+раз по зафиксированным версиям в ``static/vendor/`` (структура каталогов
+как на CDN, чтобы работали относительные ссылки на шрифты и картинки).
+Из них и из стилей страниц (``static/css/pages/``) собираются минимизированные
+бандлы в ``static/dist/``. Дальше ``collectstatic`` с
+CompressedManifestStaticFilesStorage добавляет к именам хеш содержимого и
+пишет рядом .gz/.br, поэтому файлы можно кешировать на год.
+
+Шаблоны подключают бандлы тегом ``{% bundle %}`` (``bundle_paths``): пока
+бандл не собран, подключаются его исходники — стили из ``css/pages/`` и
+библиотеки из ``static/vendor/`` или, если они не скачаны, с CDN, —
+поэтому страницы работают и в свежем клоне без сети.
+"""
+
+import posixpath
+import re
+import urllib.request
+from functools import cache
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+CDNJS = "https://cdnjs.cloudflare.com/ajax/libs"
+
+# Путь в static/vendor/ → адрес на CDN
+VENDOR_FILES = {
+    "bootstrap/css/bootstrap.min.css": "https://stackpath.bootstrapcdn.com/bootstrap/4.5.2/css/bootstrap.min.css",
+    "bootstrap/js/bootstrap.min.js": "https://stackpath.bootstrapcdn.com/bootstrap/4.5.2/js/bootstrap.min.js",
+    "jquery/jquery.min.js": "https://code.jquery.com/jquery-3.5.1.min.js",
+    "popper/popper.min.js": "https://cdn.jsdelivr.net/npm/popper.js@1.16.1/dist/umd/popper.min.js",
+    "font-awesome/css/all.min.css": f"{CDNJS}/font-awesome/6.0.0/css/all.min.css",
+    **{
+        f"font-awesome/webfonts/{font}.{ext}": f"{CDNJS}/font-awesome/6.0.0/webfonts/{font}.{ext}"
+        for font in (
+            "fa-brands-400",
+            "fa-regular-400",
+            "fa-solid-900",
+            "fa-v4compatibility",
+        )
+        for ext in ("woff2", "ttf")
+    },
+    "slick/slick.min.css": f"{CDNJS}/slick-carousel/1.8.1/slick.min.css",
+    "slick/slick-theme.min.css": f"{CDNJS}/slick-carousel/1.8.1/slick-theme.min.css",
+    "slick/slick.min.js": f"{CDNJS}/slick-carousel/1.8.1/slick.min.js",
+    "slick/ajax-loader.gif": f"{CDNJS}/slick-carousel/1.8.1/ajax-loader.gif",
+    **{
+        f"slick/fonts/slick.{ext}": f"{CDNJS}/slick-carousel/1.8.1/fonts/slick.{ext}"
+        for ext in ("eot", "woff", "ttf", "svg")
+    },
+    "bootstrap-datepicker/css/bootstrap-datepicker.min.css": f"{CDNJS}/bootstrap-datepicker/1.9.0/css/bootstrap-datepicker.min.css",
+    "bootstrap-datepicker/js/bootstrap-datepicker.min.js": f"{CDNJS}/bootstrap-datepicker/1.9.0/js/bootstrap-datepicker.min.js",
+    "bootstrap-datepicker/locales/bootstrap-datepicker.ru.min.js": f"{CDNJS}/bootstrap-datepicker/1.9.0/locales/bootstrap-datepicker.ru.min.js",
+    "lightbox2/css/lightbox.min.css": f"{CDNJS}/lightbox2/2.11.3/css/lightbox.min.css",
+    "lightbox2/js/lightbox.min.js": f"{CDNJS}/lightbox2/2.11.3/js/lightbox.min.js",
+    **{
+        f"lightbox2/images/{image}": f"{CDNJS}/lightbox2/2.11.3/images/{image}"
+        for image in ("close.png", "loading.gif", "next.png", "prev.png")
+    },
+    "jquery-mask/jquery.mask.min.js": f"{CDNJS}/jquery.mask/1.14.16/jquery.mask.min.js",
+}
+
+# Бандл в static/dist/ → исходные файлы относительно static/ (порядок важен)
+BUNDLES = {
+    "vendor.css": [
+        "vendor/bootstrap/css/bootstrap.min.css",
+        "vendor/font-awesome/css/all.min.css",
+        "vendor/slick/slick.min.css",
+        "vendor/slick/slick-theme.min.css",
+        "vendor/bootstrap-datepicker/css/bootstrap-datepicker.min.css",
+        "vendor/lightbox2/css/lightbox.min.css",
+    ],
+    "vendor.js": [
+        "vendor/jquery/jquery.min.js",
+        "vendor/popper/popper.min.js",
+        "vendor/bootstrap/js/bootstrap.min.js",
+        "vendor/slick/slick.min.js",
+        "vendor/bootstrap-datepicker/js/bootstrap-datepicker.min.js",
+        "vendor/bootstrap-datepicker/locales/bootstrap-datepicker.ru.min.js",
+        "vendor/lightbox2/js/lightbox.min.js",
+        "vendor/jquery-mask/jquery.mask.min.js",
+    ],
+}
+PAGE_STYLES = "css/pages"  # каждый файл собирается в dist/pages/<имя>.css
+
+_SOURCE_MAP_RE = re.compile(r"^\s*(//|/\*)# sourceMappingURL=.*$", re.M)
+_CSS_TOKEN_RE = re.compile(
+    r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*.*?\*/)""", re.S
+)
+_CSS_SPACES_RE = re.compile(r"\s+")
+_CSS_PUNCT_RE = re.compile(r"\s*([{};,])\s*")
+_CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+def static_dir():
+    return Path(settings.BASE_DIR) / "static"
+
+
+def download_vendor(force=False, opener=urllib.request.urlopen):
+    """Скачивает недостающие файлы библиотек; возвращает список скачанных."""
+    root = static_dir() / "vendor"
+    downloaded = []
+    for name, url in VENDOR_FILES.items():
+        target = root / name
+        if target.exists() and not force:
+            continue
+        with opener(url, timeout=30) as response:
+            content = response.read()
+        if target.suffix in (".js", ".css"):
+            # Карт исходников нет в static/, а ManifestStaticFilesStorage
+            # падает на ссылках на несуществующие файлы
+            content = _SOURCE_MAP_RE.sub("", content.decode("utf-8")).encode("utf-8")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+        downloaded.append(name)
+    return downloaded
+
+
+def minify_css(css):
+    """Удаляет комментарии (кроме /*! ... */) и лишние пробелы, не трогая строки."""
+    parts = []
+    for index, chunk in enumerate(_CSS_TOKEN_RE.split(css)):
+        if chunk is None:
+            continue
+        kind = index % 3
+        if kind == 1:  # строка в кавычках — без изменений
+            parts.append(chunk)
+        elif kind == 2:  # комментарий
+            if chunk.startswith("/*!"):
+                parts.append(chunk)
+        else:
+            chunk = _CSS_SPACES_RE.sub(" ", chunk)
+            parts.append(_CSS_PUNCT_RE.sub(r"\1", chunk))
+    return "".join(parts).replace(";}", "}").strip()
+
+
+def rebase_css_urls(css, source, target):
+    """Пересчитывает относительные url(...) из source для файла target
+    (оба пути относительно static/)."""
+
+    def replace(match):
+        quote, url = match.groups()
+        if url.startswith(("data:", "http:", "https:", "/", "#")):
+            return match.group(0)
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(source), url))
+        return (
+            f"url({quote}{posixpath.relpath(path, posixpath.dirname(target))}{quote})"
+        )
+
+    return _CSS_URL_RE.sub(replace, css)
+
+
+def build_bundle(name, sources):
+    """Собирает бандл dist/<name> из sources; возвращает его размер в байтах."""
+    root = static_dir()
+    target = f"dist/{name}"
+    chunks = []
+    for source in sources:
+        content = _SOURCE_MAP_RE.sub("", (root / source).read_text(encoding="utf-8"))
+        if name.endswith(".css"):
+            chunks.append(minify_css(rebase_css_urls(content, source, target)))
+        else:
+            # Библиотеки уже минимизированы; «;» защищает от склейки выражений
+            chunks.append(content.strip().rstrip(";") + ";")
+    output = root / target
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text("\n".join(chunks) + "\n", encoding="utf-8")
+    return output.stat().st_size
+
+
+def bundles():
+    """Все бандлы: общие библиотеки и стили каждой страницы."""
+    result = dict(BUNDLES)
+    for path in sorted((static_dir() / PAGE_STYLES).glob("*.css")):
+        result[f"pages/{path.name}"] = [f"{PAGE_STYLES}/{path.name}"]
+    return result
+
+
+@cache
+def bundle_paths(name):
+    """Что подключить вместо бандла name: пути относительно static/ или URL CDN.
+
+    Результат запоминается до перезапуска процесса: после build_assets
+    (и collectstatic) сервер нужно перезапустить.
+    """
+    if finders.find(f"dist/{name}"):
+        return [f"dist/{name}"]
+    paths = []
+    for source in bundles()[name]:
+        vendor_name = source.removeprefix("vendor/")
+        if vendor_name in VENDOR_FILES and not finders.find(source):
+            paths.append(VENDOR_FILES[vendor_name])
+        else:
+            paths.append(source)
+    return paths
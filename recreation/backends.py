@@ -1,16 +1,77 @@
-from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.backends import BaseBackend, ModelBackend
+from django.core.exceptions import PermissionDenied
 
-from .models import CustomUser, models
+from .hashers import record_event
+from .models import CustomUser
+from .normalizers import normalize_email, to_e164
+from .throttling import login_throttle
 
 
 class EmailPhoneBackend(ModelBackend):
+    """Вход по email или телефону в любом написании.
+
+    Поиск идёт одним запросом по уникальному индексу: email_normalized для
+    строк с «@», иначе phone_e164; если не нашлось — по имени пользователя.
+    Остальные строки проверяет ModelBackend (родительский класс). Бэкенд
+    заменяет ModelBackend в AUTHENTICATION_BACKENDS: иначе для неизвестного
+    email или телефона пароль хешировался бы дважды, и такой вход был бы
+    вдвое дольше неудачного входа существующего пользователя.
+    """
+
+    def get_lookup(self, username):
+        if "@" in username:
+            email = normalize_email(username)
+            return {"email_normalized": email} if email else None
+        phone = to_e164(username)
+        return {"phone_e164": phone} if phone else None
+
     def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(CustomUser.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        lookup = self.get_lookup(username)
+        if lookup is None:
+            return super().authenticate(request, username, password)
+        users = CustomUser._default_manager
+        user = (
+            users.filter(**lookup).first()
+            or users.filter(**{CustomUser.USERNAME_FIELD: username}).first()
+        )
+        if user is None:
+            # Хешируем пароль и для несуществующих пользователей, чтобы
+            # по времени ответа нельзя было узнать, зарегистрирован ли адрес
+            CustomUser().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user(self, user_id):
+        # Пользователь сессии загружается вместе с профилем клиента одним
+        # запросом с JOIN: профиль нужен почти каждой странице сайта
         try:
-            # Пробуем найти по email или телефону
-            user = CustomUser.objects.get(
-                models.Q(email=username) | models.Q(phone=username)
+            user = CustomUser._default_manager.select_related("client_profile").get(
+                pk=user_id
             )
-            if user.check_password(password):
-                return user
         except CustomUser.DoesNotExist:
             return None
+        return user if self.user_can_authenticate(user) else None
+
+
+class LoginThrottleBackend(BaseBackend):
+    """Первый в AUTHENTICATION_BACKENDS: отклоняет вход до проверки пароля.
+
+    PermissionDenied останавливает перебор бэкендов в authenticate(), поэтому
+    при превышении лимита PBKDF2 не выполняется ни одним из них.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(CustomUser.USERNAME_FIELD)
+        if username is not None and login_throttle.retry_after(request, username):
+            record_event("login_throttled")
+            if request is not None:
+                request.login_throttled = True  # не считать как неудачную попытку
+            raise PermissionDenied
+        return None
@@ -0,0 +1,392 @@
+"""Потоковое резервное копирование и восстановление базы данных.
+
+Каждая модель выгружается порциями по первичному ключу (keyset-пагинация)
+в сжатый NDJSON: одна строка — одна запись, поэтому ни выгрузка, ни
+загрузка не держат таблицу в памяти целиком. Первой строкой файла идёт
+манифест с параметрами копии.
+
+Инкрементальная копия (``since``) содержит только изменившиеся записи
+для моделей с историей (simple_history): объекты, у которых есть
+исторические записи после метки времени, и удаления; таблицы истории —
+записи после метки. Остальные модели выгружаются целиком (по меткам
+auto_now_add не видно правок и удалений старых записей) и перечислены
+в манифесте в ``full``: при восстановлении их записи, которых нет
+в копии, удаляются.
+
+Восстановление выполняется в порядке зависимостей через ``bulk_create`` с
+обновлением при конфликте первичного ключа. Поля auto_now/auto_now_add
+на это время отключаются, и метки времени берутся из копии, поэтому
+повторный запуск на той же базе даёт тот же результат.
+"""
+
+import gzip
+import json
+import sqlite3
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.db.backends.utils import truncate_name
+from django.db.models import DateTimeField
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+FORMAT_VERSION = 1
+DEFAULT_CHUNK_SIZE = 2000
+
+# Служебные таблицы, которые не имеет смысла переносить между базами
+DEFAULT_EXCLUDE = ("sessions.session", "admin.logentry")
+
+
+def backup_models(exclude=DEFAULT_EXCLUDE):
+    """Возвращает модели проекта в порядке зависимостей (сначала родители).
+
+    Сортировка топологическая по внешним ключам; промежуточные таблицы M2M
+    попадают после обеих связанных моделей. Циклы (если появятся) не
+    блокируют выгрузку: ограничения FK в транзакции проверяются отложенно.
+    """
+    models = [
+        model
+        for model in apps.get_models(include_auto_created=True)
+        if model._meta.managed
+        and not model._meta.proxy
+        and model._meta.label_lower not in exclude
+    ]
+    dependencies = {
+        model: {
+            field.related_model
+            for field in model._meta.concrete_fields
+            if field.is_relation and field.related_model is not model
+        }
+        for model in models
+    }
+
+    ordered, visiting = [], set()
+
+    def visit(model):
+        if model in ordered or model in visiting:
+            return
+        visiting.add(model)
+        for parent in dependencies.get(model, ()):
+            if parent in dependencies:
+                visit(parent)
+        visiting.discard(model)
+        ordered.append(model)
+
+    for model in models:
+        visit(model)
+    return ordered
+
+
+def _history_model(model):
+    """Возвращает модель истории simple_history, если она есть у модели."""
+    manager_name = getattr(model._meta, "simple_history_manager_attribute", None)
+    if manager_name is None:
+        return None
+    return getattr(model, manager_name).model
+
+
+def _change_field(model):
+    """Поле, по которому можно отобрать изменившиеся записи модели.
+
+    Только history_date таблиц simple_history: в них записи лишь
+    добавляются. auto_now_add не меняется при правке, а auto_now не
+    показывает удалений, поэтому такие модели выгружаются целиком.
+    """
+    for field in model._meta.concrete_fields:
+        if field.name == "history_date" and isinstance(field, DateTimeField):
+            return field.name
+    return None
+
+
+def _attnames(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def _iter_chunks(queryset, pk_name, attnames, chunk_size):
+    """Выгружает queryset порциями по возрастанию первичного ключа."""
+    last_pk = None
+    while True:
+        chunk = queryset.order_by(pk_name)
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        rows = list(chunk.values_list(*attnames)[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last_pk = rows[-1][attnames.index(pk_name)]
+
+
+def _changed_queryset(model, since):
+    """Возвращает (queryset изменившихся записей, удалённые pk) или None."""
+    manager = model._default_manager
+    history_model = _history_model(model)
+    if history_model is not None:
+        pk_name = model._meta.pk.attname
+        changed = (
+            history_model.objects.filter(history_date__gte=since)
+            .values_list(pk_name, flat=True)
+            .distinct()
+        )
+        queryset = manager.filter(pk__in=changed)
+        deleted = history_model.objects.filter(
+            history_date__gte=since, history_type="-"
+        ).exclude(**{f"{pk_name}__in": manager.values("pk")})
+        return queryset, deleted.values_list(pk_name, flat=True).distinct()
+
+    field = _change_field(model)
+    if field:
+        return manager.filter(**{f"{field}__gte": since}), []
+    return None
+
+
+def write_backup(fileobj, since=None, chunk_size=DEFAULT_CHUNK_SIZE, models=None):
+    """Пишет копию в бинарный файл (сжатый gzip NDJSON), возвращает статистику."""
+    models = models or backup_models()
+    changed = {}
+    if since is not None:
+        changed = {model: _changed_queryset(model, since) for model in models}
+    stats = {}
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    with gzip.open(fileobj, "wt", encoding="utf-8") as out:
+        out.write(
+            encoder.encode(
+                {
+                    "format": FORMAT_VERSION,
+                    "created": timezone.now(),
+                    "since": since,
+                    "models": [model._meta.label_lower for model in models],
+                    # Модели, выгруженные целиком в инкрементальной копии
+                    "full": [
+                        model._meta.label_lower
+                        for model, selected in changed.items()
+                        if selected is None
+                    ],
+                }
+            )
+            + "\n"
+        )
+        for model in models:
+            label = model._meta.label_lower
+            pk_name = model._meta.pk.attname
+            attnames = _attnames(model)
+            queryset, deleted = changed.get(model) or (model._default_manager.all(), [])
+
+            count = 0
+            for rows in _iter_chunks(queryset, pk_name, attnames, chunk_size):
+                for row in rows:
+                    out.write(
+                        encoder.encode({"m": label, "f": dict(zip(attnames, row))})
+                    )
+                    out.write("\n")
+                count += len(rows)
+            for pk in deleted:
+                out.write(encoder.encode({"m": label, "d": pk}) + "\n")
+            stats[label] = count
+    return stats
+
+
+def sqlite_online_backup(target_path, using="default", pages=1024):
+    """Снимок базы SQLite через online backup API без остановки записи."""
+    connection = connections[using]
+    connection.ensure_connection()
+    target = sqlite3.connect(target_path)
+    try:
+        connection.connection.backup(target, pages=pages)
+    finally:
+        target.close()
+
+
+def sqlite_online_restore(source_path, using="default", pages=1024):
+    """Восстанавливает базу SQLite из снимка через online backup API."""
+    connection = connections[using]
+    connection.ensure_connection()
+    source = sqlite3.connect(source_path)
+    try:
+        source.backup(connection.connection, pages=pages)
+    finally:
+        source.close()
+
+
+@contextmanager
+def _timestamps_from_backup(model):
+    """Отключает auto_now/auto_now_add: bulk_create берёт метки из копии.
+
+    Флаги полей общие для процесса, поэтому восстановление запускается
+    отдельной командой, а не рядом с обработкой запросов.
+    """
+    fields = [
+        (field, field.auto_now, field.auto_now_add)
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class _ModelLoader:
+    """Накопитель записей одной модели для пакетной вставки.
+
+    С ``track_seen`` пишет pk загруженных записей во временную таблицу,
+    чтобы затем удалить записи, которых в копии нет (модели из ``full``
+    манифеста). Память при этом не растёт с размером таблицы.
+    """
+
+    def __init__(self, model, using, track_seen=False):
+        self.model = model
+        self.using = using
+        self.track_seen = track_seen
+        self.seen_table = None
+        self.fields = {f.attname: f for f in model._meta.concrete_fields}
+        pk = model._meta.pk
+        self.pk_name = pk.name
+        self.update_fields = [
+            f.name for f in model._meta.concrete_fields if not f.primary_key
+        ]
+        self.pending = []
+        self.deleted = []
+        self.loaded = 0
+
+    def add(self, values):
+        kwargs = {}
+        for attname, value in values.items():
+            field = self.fields.get(attname)
+            if field is not None:
+                kwargs[attname] = None if value is None else field.to_python(value)
+        self.pending.append(self.model(**kwargs))
+
+    def flush(self):
+        if self.pending:
+            manager = self.model._base_manager.using(self.using)
+            with _timestamps_from_backup(self.model):
+                if self.update_fields:
+                    manager.bulk_create(
+                        self.pending,
+                        update_conflicts=True,
+                        unique_fields=[self.pk_name],
+                        update_fields=self.update_fields,
+                    )
+                else:
+                    manager.bulk_create(self.pending, ignore_conflicts=True)
+            if self.track_seen:
+                self._remember([obj.pk for obj in self.pending])
+            self.loaded += len(self.pending)
+            self.pending = []
+        if self.deleted:
+            self.model._base_manager.using(self.using).filter(
+                pk__in=self.deleted
+            ).delete()
+            self.deleted = []
+
+    def _remember(self, pks):
+        connection = connections[self.using]
+        pk = self.model._meta.pk
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            if self.seen_table is None:
+                self.seen_table = truncate_name(
+                    f"restore_seen_{self.model._meta.db_table}",
+                    connection.ops.max_name_length(),
+                )
+                cursor.execute(
+                    f"CREATE TEMPORARY TABLE {quote(self.seen_table)} "
+                    f"(pk {pk.rel_db_type(connection)} NOT NULL)"
+                )
+                index = truncate_name(
+                    f"{self.seen_table}_pk", connection.ops.max_name_length()
+                )
+                cursor.execute(
+                    f"CREATE INDEX {quote(index)} ON {quote(self.seen_table)} (pk)"
+                )
+            if pks:
+                cursor.executemany(
+                    f"INSERT INTO {quote(self.seen_table)} (pk) VALUES (%s)",
+                    [(pk.get_db_prep_value(value, connection),) for value in pks],
+                )
+
+    def delete_missing(self, chunk_size):
+        """Удаляет записи, которых не было в копии (после flush).
+
+        Отсутствующие pk находит сама база (NOT IN по временной таблице);
+        удаление идёт порциями через ORM, чтобы сработали on_delete.
+        """
+        self._remember([])
+        quote = connections[self.using].ops.quote_name
+        manager = self.model._base_manager.using(self.using)
+        stale = manager.exclude(
+            pk__in=RawSQL(f"SELECT pk FROM {quote(self.seen_table)}", [])
+        ).order_by("pk")
+        last_pk = None
+        while True:
+            chunk = stale if last_pk is None else stale.filter(pk__gt=last_pk)
+            pks = list(chunk.values_list("pk", flat=True)[:chunk_size])
+            if not pks:
+                break
+            manager.filter(pk__in=pks).delete()
+            last_pk = pks[-1]
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f"DROP TABLE {quote(self.seen_table)}")
+        self.seen_table = None
+
+
+def read_backup(fileobj, using="default", chunk_size=DEFAULT_CHUNK_SIZE):
+    """Восстанавливает данные из копии, записанной write_backup."""
+    stats = {}
+    connection = connections[using]
+    loaders = {}
+    with gzip.open(fileobj, "rt", encoding="utf-8") as stream, transaction.atomic(
+        using=using
+    ):
+        manifest = json.loads(next(stream))
+        if manifest.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемый формат копии: {manifest.get('format')}")
+        full = set(manifest.get("full", ()))
+
+        current = None
+        for line in stream:
+            record = json.loads(line)
+            label = record["m"]
+            if current is None or current.model._meta.label_lower != label:
+                if current is not None:
+                    current.flush()
+                current = loaders.get(label)
+                if current is None:
+                    current = loaders[label] = _ModelLoader(
+                        apps.get_model(label), using, track_seen=label in full
+                    )
+            if "d" in record:
+                current.deleted.append(record["d"])
+            else:
+                current.add(record["f"])
+            if len(current.pending) >= chunk_size:
+                current.flush()
+        if current is not None:
+            current.flush()
+
+        # Потомки раньше родителей: иначе on_delete=PROTECT не даст удалить
+        # родителя, на которого ещё ссылается удаляемая запись
+        for label in reversed(manifest["models"]):
+            if label in full:
+                loader = loaders.get(label) or _ModelLoader(
+                    apps.get_model(label), using, track_seen=True
+                )
+                loader.delete_missing(chunk_size)
+
+        # После вставки с явными pk нужно сдвинуть последовательности (PostgreSQL)
+        models = [loader.model for loader in loaders.values()]
+        sequence_sql = connection.ops.sequence_reset_sql(no_style(), models)
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+
+    for label, loader in loaders.items():
+        stats[label] = loader.loaded
+    return manifest, stats
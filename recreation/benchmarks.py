@@ -0,0 +1,484 @@
+"""Сценарии нагрузочных замеров (запускаются командой ``manage.py benchmark``).
+
+Сценарий — функция, которая готовит данные и возвращает функцию одной
+итерации ``step(i)``. Подготовка и замер выполняются в транзакции, которая
+затем откатывается, поэтому сценарии можно запускать на рабочей копии базы.
+"""
+
+import asyncio
+import random
+import statistics
+import threading
+import tracemalloc
+from contextlib import nullcontext
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.core.handlers.asgi import ASGIHandler
+from django.db import transaction
+from django.test import Client as TestClient
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from .events import BOOKING_CREATED, get_broker
+from .models import Booking, Client, CustomUser, House, Review
+from .renderers import ORJSONParser, ORJSONRenderer
+from .serializers import (
+    BookingSerializer,
+    HouseSerializer,
+    ReviewSerializer,
+    booking_reader,
+    house_reader,
+    review_reader,
+)
+
+SCENARIOS = {}
+
+BENCH_PASSWORD = "bench-Pa55word"
+FAST_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+JSON_BACKENDS = {
+    "orjson": (ORJSONRenderer, ORJSONParser),
+    "stdlib": (JSONRenderer, JSONParser),
+}
+READ_SERIALIZERS = ("model", "values")
+CONNECT_WAVE = 100  # соединений, которые сценарий events открывает одновременно
+
+
+def scenario(name):
+    def decorator(func):
+        SCENARIOS[name] = func
+        return func
+
+    return decorator
+
+
+def _bench_users(count):
+    """Создаёт count пользователей с одним заранее посчитанным хешем пароля."""
+    password = make_password(BENCH_PASSWORD)
+    users = []
+    for i in range(count):
+        user = CustomUser(
+            username=f"bench{i}",
+            last_name="Нагрузка",
+            email=f"Bench{i}@Benchmark.invalid",
+            phone=f"+1555{i:07d}",
+            password=password,
+        )
+        user.update_search_fields()
+        users.append(user)
+    CustomUser.objects.bulk_create(users, batch_size=1000)
+    return users
+
+
+def _login_variants(user, rng):
+    """Логин в одном из написаний, которые встречаются в форме входа."""
+    digits = user.phone[2:]
+    return rng.choice(
+        [
+            user.email,
+            user.email.upper(),
+            f" {user.email.lower()} ",
+            user.phone,
+            f"+1 ({digits[:3]}) {digits[3:6]}-{digits[6:8]}-{digits[8:]}",
+        ]
+    )
+
+
+@scenario("auth")
+def auth_scenario(users=1000, seed=0, **options):
+    """authenticate() по email или телефону в разном написании."""
+    rng = random.Random(seed)
+    accounts = _bench_users(users)
+
+    def step(i):
+        user = rng.choice(accounts)
+        login = _login_variants(user, rng)
+        if authenticate(None, username=login, password=BENCH_PASSWORD) is None:
+            raise AssertionError(f"Не удалось войти как {user.email}")
+
+    return step
+
+
+@scenario("login")
+def login_scenario(users=1000, seed=0, **options):
+    """POST формы входа целиком: форма, бэкенд, создание сессии, редирект."""
+    rng = random.Random(seed)
+    accounts = _bench_users(users)
+    url = settings.LOGIN_URL
+
+    def step(i):
+        user = rng.choice(accounts)
+        response = TestClient().post(
+            url, {"username": _login_variants(user, rng), "password": BENCH_PASSWORD}
+        )
+        if response.status_code != 302:
+            raise AssertionError(f"Вход как {user.email}: ответ {response.status_code}")
+
+    return step
+
+
+@scenario("pages")
+def pages_scenario(users=1000, seed=0, **options):
+    """GET личного кабинета вошедшими пользователями: загрузка сессии,
+    пользователя с профилем и рендер страницы. Имеет смысл сравнивать
+    при разных --session-engine."""
+    rng = random.Random(seed)
+    clients = []
+    for user in _bench_users(min(users, 200)):
+        Client.objects.create(user=user, **Client.fields_from_user(user))
+        browser = TestClient()
+        browser.force_login(user, backend="recreation.backends.EmailPhoneBackend")
+        clients.append(browser)
+    url = reverse("account")
+
+    def step(i):
+        response = rng.choice(clients).get(url)
+        if response.status_code != 200:
+            raise AssertionError(f"{url}: ответ {response.status_code}")
+
+    return step
+
+
+@scenario("render")
+def render_scenario(path=None, **options):
+    """GET страницы анонимным пользователем: рендер шаблона с наследованием
+    и тегами. Сравнение загрузчиков шаблонов — запуском с TEMPLATE_CACHE=0."""
+    path = path or "/"
+    browser = TestClient()
+
+    def step(i):
+        response = browser.get(path)
+        if response.status_code != 200:
+            raise AssertionError(f"{path}: ответ {response.status_code}")
+
+    return step
+
+
+@scenario("json")
+def json_scenario(objects=10000, seed=0, json_backend=None, **options):
+    """Рендер и обратный разбор JSON со списками коттеджей и отзывов
+    (по objects штук). Сериализаторы выполняются один раз при подготовке:
+    замеряется только JSONRenderer/JSONParser выбранного --json-backend."""
+    rng = random.Random(seed)
+    words = "уютный дом лес озеро баня тихо чисто отдых рыбалка вид".split()
+    houses = [
+        House(
+            house_id=i,
+            name=f"Коттедж {i}",
+            location=rng.choice(words).capitalize(),
+            capacity=rng.randint(2, 12),
+            price_per_night=rng.randint(30, 150) * 100,
+        )
+        for i in range(1, objects + 1)
+    ]
+    reviews = [
+        Review(
+            review_id=i,
+            house_id_id=rng.randint(1, objects),
+            client_id_id=rng.randint(1, objects),
+            rating=rng.randint(1, 5),
+            comment=" ".join(rng.choices(words, k=12)),
+        )
+        for i in range(1, objects + 1)
+    ]
+    data = {
+        "houses": HouseSerializer(houses, many=True).data,
+        "reviews": ReviewSerializer(reviews, many=True).data,
+    }
+    renderer_class, parser_class = JSON_BACKENDS[json_backend or "orjson"]
+    renderer, parser = renderer_class(), parser_class()
+
+    def step(i):
+        content = renderer.render(data, "application/json")
+        parsed = parser.parse(BytesIO(content), "application/json")
+        if len(parsed["houses"]) != objects:
+            raise AssertionError("JSON разобран не полностью")
+
+    return step
+
+
+@scenario("serialize")
+def serialize_scenario(objects=10000, seed=0, serializer=None, **options):
+    """Чтение objects коттеджей, бронирований и отзывов из БД в список
+    словарей: ModelSerializer(many=True) (--serializer model) или
+    ValuesReader (--serializer values), как в list-эндпоинтах API."""
+    rng = random.Random(seed)
+    (user,) = _bench_users(1)
+    client = Client.objects.create(user=user, **Client.fields_from_user(user))
+    houses = House.objects.bulk_create(
+        House(
+            name=f"Коттедж {i}",
+            slug=f"bench-{i}",
+            location="Нагрузка",
+            capacity=rng.randint(2, 12),
+            price_per_night=rng.randint(30, 150) * 100,
+        )
+        for i in range(objects)
+    )
+    Booking.objects.bulk_create(
+        Booking(
+            house=rng.choice(houses),
+            check_in_date=date(2030, 1, 1) + timedelta(days=i % 300),
+            check_out_date=date(2030, 1, 3) + timedelta(days=i % 300),
+            guests=2,
+            phone_number=client.phone_number,
+            email=client.email,
+            total_cost=Decimal(rng.randint(3000, 300000)) / 100,
+        )
+        for i in range(objects)
+    )
+    Review.objects.bulk_create(
+        Review(
+            house_id=rng.choice(houses),
+            client_id=client,
+            rating=rng.randint(1, 5),
+            comment="Отзыв для нагрузочного замера",
+        )
+        for i in range(objects)
+    )
+    house_ids = [house.pk for house in houses]
+    querysets = [
+        (HouseSerializer, house_reader, House.objects.filter(pk__in=house_ids)),
+        (
+            BookingSerializer,
+            booking_reader,
+            Booking.objects.filter(house_id__in=house_ids),
+        ),
+        (
+            ReviewSerializer,
+            review_reader,
+            Review.objects.filter(client_id=client),
+        ),
+    ]
+    use_values = (serializer or "values") == "values"
+
+    def step(i):
+        for serializer_class, reader, queryset in querysets:
+            if use_values:
+                data = reader.read(queryset.all())
+            else:
+                data = serializer_class(queryset.all(), many=True).data
+            if len(data) != objects:
+                raise AssertionError(f"{serializer_class.__name__}: {len(data)}")
+
+    return step
+
+
+class _IdleConnection:
+    """Соединение EventSource для ASGI-приложения: тело запроса пустое,
+    отключение — когда завершается замер; входящие кадры считаются."""
+
+    def __init__(self, fanout):
+        self.fanout = fanout
+        self.loop = asyncio.get_running_loop()
+        self.connected = self.loop.create_future()
+        self.disconnected = self.loop.create_future()
+        self.request_sent = False
+
+    async def receive(self):
+        if not self.request_sent:
+            self.request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self.disconnected
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            self.connected.set_exception(
+                AssertionError(f"/events/bookings/: ответ {message['status']}")
+            )
+        elif message["type"] == "http.response.body" and message.get("body"):
+            if not self.connected.done():
+                self.connected.set_result(None)  # первый кадр: подписка создана
+            elif message["body"].startswith(b"event:"):
+                self.fanout.received()
+
+
+class _Fanout:
+    """Счётчик доставки одного события всем соединениям."""
+
+    def __init__(self, expected):
+        self.expected = expected
+        self.pending = 0
+        self.done = threading.Event()
+
+    def reset(self):
+        self.done.clear()
+        self.pending = self.expected
+
+    def received(self):
+        self.pending -= 1
+        if self.pending == 0:
+            self.done.set()
+
+
+@scenario("events")
+def events_scenario(subscribers=5000, **options):
+    """Рассылка события subscribers простаивающим SSE-соединениям.
+
+    Соединения открываются через ASGI-приложение Django (middleware и
+    представление booking_events) в отдельном потоке с циклом событий;
+    все подписаны на один коттедж — худший случай для рассылки.
+    Итерация — публикация события и ожидание, пока его получат все.
+    В итог добавляются время подключения всех соединений и память на
+    одно соединение (по второй волне подключений).
+    """
+    application = ASGIHandler()
+    fanout = _Fanout(subscribers)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/events/bookings/",
+        "query_string": b"house=1",
+        "headers": [(b"host", b"testserver"), (b"accept", b"text/event-stream")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    connections = []
+    tasks = []
+    memory = []
+
+    async def connect():
+        # Клиенты подключаются волнами, а не все в один момент
+        for offset in range(0, subscribers, CONNECT_WAVE):
+            wave = [
+                _IdleConnection(fanout)
+                for _ in range(min(CONNECT_WAVE, subscribers - offset))
+            ]
+            for connection in wave:
+                tasks.append(
+                    asyncio.create_task(
+                        application(scope, connection.receive, connection.send)
+                    )
+                )
+            await asyncio.gather(*(connection.connected for connection in wave))
+            connections.extend(wave)
+            if tracemalloc.is_tracing():
+                memory.append(tracemalloc.get_traced_memory()[0] / len(wave))
+                tracemalloc.stop()
+            elif offset == 0:
+                # Память считается по второй волне: в первую попадают кеши
+                tracemalloc.start()
+
+    async def disconnect():
+        for connection in connections:
+            connection.disconnected.set_result(None)
+        await asyncio.gather(*tasks)
+        # Задача пингов брокера снимается после последней подписки
+        others = asyncio.all_tasks() - {asyncio.current_task()}
+        await asyncio.gather(*others, return_exceptions=True)
+
+    started = perf_counter()
+    asyncio.run_coroutine_threadsafe(connect(), loop).result()
+    connect_seconds = perf_counter() - started
+    broker = get_broker()
+    event = {
+        "type": BOOKING_CREATED,
+        "house": 1,
+        "check_in": "2030-01-01",
+        "check_out": "2030-01-03",
+    }
+
+    def step(i):
+        fanout.reset()
+        broker.publish(event)
+        if not fanout.done.wait(timeout=60):
+            raise AssertionError(f"событие не получили {fanout.pending} соединений")
+
+    def close():
+        try:
+            asyncio.run_coroutine_threadsafe(disconnect(), loop).result()
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+        if broker.subscriber_count():
+            raise AssertionError("подписки не сняты после отключения")
+
+    step.close = close
+    step.info = {
+        "subscribers": subscribers,
+        "connect_s": round(connect_seconds, 2),
+        "kb_per_subscriber": round(memory[0] / 1024, 1) if memory else None,
+    }
+    return step
+
+
+def _percentile(timings, share):
+    return timings[min(len(timings) - 1, int(len(timings) * share))]
+
+
+def run(
+    name,
+    iterations=200,
+    warmup=10,
+    fast_hasher=False,
+    session_engine=None,
+    **options,
+):
+    """Выполняет сценарий и возвращает статистику времени итерации (в мс).
+
+    ``fast_hasher`` подменяет PBKDF2 на MD5, чтобы измерить всё, кроме
+    хеширования пароля (поиск пользователя, сессия, middleware).
+    ``session_engine`` — ключ settings.SESSION_ENGINES, хранилище сессий
+    на время замера.
+    """
+    hashers = (
+        override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+        if fast_hasher
+        else nullcontext()
+    )
+    sessions = (
+        override_settings(SESSION_ENGINE=settings.SESSION_ENGINES[session_engine])
+        if session_engine
+        else nullcontext()
+    )
+    # Тестовый клиент обращается к хосту testserver с адреса 127.0.0.1:
+    # пустой INTERNAL_IPS отключает debug_toolbar, чтобы он не попал в замер
+    hosts = override_settings(
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"], INTERNAL_IPS=[]
+    )
+    timings = []
+    with hashers, sessions, hosts, transaction.atomic():
+        step = SCENARIOS[name](**options)
+        try:
+            for i in range(warmup):
+                step(i)
+            started = perf_counter()
+            for i in range(iterations):
+                begin = perf_counter()
+                step(i)
+                timings.append((perf_counter() - begin) * 1000)
+            elapsed = perf_counter() - started
+        finally:
+            # Сценарий может держать ресурсы (потоки, соединения)
+            if hasattr(step, "close"):
+                step.close()
+        transaction.set_rollback(True)
+
+    timings.sort()
+    return {
+        "scenario": name,
+        "session_engine": session_engine or settings.SESSION_ENGINE,
+        "iterations": iterations,
+        "ops_per_sec": iterations / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(timings),
+        "p50_ms": _percentile(timings, 0.50),
+        "p95_ms": _percentile(timings, 0.95),
+        "p99_ms": _percentile(timings, 0.99),
+        "max_ms": timings[-1],
+        "info": getattr(step, "info", {}),
+    }
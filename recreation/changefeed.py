@@ -0,0 +1,106 @@
+"""Лента изменений для инкрементальной синхронизации (``/api/changes/``).
+
+Клиент один раз загружает списки целиком, запомнив перед этим текущий
+курсор ленты, а затем запрашивает только изменения после курсора.
+Страница ленты — диапазон первичного ключа ChangeLog, поэтому её
+стоимость не зависит от размера журнала. Несколько изменений одного
+объекта в пределах страницы сворачиваются в последнее, а текущие данные
+изменённых объектов выбираются одним запросом на модель через ValuesReader.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import ChangeLog, House, Post, Review, Service
+from .serializers import house_reader, post_reader, review_reader, service_reader
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+
+# Имя в журнале → (queryset видимых клиентам объектов, reader)
+FEED_MODELS = {
+    "house": (House.objects.all(), house_reader),
+    "review": (Review.objects.all(), review_reader),
+    "service": (Service.objects.all(), service_reader),
+    # Черновики клиентам не видны: для них объект считается удалённым
+    "post": (Post.objects.filter(status="published"), post_reader),
+}
+
+
+class CursorExpired(Exception):
+    """Записи после курсора уже удалены из журнала — нужна полная загрузка."""
+
+
+def head_cursor():
+    """Текущая позиция ленты: с неё начинает клиент после полной загрузки."""
+    return ChangeLog.objects.aggregate(head=Max("id"))["head"] or 0
+
+
+def _settled(queryset):
+    # id выдаются при вставке, а видны после коммита: запись с меньшим id
+    # может появиться позже записи с большим. Свежие записи отдаём с
+    # задержкой, чтобы курсор не перескочил ещё не закоммиченные изменения.
+    # Журнал пишется после коммита изменений короткими транзакциями
+    # (ChangeLog.record_many), так что задержка ограничивает только их.
+    settle = getattr(settings, "CHANGE_FEED_SETTLE_SECONDS", 2)
+    if settle:
+        queryset = queryset.filter(
+            changed_at__lte=timezone.now() - timedelta(seconds=settle)
+        )
+    return queryset
+
+
+def read_changes(cursor, limit=DEFAULT_LIMIT, models=None):
+    """Изменения с id > cursor: {"changes": [...], "cursor": ..., "has_more": ...}.
+
+    ``models`` — подмножество FEED_MODELS (None — все).
+    """
+    limit = min(limit, MAX_LIMIT)
+    log = ChangeLog.objects.filter(id__gt=cursor)
+    oldest = ChangeLog.objects.aggregate(oldest=Min("id"))["oldest"]
+    if oldest is not None and cursor < oldest - 1:
+        raise CursorExpired(cursor)
+    if models is not None:
+        log = log.filter(model__in=models)
+    rows = list(
+        _settled(log)
+        .order_by("id")
+        .values_list("id", "model", "object_id", "action", "changed_at")[: limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = rows[-1][0] if rows else cursor
+
+    latest = {}
+    for row in rows:
+        latest[(row[1], row[2])] = row
+    changes = sorted(latest.values())
+
+    data = {}
+    for model, (queryset, reader) in FEED_MODELS.items():
+        ids = [object_id for _, name, object_id, _, _ in changes if name == model]
+        if ids:
+            pk_name = queryset.model._meta.pk.name
+            objects = reader.read(queryset.filter(pk__in=ids))
+            data[model] = {item[pk_name]: item for item in objects}
+
+    result = []
+    for change_id, model, object_id, action, changed_at in changes:
+        item = data.get(model, {}).get(object_id)
+        if item is None:
+            # Объект удалён (или скрыт) после записи в журнал
+            action = "deleted"
+        result.append(
+            {
+                "cursor": change_id,
+                "model": model,
+                "id": object_id,
+                "action": action,
+                "changed_at": changed_at,
+                "data": item,
+            }
+        )
+    return {"changes": result, "cursor": next_cursor, "has_more": has_more}
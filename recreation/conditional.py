@@ -0,0 +1,105 @@
+"""Условные GET-запросы (ETag / Last-Modified) для каталога и API.
+
+Версия данных берётся одним дешёвым запросом (максимальная дата изменения
+или счётчик версии), без загрузки и сериализации объектов. Если клиент
+прислал совпадающий If-None-Match или If-Modified-Since, ответ 304
+возвращается до вызова представления.
+"""
+
+from datetime import datetime
+from functools import wraps
+
+from django.db.models import Max
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .models import House, Post, Service
+
+
+def conditional_get(version_func, per_user=False):
+    """Декоратор представления с поддержкой условного GET.
+
+    ``version_func(request, *args, **kwargs)`` возвращает версию данных:
+    datetime последнего изменения (тогда отдаётся и Last-Modified) или
+    любое другое значение; None — данных нет, представление вызывается
+    как обычно (например, чтобы вернуть 404).
+
+    ``per_user`` — для HTML-страниц, которые отличаются для разных
+    пользователей: ETag включает id пользователя, Last-Modified не
+    отдаётся, кеш помечается private.
+
+    В API (запрос DRF с выбранным рендерером) ETag включает формат ответа:
+    JSON и browsable HTML по одному адресу — разные представления.
+    """
+
+    def version(request, *args, **kwargs):
+        # condition() запрашивает ETag и Last-Modified отдельно — считаем один раз
+        if not hasattr(request, "_data_version"):
+            request._data_version = version_func(request, *args, **kwargs)
+        return request._data_version
+
+    def etag(request, *args, **kwargs):
+        value = version(request, *args, **kwargs)
+        if value is None:
+            return None
+        if isinstance(value, datetime):
+            value = f"{value.timestamp():.6f}"
+        value = str(value)
+        renderer = getattr(request, "accepted_renderer", None)
+        if renderer is not None:
+            value = f"{value}-{renderer.format}"
+        if per_user:
+            value = f"{value}-u{request.user.pk or 0}"
+        return value
+
+    def last_modified(request, *args, **kwargs):
+        value = version(request, *args, **kwargs)
+        return value if isinstance(value, datetime) and not per_user else None
+
+    cache_scope = {"private": True} if per_user else {}
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(
+            view
+        )
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                # Браузер хранит ответ, но каждый раз проверяет его актуальность
+                patch_cache_control(response, no_cache=True, **cache_scope)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def house_version(request, pk=None, **kwargs):
+    """Время последнего изменения коттеджа (или любого коттеджа для списка).
+
+    Берётся из истории simple_history: запись появляется при создании,
+    изменении и удалении, так что список тоже обновляет версию.
+    """
+    history = House.history.all()
+    if pk is not None:
+        try:
+            history = history.filter(house_id=pk)
+        except (ValueError, TypeError):
+            return None  # нечисловой pk: 404 вернёт само представление
+    return history.aggregate(changed=Max("history_date"))["changed"]
+
+
+def service_version(request, pk, **kwargs):
+    return Service.objects.filter(pk=pk).values_list("version", flat=True).first()
+
+
+def post_version(request, slug=None, id=None, **kwargs):
+    # Как post_detail: по id, а если такого нет — по slug из одних цифр
+    if id is not None:
+        changed = Post.objects.filter(pk=id).aggregate(changed=Max("updated"))
+        if changed["changed"] is not None:
+            return changed["changed"]
+    posts = Post.objects.filter(slug__iexact=slug or str(id))
+    return posts.aggregate(changed=Max("updated"))["changed"]
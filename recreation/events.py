@@ -0,0 +1,240 @@
+"""События бронирований для открытых страниц (SSE, ``/events/bookings/``).
+
+Сигналы Booking публикуют события ``booking-created`` и
+``booking-cancelled`` (после коммита транзакции) в брокер, а асинхронное
+представление ``booking_events`` держит соединение и отправляет браузеру
+события по коттеджам, на которые подписана страница.
+
+Брокер задаётся ``settings.EVENT_BROKER``. По умолчанию это
+InProcessBroker: подписчики живут в памяти процесса, поэтому он подходит
+для одного ASGI-процесса. Для нескольких процессов брокер заменяется
+классом с тем же интерфейсом (``publish``/``subscribe``), который
+пересылает события через внешнюю шину (например, Redis pub/sub) и
+раздаёт их локальным подписчикам через InProcessBroker.
+
+У каждого подписчика свой ограниченный буфер (``EVENT_BUFFER_SIZE``
+кадров, включая пинги раз в ``EVENT_HEARTBEAT_SECONDS``).
+Если клиент не успевает читать, буфер очищается и клиент получает
+событие ``reset``: пропущенные события не копятся в памяти сервера.
+Пропущенное во время переподключения не повторяется — для полной
+синхронизации есть ``/api/changes/``.
+"""
+
+import asyncio
+import threading
+from collections import defaultdict, deque
+from functools import cache
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.utils.module_loading import import_string
+
+from .renderers import dumps
+
+BOOKING_CREATED = "booking-created"
+BOOKING_CANCELLED = "booking-cancelled"
+RESET = "reset"
+DEFAULT_BUFFER_SIZE = 32
+DEFAULT_HEARTBEAT_SECONDS = 15
+MAX_HOUSES = 100
+RETRY_MS = 5000
+
+
+def booking_event(kind, booking):
+    """Событие о бронировании: только коттедж и даты, без данных клиента."""
+    return {
+        "type": kind,
+        "house": booking.house_id,
+        "check_in": booking.check_in_date.isoformat(),
+        "check_out": booking.check_out_date.isoformat(),
+    }
+
+
+def format_sse(event):
+    """Кадр text/event-stream для события."""
+    data = {key: value for key, value in event.items() if key != "type"}
+    return b"event: %s\ndata: %s\n\n" % (event["type"].encode(), dumps(data))
+
+
+RESET_FRAME = format_sse({"type": RESET})
+# Комментарий не даёт прокси закрыть простаивающее соединение
+PING_FRAME = b": ping\n\n"
+
+
+class Subscription:
+    """Подписка одного соединения: очередь готовых кадров в цикле событий ASGI.
+
+    ``houses`` — множество id коттеджей или None (все коттеджи). Очередь
+    заполняет только цикл событий подписчика (через ``deliver``), поэтому
+    блокировки не нужны.
+    """
+
+    def __init__(self, broker, houses, maxsize, loop):
+        self.broker = broker
+        self.houses = houses
+        self.maxsize = maxsize
+        self.loop = loop
+        self.frames = deque()
+        self.dropped = 0
+        self._waiter = None
+
+    def deliver(self, frame):
+        if len(self.frames) >= self.maxsize:
+            # Клиент не успевает читать: вместо очереди событий — один reset
+            self.dropped += len(self.frames)
+            self.frames.clear()
+            frame = RESET_FRAME
+        self.frames.append(frame)
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def get(self):
+        while not self.frames:
+            self._waiter = self.loop.create_future()
+            await self._waiter
+        return self.frames.popleft()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Брокер в памяти процесса.
+
+    ``publish`` можно вызывать из любого потока (сигналы выполняются в
+    синхронном коде): событие кодируется один раз и передаётся в цикл
+    событий подписчиков одним call_soon_threadsafe на цикл, а не на
+    каждого подписчика. Пинги тоже отправляет одна задача на цикл.
+    """
+
+    def __init__(self, buffer_size=None, heartbeat=None):
+        self.buffer_size = buffer_size or getattr(
+            settings, "EVENT_BUFFER_SIZE", DEFAULT_BUFFER_SIZE
+        )
+        self.heartbeat = heartbeat or getattr(
+            settings, "EVENT_HEARTBEAT_SECONDS", DEFAULT_HEARTBEAT_SECONDS
+        )
+        self._lock = threading.Lock()
+        self._by_house = defaultdict(set)
+        self._all = set()
+        self._by_loop = {}
+        self._heartbeats = {}
+
+    def subscribe(self, houses=None):
+        """Подписывает текущий цикл событий на коттеджи houses (None — все)."""
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(
+            self, frozenset(houses) if houses else None, self.buffer_size, loop
+        )
+        with self._lock:
+            if subscription.houses is None:
+                self._all.add(subscription)
+            for house in subscription.houses or ():
+                self._by_house[house].add(subscription)
+            if loop not in self._by_loop:
+                self._by_loop[loop] = set()
+                self._heartbeats[loop] = loop.create_task(
+                    self._ping(self._by_loop[loop])
+                )
+            self._by_loop[loop].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._all.discard(subscription)
+            for house in subscription.houses or ():
+                subscribers = self._by_house.get(house)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._by_house[house]
+            on_loop = self._by_loop.get(subscription.loop)
+            if on_loop is not None:
+                on_loop.discard(subscription)
+                if not on_loop:
+                    del self._by_loop[subscription.loop]
+                    heartbeat = self._heartbeats.pop(subscription.loop)
+                    if not subscription.loop.is_closed():
+                        subscription.loop.call_soon_threadsafe(heartbeat.cancel)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._by_loop.values())
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = self._all | self._by_house.get(event.get("house"), set())
+        if not subscribers:
+            return
+        frame = format_sse(event)
+        by_loop = defaultdict(list)
+        for subscription in subscribers:
+            by_loop[subscription.loop].append(subscription)
+        for loop, group in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_deliver, group, frame)
+            except RuntimeError:
+                # Цикл уже закрыт (процесс завершается): подписки не нужны
+                for subscription in group:
+                    self.unsubscribe(subscription)
+
+    async def _ping(self, subscriptions):
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            _deliver(list(subscriptions), PING_FRAME)
+
+
+def _deliver(subscriptions, frame):
+    for subscription in subscriptions:
+        subscription.deliver(frame)
+
+
+@cache
+def get_broker():
+    return import_string(settings.EVENT_BROKER)()
+
+
+def publish_on_commit(event):
+    """Публикует событие после коммита текущей транзакции (сразу — вне её)."""
+    transaction.on_commit(lambda: get_broker().publish(event))
+
+
+async def _stream(houses):
+    # Подписка создаётся, когда ответ начинают отправлять, и снимается,
+    # когда Django прерывает поток после отключения клиента
+    subscription = get_broker().subscribe(houses)
+    try:
+        yield b"retry: %d\n\n" % RETRY_MS
+        while True:
+            yield await subscription.get()
+    finally:
+        subscription.close()
+
+
+async def booking_events(request):
+    """Поток событий бронирований: ``/events/bookings/?house=1,2``.
+
+    Без ``house`` — события всех коттеджей. Соединение держится только
+    под ASGI: под WSGI оно заняло бы поток воркера, поэтому отдаётся 204,
+    и EventSource больше не переподключается.
+    """
+    try:
+        houses = {
+            int(value)
+            for param in request.GET.getlist("house")
+            for value in param.split(",")
+            if value.strip()
+        }
+    except ValueError:
+        return HttpResponseBadRequest("house: ожидаются id коттеджей через запятую")
+    if len(houses) > MAX_HOUSES:
+        return HttpResponseBadRequest(f"house: не больше {MAX_HOUSES} коттеджей")
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(_stream(houses), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # nginx не должен буферизовать поток
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -1,3 +1,4 @@
+import math
 import re
 
 import django_filters
@@ -9,12 +10,38 @@ from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from django.utils import timezone
 
+from .hashers import record_event
 from .models import Booking, Client, CustomUser, House, Post, Review, Service
+from .normalizers import normalize_email, to_e164
+from .throttling import login_throttle
 
 User = get_user_model()
 
 
-class CustomUserCreationForm(UserCreationForm):
+class LoginKeysMixin:
+    """Email и телефон служат логином, поэтому не должны совпадать с чужими
+    с точностью до написания (регистр, пробелы, 8 вместо +7)."""
+
+    login_keys = (
+        ("email", "email_normalized", normalize_email, "email"),
+        ("phone", "phone_e164", to_e164, "номером телефона"),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for field, lookup, normalize, title in self.login_keys:
+            value = normalize(cleaned_data.get(field))
+            if not value or field not in self.changed_data:
+                continue
+            taken = CustomUser.objects.filter(**{lookup: value})
+            if self.instance.pk:
+                taken = taken.exclude(pk=self.instance.pk)
+            if taken.exists():
+                self.add_error(field, f"Пользователь с таким {title} уже существует")
+        return cleaned_data
+
+
+class CustomUserCreationForm(LoginKeysMixin, UserCreationForm):
     email = forms.EmailField(required=True, label="Email")
     phone = forms.CharField(required=True, label="Номер телефона")
     last_name = forms.CharField(required=True, label="Фамилия")
@@ -45,18 +72,11 @@ class CustomUserCreationForm(UserCreationForm):
         if commit:
             user.save()
             # Создаем профиль клиента
-            Client.objects.create(
-                user=user,
-                last_name=user.last_name,
-                first_name=user.username,  # Используем username как имя
-                patronymic=user.patronymic,
-                phone_number=user.phone,
-                email=user.email,
-            )
+            Client.objects.create(user=user, **Client.fields_from_user(user))
         return user
 
 
-class CustomUserChangeForm(forms.ModelForm):
+class CustomUserChangeForm(LoginKeysMixin, forms.ModelForm):
     phone = forms.CharField(
         max_length=12,
         required=True,
@@ -207,6 +227,22 @@ class PostForm(forms.ModelForm):
 class CustomAuthenticationForm(AuthenticationForm):
     username = forms.CharField(label="Email или телефон")
 
+    retry_after = None
+
+    def clean(self):
+        # Проверяем лимит до authenticate(), чтобы не тратить время на PBKDF2
+        username = self.cleaned_data.get("username")
+        if username:
+            self.retry_after = login_throttle.retry_after(self.request, username)
+        if self.retry_after:
+            record_event("login_throttled")
+            raise ValidationError(
+                "Слишком много неудачных попыток входа. "
+                f"Повторите через {math.ceil(self.retry_after / 60)} мин.",
+                code="throttled",
+            )
+        return super().clean()
+
 
 class ClientForm(forms.ModelForm):
     class Meta:
@@ -396,16 +432,18 @@ class BookingForm(forms.ModelForm):
 
         if self.user and self.user.is_authenticated:
             instance.user = self.user
-            client, created = Client.objects.update_or_create(
-                user=self.user,
-                defaults={
-                    "last_name": self.user.last_name,
-                    "first_name": self.user.username,
-                    "patronymic": self.user.patronymic,
-                    "email": self.user.email,
-                    "phone_number": self.cleaned_data["phone_number"],
-                },
+            client = self.user.get_client_profile()
+            # Профиль обновляется, только если данные действительно изменились
+            fields = Client.fields_from_user(
+                self.user, phone_number=self.cleaned_data["phone_number"]
             )
+            changed = [
+                name for name, value in fields.items() if getattr(client, name) != value
+            ]
+            if changed:
+                for name in changed:
+                    setattr(client, name, fields[name])
+                client.save(update_fields=changed)
             instance.client_id = client
 
         if commit:
@@ -441,11 +479,9 @@ class ClientRegistrationForm(UserCreationForm):
             user.save()
             Client.objects.create(
                 user=user,
-                last_name=self.cleaned_data["last_name"],
-                username=self.cleaned_data["username"],
-                patronymic=self.cleaned_data.get("patronymic", ""),
-                phone_number=self.cleaned_data["phone"],
-                email=self.cleaned_data["email"],
+                **Client.fields_from_user(
+                    user, first_name=self.cleaned_data["username"]
+                ),
             )
         return user
 
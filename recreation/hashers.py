@@ -0,0 +1,82 @@
+"""Хеширование паролей с настраиваемой стоимостью и учётом затраченного времени.
+
+Число итераций PBKDF2 задаётся ``settings.PASSWORD_PBKDF2_ITERATIONS``.
+Алгоритм остаётся ``pbkdf2_sha256``, поэтому существующие хеши проверяются
+как раньше, а при входе Django сам перехеширует пароль, если число итераций
+в хеше отличается от настроенного (must_update).
+
+Время каждого хеширования складывается в поминутные счётчики в кеше
+вместе с числом неудачных и отклонённых попыток входа:
+``auth_metrics_per_minute`` показывает, сколько процессорного времени
+уходит на пароли, например во время перебора.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.cache import cache
+from django.utils import timezone
+
+from .metrics import OPERATION_LATENCY
+
+METRICS_TTL = 2 * 60 * 60  # сколько хранить историю в кеше, секунд
+
+
+def _minute_key(kind, minute):
+    return f"auth-metrics:{kind}:{minute:%Y%m%d%H%M}"
+
+
+def _increment(key, delta):
+    if not cache.add(key, delta, timeout=METRICS_TTL):
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            cache.set(key, delta, timeout=METRICS_TTL)
+
+
+def record_event(kind, amount=1, now=None):
+    """Прибавляет amount к поминутному счётчику kind."""
+    now = now or timezone.now()
+    _increment(_minute_key(kind, now.replace(second=0, microsecond=0)), amount)
+
+
+def record_hash_time(seconds, now=None):
+    record_event("hashes", 1, now)
+    record_event("hash_us", int(seconds * 1_000_000), now)
+
+
+def auth_metrics_per_minute(minutes=60, now=None):
+    """Поминутная статистика за последние minutes минут (от старых к новым)."""
+    now = (now or timezone.now()).replace(second=0, microsecond=0)
+    series = [now - timedelta(minutes=offset) for offset in range(minutes - 1, -1, -1)]
+    kinds = ("hashes", "hash_us", "login_failed", "login_throttled")
+    values = cache.get_many(
+        [_minute_key(kind, minute) for minute in series for kind in kinds]
+    )
+    rows = []
+    for minute in series:
+        row = {kind: values.get(_minute_key(kind, minute), 0) for kind in kinds}
+        row["hash_ms"] = round(row.pop("hash_us") / 1000, 1)
+        rows.append({"minute": minute, **row})
+    return rows
+
+
+class TimedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 с числом итераций из настроек и замером времени."""
+
+    @property
+    def iterations(self):
+        return getattr(
+            settings, "PASSWORD_PBKDF2_ITERATIONS", PBKDF2PasswordHasher.iterations
+        )
+
+    def encode(self, password, salt, iterations=None):
+        started = time.perf_counter()
+        try:
+            return super().encode(password, salt, iterations)
+        finally:
+            elapsed = time.perf_counter() - started
+            record_hash_time(elapsed)
+            OPERATION_LATENCY.observe(elapsed, "password_hash")
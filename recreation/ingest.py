@@ -0,0 +1,465 @@
+"""Пакетный импорт бронирований из внешних каналов (OTA) и отзывов.
+
+Входные данные (CSV или JSON Lines, либо массив из API) читаются построчно
+и обрабатываются пачками: каждая пачка проверяется целиком по заранее
+загруженным данным коттеджей, клиентов и уже существующим бронированиям,
+а затем вставляется одним ``bulk_create``. Поэтому расход памяти не
+зависит от размера файла.
+"""
+
+import csv
+import io
+import json
+from bisect import bisect_left, insort
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.utils import timezone
+from django.utils.html import strip_tags
+from simple_history.utils import bulk_create_with_history
+
+from .analytics import mark_dirty
+from .events import BOOKING_CREATED, booking_event, publish_on_commit
+from .models import Booking, ChangeLog, Client, House, Review, ReviewStats
+
+DEFAULT_BATCH_SIZE = 1000
+FORMATS = ("csv", "jsonl")
+
+REQUIRED_FIELDS = ("house", "check_in_date", "check_out_date", "guests", "email")
+REVIEW_REQUIRED_FIELDS = ("house_id", "client_id", "rating", "comment")
+
+
+class IngestReport:
+    """Итог импорта: число созданных объектов и ошибки по строкам.
+
+    При проверке без записи (dry_run) прошедшие проверку строки считаются
+    в ``validated``, а не в ``created``. С ``track_created`` запоминает
+    и id созданного объекта для каждой строки — для ответа API
+    с результатом по каждому элементу.
+    """
+
+    def __init__(self, track_created=False):
+        self.processed = 0
+        self.created = 0
+        self.validated = 0
+        self.errors = []
+        self.created_ids = {} if track_created else None
+
+    def add_error(self, line, messages):
+        self.errors.append({"line": line, "errors": list(messages)})
+
+    def add_created(self, objects):
+        self.created += len(objects)
+        if self.created_ids is not None:
+            for obj in objects:
+                self.created_ids[obj._ingest_line] = obj.pk
+
+    def add_validated(self, objects):
+        self.validated += len(objects)
+
+    def as_dict(self):
+        return {
+            "processed": self.processed,
+            "created": self.created,
+            "validated": self.validated,
+            "failed": len(self.errors),
+            "errors": self.errors,
+        }
+
+
+def iter_items(items):
+    """Строки из уже разобранного списка (тело запроса API); номер — индекс."""
+    for index, item in enumerate(items):
+        if isinstance(item, dict):
+            yield index, item, None
+        else:
+            yield index, None, "Ожидался JSON-объект"
+
+
+def iter_rows(stream, fmt):
+    """Построчно читает поток и возвращает кортежи (номер строки, данные, ошибка)."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row, None
+    elif fmt == "jsonl":
+        for line_no, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_no, None, f"Некорректный JSON: {e}"
+                continue
+            if not isinstance(row, dict):
+                yield line_no, None, "Ожидался JSON-объект"
+                continue
+            yield line_no, row, None
+    else:
+        raise ValueError(f"Неизвестный формат: {fmt}")
+
+
+def text_stream(fileobj, encoding="utf-8-sig"):
+    """Оборачивает бинарный файл (например, загруженный) в текстовый поток."""
+    if isinstance(fileobj, io.TextIOBase):
+        return fileobj
+    return io.TextIOWrapper(fileobj, encoding=encoding, newline="")
+
+
+def _parse_date(value):
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value).strip())
+
+
+def _money(value, field_name):
+    """Сумма для денежного поля Booking, округлённая до копеек.
+
+    ValueError — не число, отрицательная сумма или больше, чем помещается
+    в поле (max_digits).
+    """
+    field = Booking._meta.get_field(field_name)
+    try:
+        amount = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError("ожидается число")
+    if not amount.is_finite() or amount < 0:
+        raise ValueError("ожидается неотрицательное число")
+    limit = Decimal(10) ** (field.max_digits - field.decimal_places)
+    if amount < limit:
+        amount = amount.quantize(
+            Decimal(1).scaleb(-field.decimal_places), ROUND_HALF_UP
+        )
+    if amount >= limit:
+        raise ValueError(f"сумма должна быть меньше {limit}")
+    return amount
+
+
+def _parse_row(row, houses, today):
+    """Приводит сырую строку к типам модели и проверяет правила Booking.clean."""
+    errors = []
+    missing = [f for f in REQUIRED_FIELDS if row.get(f) in (None, "")]
+    if missing:
+        return None, [f"Не заполнены поля: {', '.join(missing)}"]
+
+    try:
+        house_id = int(row["house"])
+    except (TypeError, ValueError):
+        return None, ["Некорректный идентификатор коттеджа"]
+    house = houses.get(house_id)
+    if house is None:
+        return None, [f"Коттедж {house_id} не найден или неактивен"]
+    capacity, price_per_night = house
+
+    try:
+        check_in = _parse_date(row["check_in_date"])
+        check_out = _parse_date(row["check_out_date"])
+    except ValueError:
+        return None, ["Даты должны быть в формате ГГГГ-ММ-ДД"]
+
+    try:
+        guests = int(row["guests"])
+    except (TypeError, ValueError):
+        guests = None
+        errors.append("Количество гостей должно быть целым числом")
+
+    if check_out <= check_in:
+        errors.append("Дата выезда должна быть позже даты заезда.")
+    if check_in < today:
+        errors.append("Нельзя бронировать коттедж на прошедшую дату.")
+    if guests is not None and not 0 < guests <= capacity:
+        errors.append(f"Превышена вместимость коттеджа (макс. {capacity} гостей).")
+
+    email = str(row["email"]).strip()
+    try:
+        validate_email(email)
+    except ValidationError:
+        errors.append("Некорректный email")
+
+    nights = (check_out - check_in).days
+    base_cost = None
+    try:
+        base_cost = _money(price_per_night * max(nights, 0), "base_cost")
+    except ValueError as error:
+        errors.append(f"Базовая стоимость: {error}")
+    if row.get("total_cost") not in (None, ""):
+        try:
+            total_cost = _money(row["total_cost"], "total_cost")
+        except ValueError as error:
+            errors.append(f"Общая стоимость: {error}")
+    else:
+        total_cost = base_cost
+
+    if errors:
+        return None, errors
+
+    return {
+        "house_id": house_id,
+        "check_in_date": check_in,
+        "check_out_date": check_out,
+        "guests": guests,
+        "email": email,
+        "phone_number": str(row.get("phone_number") or "")[:20],
+        "client_name": str(row.get("client_name") or "Не указано")[:255],
+        "comment": row.get("comment") or None,
+        "base_cost": base_cost,
+        "total_cost": total_cost,
+    }, []
+
+
+class _HouseCalendar:
+    """Занятые интервалы одного коттеджа для проверки пересечений за O(log n).
+
+    Существующие бронирования могут пересекаться между собой (старые данные),
+    поэтому для них хранится префиксный максимум дат выезда. Принятые в текущей
+    пачке интервалы не пересекаются по построению и хранятся отсортированными.
+    """
+
+    def __init__(self, intervals):
+        intervals.sort()
+        self.starts = [start for start, _ in intervals]
+        self.max_ends = []
+        current = None
+        for _, end in intervals:
+            current = end if current is None or end > current else current
+            self.max_ends.append(current)
+        self.accepted = []
+
+    def overlaps(self, start, end):
+        idx = bisect_left(self.starts, end)
+        if idx and self.max_ends[idx - 1] > start:
+            return True
+        idx = bisect_left(self.accepted, (end,))
+        return bool(idx) and self.accepted[idx - 1][1] > start
+
+    def add(self, start, end):
+        insort(self.accepted, (start, end))
+
+
+def _load_calendars(candidates, lock=False):
+    """Одним запросом загружает бронирования, пересекающие даты пачки.
+
+    С ``lock`` сначала блокирует строки коттеджей пачки (select_for_update,
+    по возрастанию pk — без взаимных блокировок): параллельный импорт тех
+    же коттеджей ждёт конца транзакции и видит вставленные бронирования.
+    Форма бронирования на сайте пересечения не проверяет и коттедж не
+    блокирует, от неё эта блокировка не защищает.
+    """
+    house_ids = {c["house_id"] for c in candidates}
+    if lock:
+        list(
+            House.objects.select_for_update()
+            .filter(house_id__in=house_ids)
+            .order_by("house_id")
+            .values_list("house_id", flat=True)
+        )
+    first_day = min(c["check_in_date"] for c in candidates)
+    last_day = max(c["check_out_date"] for c in candidates)
+    intervals = {house_id: [] for house_id in house_ids}
+    existing = Booking.objects.filter(
+        house_id__in=house_ids,
+        check_in_date__lt=last_day,
+        check_out_date__gt=first_day,
+    ).values_list("house_id", "check_in_date", "check_out_date")
+    for house_id, start, end in existing.iterator():
+        intervals[house_id].append((start, end))
+    return {house_id: _HouseCalendar(items) for house_id, items in intervals.items()}
+
+
+def _nights(check_in, check_out):
+    return (
+        date.fromordinal(day)
+        for day in range(check_in.toordinal(), check_out.toordinal())
+    )
+
+
+def load_houses():
+    """Возвращает {house_id: (вместимость, цена за ночь)} для активных коттеджей."""
+    return {
+        house_id: (capacity, price)
+        for house_id, capacity, price in House.objects.filter(
+            is_active=True
+        ).values_list("house_id", "capacity", "price_per_night")
+    }
+
+
+def validate_batch(rows, houses, report, today=None, lock=False):
+    """Проверяет пачку строк и возвращает несохранённые объекты Booking.
+
+    ``rows`` — список кортежей (номер строки, данные, ошибка разбора);
+    ``lock`` — заблокировать коттеджи пачки до конца транзакции (перед
+    вставкой, см. _load_calendars).
+    """
+    today = today or timezone.now().date()
+    candidates = []
+    for line, row, parse_error in rows:
+        report.processed += 1
+        if parse_error:
+            report.add_error(line, [parse_error])
+            continue
+        data, errors = _parse_row(row, houses, today)
+        if errors:
+            report.add_error(line, errors)
+            continue
+        data["line"] = line
+        candidates.append(data)
+
+    if not candidates:
+        return []
+
+    calendars = _load_calendars(candidates, lock)
+    now = timezone.now()
+    bookings = []
+    for data in candidates:
+        line = data.pop("line")
+        calendar = calendars[data["house_id"]]
+        if calendar.overlaps(data["check_in_date"], data["check_out_date"]):
+            report.add_error(line, ["Коттедж уже забронирован на эти даты"])
+            continue
+        calendar.add(data["check_in_date"], data["check_out_date"])
+        booking = Booking(created_at=now, **data)
+        booking._ingest_line = line
+        bookings.append(booking)
+    return bookings
+
+
+def _in_batches(rows, batch_size):
+    batch = []
+    for item in rows:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ingest_booking_rows(
+    rows, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, report=None
+):
+    """Импортирует бронирования из строк (номер, данные, ошибка разбора)."""
+    report = report or IngestReport()
+    houses = load_houses()
+    for batch in _in_batches(rows, batch_size):
+        with transaction.atomic():
+            bookings = validate_batch(batch, houses, report, lock=not dry_run)
+            if dry_run:
+                report.add_validated(bookings)
+            elif bookings:
+                bulk_create_with_history(bookings, Booking, batch_size=batch_size)
+                # bulk_create не вызывает сигналы: помечаем даты для аналитики сами
+                nights = set()
+                for booking in bookings:
+                    nights.update(
+                        _nights(booking.check_in_date, booking.check_out_date)
+                    )
+                mark_dirty(timezone.now(), *nights)
+                for booking in bookings:
+                    publish_on_commit(booking_event(BOOKING_CREATED, booking))
+                report.add_created(bookings)
+    report.errors.sort(key=lambda error: error["line"])
+    return report
+
+
+def ingest_bookings(stream, fmt="csv", batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """Импортирует бронирования из текстового потока и возвращает IngestReport."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Неизвестный формат: {fmt}")
+    return ingest_booking_rows(iter_rows(stream, fmt), batch_size, dry_run)
+
+
+def _parse_review(row, houses, clients):
+    """Приводит строку к полям Review; проверки те же, что у формы отзыва."""
+    missing = [f for f in REVIEW_REQUIRED_FIELDS if row.get(f) in (None, "")]
+    if missing:
+        return None, [f"Не заполнены поля: {', '.join(missing)}"]
+    errors = []
+    try:
+        house_id = int(row["house_id"])
+    except (TypeError, ValueError):
+        house_id = None
+    if house_id not in houses:
+        errors.append(f"Коттедж {row['house_id']} не найден")
+    try:
+        client_id = int(row["client_id"])
+    except (TypeError, ValueError):
+        client_id = None
+    if client_id not in clients:
+        errors.append(f"Клиент {row['client_id']} не найден")
+    try:
+        rating = int(row["rating"])
+    except (TypeError, ValueError):
+        rating = None
+    if rating not in ReviewStats.RATINGS:
+        errors.append("Рейтинг должен быть целым числом от 1 до 5")
+    # Как в Review.save: теги из текста удаляются
+    comment = strip_tags(str(row["comment"])).strip()
+    if not comment:
+        errors.append("Пустой комментарий")
+    if errors:
+        return None, errors
+    return {
+        "house_id_id": house_id,
+        "client_id_id": client_id,
+        "rating": rating,
+        "comment": comment,
+    }, []
+
+
+def validate_review_batch(rows, houses, report):
+    """Проверяет пачку отзывов и возвращает несохранённые объекты Review.
+
+    Клиенты пачки загружаются одним запросом.
+    """
+    client_ids = set()
+    for _, row, _ in rows:
+        if row:
+            try:
+                client_ids.add(int(row.get("client_id")))
+            except (TypeError, ValueError):
+                pass
+    clients = set(Client.objects.filter(pk__in=client_ids).values_list("pk", flat=True))
+    reviews = []
+    for line, row, parse_error in rows:
+        report.processed += 1
+        if parse_error:
+            report.add_error(line, [parse_error])
+            continue
+        data, errors = _parse_review(row, houses, clients)
+        if errors:
+            report.add_error(line, errors)
+            continue
+        review = Review(**data)
+        review._ingest_line = line
+        reviews.append(review)
+    return reviews
+
+
+def ingest_review_rows(rows, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, report=None):
+    """Импортирует отзывы из строк (номер, данные, ошибка разбора).
+
+    bulk_create не вызывает сигналы Review, поэтому статистика отзывов
+    обновляется одной записью на коттедж (ReviewStats.record_batch), журнал
+    изменений — одной вставкой, а дата помечается для аналитики.
+    """
+    report = report or IngestReport()
+    houses = set(House.objects.values_list("house_id", flat=True))
+    for batch in _in_batches(rows, batch_size):
+        with transaction.atomic():
+            reviews = validate_review_batch(batch, houses, report)
+            if dry_run:
+                report.add_validated(reviews)
+            elif reviews:
+                Review.objects.bulk_create(reviews, batch_size=batch_size)
+                ReviewStats.record_batch(reviews)
+                ChangeLog.record_many(
+                    Review, [review.pk for review in reviews], "created"
+                )
+                mark_dirty(timezone.now())
+                report.add_created(reviews)
+    report.errors.sort(key=lambda error: error["line"])
+    return report
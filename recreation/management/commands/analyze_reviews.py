@@ -0,0 +1,148 @@
+import os
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recreation.models import HouseReviewInsights, Review, ReviewAnalysis
+from recreation.text_analysis import analyze_chunk
+
+CLOUD_SIZE = 50
+
+
+class Command(BaseCommand):
+    help = "Анализ тональности и ключевых слов отзывов (пачками в пуле процессов)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true", help="Переанализировать все отзывы"
+        )
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Число процессов (1 — без пула)",
+        )
+
+    def handle(self, *args, **options):
+        reviews = Review.objects.all()
+        if not options["all"]:
+            reviews = reviews.filter(analysis__isnull=True)
+
+        houses = set()
+        analyzed = 0
+        for results, house_of in self._run(reviews, options):
+            rows = [
+                ReviewAnalysis(
+                    review_id=review_id,
+                    house_id=house_of[review_id],
+                    sentiment=sentiment,
+                    token_count=token_count,
+                    keywords=keywords,
+                )
+                for review_id, sentiment, token_count, keywords in results
+            ]
+            ReviewAnalysis.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=["review"],
+                update_fields=[
+                    "house",
+                    "sentiment",
+                    "token_count",
+                    "keywords",
+                    "analyzed_at",
+                ],
+            )
+            houses.update(house_of.values())
+            analyzed += len(rows)
+
+        if options["all"]:
+            houses = None
+        updated = self._rebuild_insights(houses)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Проанализировано отзывов: {analyzed}, обновлено сводок: {updated}"
+            )
+        )
+
+    def _chunks(self, reviews, chunk_size):
+        """Порции (список (id, текст), {id: коттедж}) по возрастанию pk."""
+        last_pk = 0
+        while True:
+            rows = list(
+                reviews.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("review_id", "house_id", "comment")[:chunk_size]
+            )
+            if not rows:
+                return
+            last_pk = rows[-1][0]
+            yield (
+                [(review_id, comment) for review_id, _, comment in rows],
+                {review_id: house_id for review_id, house_id, _ in rows},
+            )
+
+    def _run(self, reviews, options):
+        chunks = self._chunks(reviews, options["chunk_size"])
+        workers = options["workers"]
+        if workers <= 1:
+            for texts, house_of in chunks:
+                yield analyze_chunk(texts), house_of
+            return
+
+        # Держим в работе не больше 2 пачек на процесс, чтобы память не росла
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = []
+            for texts, house_of in chunks:
+                pending.append((pool.submit(analyze_chunk, texts), house_of))
+                if len(pending) >= workers * 2:
+                    future, house_of = pending.pop(0)
+                    yield future.result(), house_of
+            for future, house_of in pending:
+                yield future.result(), house_of
+
+    def _rebuild_insights(self, houses=None):
+        """Пересобирает облака слов и среднюю тональность по коттеджам."""
+        analyses = ReviewAnalysis.objects.order_by("house_id")
+        if houses is not None:
+            analyses = analyses.filter(house_id__in=houses)
+
+        clouds = defaultdict(Counter)
+        sentiment = defaultdict(float)
+        counts = defaultdict(int)
+        for house_id, score, keywords in analyses.values_list(
+            "house_id", "sentiment", "keywords"
+        ).iterator(chunk_size=5000):
+            clouds[house_id].update(keywords)
+            sentiment[house_id] += score
+            counts[house_id] += 1
+
+        rows = [
+            HouseReviewInsights(
+                house_id=house_id,
+                keywords=dict(clouds[house_id].most_common(CLOUD_SIZE)),
+                avg_sentiment=round(sentiment[house_id] / total, 4),
+                reviews_analyzed=total,
+            )
+            for house_id, total in counts.items()
+        ]
+        with transaction.atomic():
+            stale = HouseReviewInsights.objects.exclude(house_id__in=counts)
+            if houses is not None:
+                stale = stale.filter(house_id__in=houses)
+            stale.delete()
+            HouseReviewInsights.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=["house"],
+                update_fields=[
+                    "keywords",
+                    "avg_sentiment",
+                    "reviews_analyzed",
+                    "updated",
+                ],
+            )
+        return len(rows)
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recreation.models import Client, CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Создаёт профили клиентов для учётных записей, у которых их нет "
+        "(зарегистрированных до автоматического создания профиля)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Сколько профилей создавать одним запросом",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только посчитать учётные записи без профиля",
+        )
+        parser.add_argument(
+            "--include-staff",
+            action="store_true",
+            help="Создавать профили и сотрудникам",
+        )
+
+    def handle(self, *args, **options):
+        users = CustomUser.objects.filter(client_profile__isnull=True).order_by("pk")
+        if not options["include_staff"]:
+            users = users.filter(is_staff=False)
+
+        if options["dry_run"]:
+            self.stdout.write(f"Учётных записей без профиля: {users.count()}")
+            return
+
+        batch_size = options["batch_size"]
+        created = 0
+        last_pk = 0
+        while True:
+            # Выборка по pk, а не срезами: созданные профили выпадают из фильтра
+            batch = list(users.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            clients = []
+            for user in batch:
+                client = Client(user=user, **Client.fields_from_user(user))
+                client.update_search_fields()  # bulk_create не вызывает save()
+                clients.append(client)
+            profiles = Client.objects.filter(user_id__in=[user.pk for user in batch])
+            with transaction.atomic():
+                # Профили, созданные параллельно (вход пользователя), пропускаются,
+                # поэтому созданные считаются по таблице, а не по длине списка
+                existing = profiles.count()
+                Client.objects.bulk_create(clients, ignore_conflicts=True)
+                created += profiles.count() - existing
+
+        self.stdout.write(self.style.SUCCESS(f"Создано профилей: {created}"))
@@ -0,0 +1,87 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from recreation.backup import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_EXCLUDE,
+    backup_models,
+    sqlite_online_backup,
+    write_backup,
+)
+
+
+class Command(BaseCommand):
+    help = "Потоковая резервная копия базы (gzip NDJSON или снимок SQLite)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "output",
+            nargs="?",
+            help="Файл копии (по умолчанию backup-<дата>.ndjson.gz)",
+        )
+        parser.add_argument(
+            "--since",
+            help="Инкрементальная копия: только изменения после даты/времени (ISO)",
+        )
+        parser.add_argument(
+            "--mode",
+            choices=("auto", "ndjson", "sqlite"),
+            default="auto",
+            help="auto: снимок SQLite для полной копии на sqlite, иначе NDJSON",
+        )
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            "--exclude",
+            action="append",
+            default=list(DEFAULT_EXCLUDE),
+            help="Исключить модель (app_label.model), можно несколько раз",
+        )
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            since = parse_datetime(options["since"])
+            if since is None and parse_date(options["since"]):
+                since = parse_datetime(options["since"] + "T00:00:00")
+            if since is None:
+                raise CommandError("Некорректное значение --since")
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since, timezone.get_default_timezone())
+
+        using = options["database"]
+        mode = options["mode"]
+        if mode == "auto":
+            is_sqlite = connections[using].vendor == "sqlite"
+            mode = "sqlite" if is_sqlite and since is None else "ndjson"
+        if mode == "sqlite" and connections[using].vendor != "sqlite":
+            raise CommandError("Режим sqlite доступен только для базы SQLite")
+
+        stamp = timezone.now().strftime("%Y%m%d-%H%M%S")
+        if mode == "sqlite":
+            output = options["output"] or f"backup-{stamp}.sqlite3"
+            sqlite_online_backup(output, using=using)
+            self.stdout.write(self.style.SUCCESS(f"Снимок SQLite сохранён в {output}"))
+            return
+
+        output = options["output"] or f"backup-{stamp}.ndjson.gz"
+        models = backup_models(exclude=tuple(options["exclude"]))
+        with open(output, "wb") as fileobj:
+            stats = write_backup(
+                fileobj,
+                since=since,
+                chunk_size=options["chunk_size"],
+                models=models,
+            )
+
+        for label, count in stats.items():
+            if count:
+                self.stdout.write(f"  {label}: {count}")
+        kind = "Инкрементальная копия" if since else "Копия"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{kind} сохранена в {output}: {sum(stats.values())} записей"
+            )
+        )
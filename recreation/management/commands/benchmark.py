@@ -0,0 +1,107 @@
+from itertools import product
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from recreation.benchmarks import JSON_BACKENDS, READ_SERIALIZERS, SCENARIOS, run
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный замер сценария (данные создаются в транзакции, "
+        "которая откатывается после замера)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("scenario", choices=sorted(SCENARIOS))
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument(
+            "--users", type=int, default=1000, help="Сколько создать пользователей"
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--fast-hasher",
+            action="store_true",
+            help="Заменить PBKDF2 на MD5, чтобы исключить хеширование из замера",
+        )
+        parser.add_argument(
+            "--session-engine",
+            nargs="+",
+            choices=sorted(settings.SESSION_ENGINES),
+            help="Хранилища сессий для сравнения (по замеру на каждое)",
+        )
+        parser.add_argument(
+            "--objects",
+            type=int,
+            default=10000,
+            help="Сколько объектов каждого вида в сценариях json и serialize",
+        )
+        parser.add_argument(
+            "--json-backend",
+            nargs="+",
+            choices=sorted(JSON_BACKENDS),
+            help="Кодировщики JSON для сравнения в сценарии json",
+        )
+        parser.add_argument(
+            "--serializer",
+            nargs="+",
+            choices=READ_SERIALIZERS,
+            help="Способы чтения списков для сравнения в сценарии serialize",
+        )
+        parser.add_argument(
+            "--subscribers",
+            type=int,
+            default=5000,
+            help="Сколько SSE-соединений держать в сценарии events",
+        )
+        parser.add_argument(
+            "--path",
+            nargs="+",
+            default=["/"],
+            help="Страницы для сценария render (по замеру на каждую)",
+        )
+
+    def handle(self, *args, **options):
+        if options["iterations"] <= 0:
+            raise CommandError("--iterations должно быть больше нуля")
+        paths = options["path"] if options["scenario"] == "render" else [None]
+        variants = product(
+            options["session_engine"] or [None],
+            paths,
+            options["json_backend"] or [None],
+            options["serializer"] or [None],
+        )
+        for engine, path, json_backend, serializer in variants:
+            result = run(
+                options["scenario"],
+                iterations=options["iterations"],
+                warmup=options["warmup"],
+                fast_hasher=options["fast_hasher"],
+                session_engine=engine,
+                users=options["users"],
+                seed=options["seed"],
+                path=path,
+                objects=options["objects"],
+                json_backend=json_backend,
+                serializer=serializer,
+                subscribers=options["subscribers"],
+            )
+            label = " ".join(
+                filter(None, [result["scenario"], path, json_backend, serializer])
+            )
+            self.stdout.write(
+                f"{label} [{result['session_engine']}]: "
+                f"{result['iterations']} итераций, {result['ops_per_sec']:.1f} оп/с"
+            )
+            self.stdout.write(
+                "  среднее {mean_ms:.2f} мс, p50 {p50_ms:.2f}, p95 {p95_ms:.2f}, "
+                "p99 {p99_ms:.2f}, макс {max_ms:.2f}".format(**result)
+            )
+            if result["info"]:
+                self.stdout.write(
+                    "  "
+                    + ", ".join(
+                        f"{key} {value}" for key, value in result["info"].items()
+                    )
+                )
@@ -0,0 +1,52 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from recreation.analytics import rebuild, rebuild_dirty
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает дневные снимки загрузки и выручки коттеджей "
+        "и сводные показатели панели администратора"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Пересчитать только даты, затронутые изменениями",
+        )
+        parser.add_argument(
+            "--start", help="Первая дата (ГГГГ-ММ-ДД), по умолчанию год назад"
+        )
+        parser.add_argument(
+            "--end", help="Последняя дата (ГГГГ-ММ-ДД), по умолчанию +180 дней"
+        )
+
+    def handle(self, *args, **options):
+        if options["incremental"]:
+            days = rebuild_dirty()
+            self.stdout.write(self.style.SUCCESS(f"Пересчитано дат: {days}"))
+            return
+
+        today = timezone.now().date()
+        try:
+            start = (
+                date.fromisoformat(options["start"])
+                if options["start"]
+                else today - timedelta(days=365)
+            )
+            end = (
+                date.fromisoformat(options["end"])
+                if options["end"]
+                else today + timedelta(days=180)
+            )
+        except ValueError:
+            raise CommandError("Даты должны быть в формате ГГГГ-ММ-ДД")
+        if end < start:
+            raise CommandError("Дата окончания раньше даты начала")
+
+        rebuild(start, end)
+        self.stdout.write(self.style.SUCCESS(f"Снимки за {start} — {end} пересчитаны"))
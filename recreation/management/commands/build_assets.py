@@ -0,0 +1,44 @@
+from urllib.error import URLError
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recreation.assets import build_bundle, bundles, download_vendor
+
+
+class Command(BaseCommand):
+    help = (
+        "Скачивает сторонние библиотеки в static/vendor и собирает "
+        "минимизированные бандлы в static/dist. После сборки выполните "
+        "collectstatic: он добавит хеши к именам и сожмёт файлы"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--skip-download",
+            action="store_true",
+            help="Не скачивать библиотеки (использовать уже скачанные)",
+        )
+        parser.add_argument(
+            "--force-download",
+            action="store_true",
+            help="Скачать библиотеки заново, даже если они уже есть",
+        )
+
+    def handle(self, *args, **options):
+        if not options["skip_download"]:
+            try:
+                downloaded = download_vendor(force=options["force_download"])
+            except URLError as error:
+                raise CommandError(f"Не удалось скачать библиотеку: {error}")
+            self.stdout.write(f"Скачано файлов библиотек: {len(downloaded)}")
+
+        for name, sources in bundles().items():
+            try:
+                size = build_bundle(name, sources)
+            except FileNotFoundError as error:
+                raise CommandError(
+                    f"{name}: нет исходного файла {error.filename} "
+                    "(запустите без --skip-download)"
+                )
+            self.stdout.write(f"  dist/{name}: {size / 1024:.1f} КБ")
+        self.stdout.write(self.style.SUCCESS("Статика собрана"))
@@ -0,0 +1,53 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет истёкшие сессии небольшими порциями, не блокируя таблицу "
+        "надолго (в отличие от clearsessions). Запускать по расписанию, "
+        "например раз в час из cron"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Сколько сессий удалять одним запросом",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.1,
+            help="Пауза между порциями в секундах",
+        )
+
+    def handle(self, *args, **options):
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not hasattr(store, "get_model_class"):
+            # cache и signed_cookies: сессии истекают сами
+            try:
+                store.clear_expired()
+            except NotImplementedError:
+                pass
+            self.stdout.write("Сессии не хранятся в БД, удалять нечего")
+            return
+
+        Session = store.get_model_class()
+        expired = Session.objects.filter(expire_date__lt=timezone.now())
+        batch_size = options["batch_size"]
+        deleted = 0
+        while True:
+            keys = list(expired.values_list("session_key", flat=True)[:batch_size])
+            if keys:
+                deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+            if len(keys) < batch_size:
+                break
+            time.sleep(options["pause"])
+
+        self.stdout.write(self.style.SUCCESS(f"Удалено сессий: {deleted}"))
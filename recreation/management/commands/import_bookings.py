@@ -0,0 +1,69 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recreation.ingest import DEFAULT_BATCH_SIZE, FORMATS, ingest_bookings
+
+
+class Command(BaseCommand):
+    help = "Пакетный импорт бронирований из CSV или JSON Lines (выгрузки OTA)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к файлу или '-' для stdin")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Формат входных данных (по умолчанию — по расширению файла)",
+        )
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Только проверить, не сохранять"
+        )
+        parser.add_argument(
+            "--errors-file", help="Записать ошибки по строкам в файл (JSON Lines)"
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or (
+            "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+        )
+
+        try:
+            if path == "-":
+                report = self._ingest(sys.stdin, fmt, options)
+            else:
+                with open(path, encoding="utf-8-sig", newline="") as stream:
+                    report = self._ingest(stream, fmt, options)
+        except OSError as e:
+            raise CommandError(f"Не удалось открыть файл: {e}")
+
+        if options["errors_file"]:
+            with open(options["errors_file"], "w", encoding="utf-8") as out:
+                for error in report.errors:
+                    out.write(json.dumps(error, ensure_ascii=False) + "\n")
+        else:
+            for error in report.errors[:50]:
+                self.stderr.write(
+                    f"Строка {error['line']}: {'; '.join(error['errors'])}"
+                )
+
+        if options["dry_run"]:
+            action, count = "Прошли проверку", report.validated
+        else:
+            action, count = "Импортировано", report.created
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{action} {count} из {report.processed} бронирований, "
+                f"ошибок: {len(report.errors)}"
+            )
+        )
+
+    def _ingest(self, stream, fmt, options):
+        return ingest_bookings(
+            stream,
+            fmt=fmt,
+            batch_size=options["batch_size"],
+            dry_run=options["dry_run"],
+        )
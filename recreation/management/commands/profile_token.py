@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recreation.profiling import HEADER, make_token
+
+
+class Command(BaseCommand):
+    help = (
+        "Выдаёт подписанный токен для профилирования запросов: с заголовком "
+        "X-Profile-Token запрос профилируется и сохраняется в админке"
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{HEADER}: {make_token()}")
+        self.stdout.write(
+            f"Токен действует {settings.PROFILE_TOKEN_MAX_AGE // 60} мин.",
+            style_func=self.style.WARNING,
+        )
@@ -0,0 +1,47 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recreation.models import ChangeLog
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет старые записи журнала изменений порциями. Клиенты с курсором "
+        "старше оставшихся записей получат 410 и загрузят данные заново"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=90, help="Сколько дней хранить записи"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Сколько записей удалять одним запросом",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.1,
+            help="Пауза между порциями в секундах",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        expired = ChangeLog.objects.filter(changed_at__lt=cutoff).order_by("id")
+        batch_size = options["batch_size"]
+        deleted = 0
+        while True:
+            # Удаляем с начала журнала, чтобы оставшиеся id шли без пропусков
+            ids = list(expired.values_list("id", flat=True)[:batch_size])
+            if ids:
+                deleted += ChangeLog.objects.filter(id__in=ids).delete()[0]
+            if len(ids) < batch_size:
+                break
+            time.sleep(options["pause"])
+
+        self.stdout.write(self.style.SUCCESS(f"Удалено записей: {deleted}"))
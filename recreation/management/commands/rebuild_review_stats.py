@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from recreation.models import ReviewStats
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает статистику отзывов (гистограммы и средние) с нуля"
+
+    def handle(self, *args, **kwargs):
+        houses = ReviewStats.rebuild()
+        stats = ReviewStats.get_global()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Статистика пересчитана: {stats.total} отзывов, "
+                f"коттеджей с отзывами: {houses}"
+            )
+        )
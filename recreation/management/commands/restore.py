@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from recreation.backup import DEFAULT_CHUNK_SIZE, read_backup, sqlite_online_restore
+
+
+class Command(BaseCommand):
+    help = "Восстановление базы из копии, созданной командой backup"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл копии (.ndjson.gz или .sqlite3)")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        using = options["database"]
+
+        if path.endswith((".sqlite3", ".sqlite", ".db")):
+            if connections[using].vendor != "sqlite":
+                raise CommandError("Снимок SQLite можно восстановить только в SQLite")
+            sqlite_online_restore(path, using=using)
+            self.stdout.write(self.style.SUCCESS(f"База восстановлена из {path}"))
+            return
+
+        try:
+            with open(path, "rb") as fileobj:
+                manifest, stats = read_backup(
+                    fileobj, using=using, chunk_size=options["chunk_size"]
+                )
+        except OSError as e:
+            raise CommandError(f"Не удалось открыть файл: {e}")
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for label, count in stats.items():
+            if count:
+                self.stdout.write(f"  {label}: {count}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Восстановлено {sum(stats.values())} записей из копии "
+                f"от {manifest['created']}"
+            )
+        )
@@ -0,0 +1,299 @@
+"""Метрики производительности в текстовом формате Prometheus (``/metrics``).
+
+MetricsMiddleware записывает для каждого запроса время ответа, статус,
+число запросов к БД и время в БД с меткой представления (имя URL).
+``timed(operation)`` замеряет отдельные операции: генерацию PDF, экспорт
+в админке, поиск картинки коттеджа, хеширование пароля.
+
+Запись не берёт блокировок: у каждого потока свой набор значений
+(шард), в который пишет только этот поток. При запросе ``/metrics``
+шарды суммируются. Поэтому счётчики безопасны в многопоточном WSGI
+и не тормозят запросы друг друга. Шард завершившегося потока (runserver
+и другие серверы с потоком на соединение) прибавляется к общему итогу
+и больше не хранится отдельно. Значения хранятся в памяти процесса
+и обнуляются при перезапуске: при нескольких процессах каждый отдаёт
+свои метрики.
+"""
+
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from contextlib import ContextDecorator, ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+from .throttling import client_ip
+
+# Границы корзин гистограмм (секунды), как в клиентах Prometheus
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250)
+UNRESOLVED = "<unresolved>"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _merge(totals, shard):
+    """Прибавляет значения шарда к totals (гистограммы — покорзинно)."""
+    # copy() словаря и срез списка атомарны под GIL
+    for key, value in shard.copy().items():
+        if isinstance(value, list):
+            value = value[:]
+            current = totals.get(key)
+            if current is None:
+                totals[key] = value
+            else:
+                for index, cell in enumerate(value):
+                    current[index] += cell
+        else:
+            totals[key] = totals.get(key, 0) + value
+
+
+class _ThreadMarker:
+    """Живёт в threading.local потока: его удаление означает конец потока."""
+
+
+class Registry:
+    """Набор метрик процесса с шардом значений на каждый поток."""
+
+    def __init__(self):
+        self.metrics = {}
+        self._local = threading.local()
+        self._shards = {}  # id(шард) → шард живого потока
+        self._retired = {}  # сумма шардов завершившихся потоков
+        # Берётся при появлении и завершении потока и при сборе значений
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def shard(self):
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            marker = self._local.marker = _ThreadMarker()
+            with self._lock:
+                self._shards[id(values)] = values
+            # Счётчики не убывают: значения потока переходят в общий итог
+            weakref.finalize(marker, self._retire, values)
+            return values
+
+    def _retire(self, values):
+        with self._lock:
+            if self._shards.pop(id(values), None) is not None:
+                _merge(self._retired, values)
+
+    def collect(self):
+        """Сумма значений всех потоков: {(метрика, метки): значение}."""
+        totals = {}
+        # Под блокировкой: шард не может уйти в итог посреди подсчёта
+        with self._lock:
+            _merge(totals, self._retired)
+            for shard in self._shards.values():
+                _merge(totals, shard)
+        return totals
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus."""
+        totals = self.collect()
+        by_metric = {}
+        for (name, labels), value in sorted(totals.items()):
+            by_metric.setdefault(name, []).append((labels, value))
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, value in by_metric.get(metric.name, ()):
+                lines.extend(metric.samples(labels, value))
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=(), registry=None):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.registry = registry or REGISTRY
+        self.registry.register(self)
+
+    def inc(self, *labels, amount=1):
+        shard = self.registry.shard()
+        key = (self.name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def samples(self, labels, value):
+        yield (
+            f"{self.name}{_format_labels(self.labelnames, labels)} "
+            f"{_format_number(value)}"
+        )
+
+
+class Histogram:
+    """Гистограмма: в шарде — счётчики корзин (не накопленные) и сумма."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name, help, labelnames=(), buckets=LATENCY_BUCKETS, registry=None
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self.registry = registry or REGISTRY
+        self.registry.register(self)
+
+    def observe(self, value, *labels):
+        shard = self.registry.shard()
+        key = (self.name, labels)
+        cells = shard.get(key)
+        if cells is None:
+            # Корзины, корзина +Inf и сумма
+            cells = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        cells[bisect_left(self.buckets, value)] += 1
+        cells[-1] += value
+
+    def samples(self, labels, cells):
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), cells):
+            cumulative += count
+            le = (("le", bound if bound == "+Inf" else _format_number(bound)),)
+            yield (
+                f"{self.name}_bucket"
+                f"{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            )
+        label_text = _format_labels(self.labelnames, labels)
+        yield f"{self.name}_sum{label_text} {_format_number(cells[-1])}"
+        yield f"{self.name}_count{label_text} {cumulative}"
+
+
+REGISTRY = Registry()
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "Ответы по представлению, методу и статусу.",
+    ("view", "method", "status"),
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки запроса (до отправки заголовков ответа).",
+    ("view", "method"),
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_duration_seconds",
+    "Время запросов к БД за один HTTP-запрос.",
+    ("view",),
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Число запросов к БД за один HTTP-запрос.",
+    ("view",),
+    QUERY_COUNT_BUCKETS,
+)
+DB_QUERIES = Counter(
+    "db_queries_total",
+    "Запросы к БД по представлению и базе.",
+    ("view", "alias"),
+)
+OPERATION_LATENCY = Histogram(
+    "app_operation_duration_seconds",
+    "Время отдельных операций (PDF, экспорт, картинки, хеширование).",
+    ("operation",),
+)
+
+
+class timed(ContextDecorator):
+    """Замеряет операцию: ``with timed("pdf"):`` или ``@timed("pdf")``."""
+
+    def __init__(self, operation):
+        self.operation = operation
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        OPERATION_LATENCY.observe(time.perf_counter() - self._started, self.operation)
+        return False
+
+    def _recreate_cm(self):
+        # Декорированная функция может выполняться в нескольких потоках сразу
+        return type(self)(self.operation)
+
+
+class QueryRecorder:
+    """Обёртка execute для всех подключений к БД на время одного запроса."""
+
+    def __init__(self):
+        self.counts = {}
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            alias = context["connection"].alias
+            self.counts[alias] = self.counts.get(alias, 0) + 1
+
+    def install(self):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+
+def view_label(request):
+    """Метка представления: имя URL, шаблон маршрута или <unresolved>.
+
+    Путь запроса в метку не попадает, иначе число рядов не ограничено.
+    """
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return UNRESOLVED
+    return match.view_name or match.route or UNRESOLVED
+
+
+def _metrics_allowed(request):
+    if request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    if (
+        token
+        and scheme.lower() == "bearer"
+        and constant_time_compare(credentials, token)
+    ):
+        return True
+    # client_ip учитывает доверенные прокси (LOGIN_THROTTLE_PROXY_COUNT):
+    # за nginx на той же машине REMOTE_ADDR всегда 127.0.0.1
+    return client_ip(request) in settings.METRICS_ALLOWED_IPS
+
+
+def metrics_view(request):
+    """``/metrics``: персоналу, по токену METRICS_TOKEN и адресам METRICS_ALLOWED_IPS."""
+    if not _metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,103 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .metrics import (
+    DB_QUERIES,
+    REQUEST_DB_TIME,
+    REQUEST_LATENCY,
+    REQUEST_QUERIES,
+    REQUESTS,
+    QueryRecorder,
+    view_label,
+)
+from .profiling import SQLRecorder, StackSampler, profile_trigger, save_profile
+
+logger = logging.getLogger(__name__)
+
+
+def _client_profile(request):
+    user = request.user
+    return user.get_client_profile() if user.is_authenticated else None
+
+
+class ClientProfileMiddleware:
+    """Добавляет ``request.client_profile`` — профиль клиента текущего
+    пользователя. Как и ``request.user``, это ленивый объект: для
+    анонимного пользователя он ложен (проверять ``if``, а не ``is None``).
+
+    Профиль вычисляется лениво и берётся из того же объекта пользователя,
+    который EmailPhoneBackend.get_user загружает вместе с профилем, поэтому
+    отдельного запроса нет. Представления, формы и шаблоны используют
+    одно и то же значение. Ставится после AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.client_profile = SimpleLazyObject(lambda: _client_profile(request))
+        return self.get_response(request)
+
+
+class MetricsMiddleware:
+    """Записывает метрики запроса (см. recreation.metrics): время ответа,
+    статус, число запросов к БД и время в БД по имени URL.
+
+    Ставится первым, чтобы время включало остальные middleware. Для
+    потоковых ответов (SSE) время считается до отправки заголовков.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        recorder = QueryRecorder()
+        with recorder.install():
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+        view = view_label(request)
+        REQUESTS.inc(view, request.method, str(response.status_code))
+        REQUEST_LATENCY.observe(elapsed, view, request.method)
+        REQUEST_DB_TIME.observe(recorder.seconds, view)
+        REQUEST_QUERIES.observe(sum(recorder.counts.values()), view)
+        for alias, count in recorder.counts.items():
+            DB_QUERIES.inc(view, alias, amount=count)
+        return response
+
+
+class ProfilingMiddleware:
+    """Профилирует отдельные запросы (см. recreation.profiling): снимки
+    стека и запросы к БД с местом вызова сохраняются в RequestProfile.
+
+    Ставится после AuthenticationMiddleware: флаг ``?_profile`` работает
+    только для персонала.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trigger = profile_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        recorder = SQLRecorder()
+        started = time.perf_counter()
+        sampler = StackSampler(threading.get_ident(), settings.PROFILE_INTERVAL)
+        with sampler, recorder.install():
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        try:
+            profile = save_profile(
+                request, response, trigger, sampler, recorder, duration
+            )
+        except Exception:
+            # Профиль не должен ломать сам ответ
+            logger.exception("Не удалось сохранить профиль %s", request.path)
+            return response
+        response["X-Profile-Id"] = str(profile.pk)
+        return response
@@ -2,7 +2,6 @@
 
 import django.db.models.deletion
 import django.utils.timezone
-from django.conf import settings
 from django.db import migrations, models
 
 
@@ -11,7 +10,9 @@ class Migration(migrations.Migration):
     initial = True
 
     dependencies = [
-        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        # Пользователем до 0008 был auth.User: AUTH_USER_MODEL сменили
+        # позже, и с ним эти миграции не применяются к пустой базе
+        ("auth", "0012_alter_user_first_name_max_length"),
     ]
 
     operations = [
@@ -252,7 +253,7 @@ class Migration(migrations.Migration):
                     models.ForeignKey(
                         on_delete=django.db.models.deletion.CASCADE,
                         related_name="blog_posts",
-                        to=settings.AUTH_USER_MODEL,
+                        to="auth.user",
                     ),
                 ),
             ],
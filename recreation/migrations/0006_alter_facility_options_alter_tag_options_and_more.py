@@ -2,7 +2,6 @@
 
 import django.db.models.deletion
 import django.utils.timezone
-from django.conf import settings
 from django.db import migrations, models
 
 
@@ -10,7 +9,9 @@ class Migration(migrations.Migration):
 
     dependencies = [
         ("recreation", "0005_alter_event_options_alter_review_options_and_more"),
-        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        # Пользователем до 0008 был auth.User: AUTH_USER_MODEL сменили
+        # позже, и с ним эти миграции не применяются к пустой базе
+        ("auth", "0012_alter_user_first_name_max_length"),
     ]
 
     operations = [
@@ -298,7 +299,7 @@ class Migration(migrations.Migration):
             field=models.ForeignKey(
                 on_delete=django.db.models.deletion.CASCADE,
                 related_name="blog_posts",
-                to=settings.AUTH_USER_MODEL,
+                to="auth.user",
                 verbose_name="Автор",
             ),
         ),
@@ -14,6 +14,10 @@ class Migration(migrations.Migration):
         ("auth", "0012_alter_user_first_name_max_length"),
         ("recreation", "0007_alter_house_image"),
     ]
+    # Пользовательская модель появилась не в 0001: миграции других
+    # приложений, зависящие от AUTH_USER_MODEL (recreation.__first__),
+    # должны выполняться после её создания
+    run_before = [("admin", "0001_initial")]
 
     operations = [
         migrations.CreateModel(
@@ -2,6 +2,11 @@ from django.db import migrations
 
 
 def create_customuser_table(apps, schema_editor):
+    # Таблица из 0011 (custom_users) есть в любой базе, созданной
+    # миграциями с нуля, — её переименует 0014. Таблицу вручную создаём
+    # только для баз, где её нет
+    if "custom_users" in schema_editor.connection.introspection.table_names():
+        return
     # SQL для создания таблицы
     schema_editor.execute(
         """
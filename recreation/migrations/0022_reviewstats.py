@@ -0,0 +1,109 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+
+
+def fill_review_stats(apps, schema_editor):
+    Review = apps.get_model("recreation", "Review")
+    ReviewStats = apps.get_model("recreation", "ReviewStats")
+
+    aggregates = {
+        "rating_1": Count("review_id", filter=Q(rating__lte=1)),
+        "rating_2": Count("review_id", filter=Q(rating=2)),
+        "rating_3": Count("review_id", filter=Q(rating=3)),
+        "rating_4": Count("review_id", filter=Q(rating=4)),
+        "rating_5": Count("review_id", filter=Q(rating__gte=5)),
+        "total": Count("review_id"),
+        "rating_sum": Sum("rating"),
+        "last_review_at": Max("created_at"),
+    }
+    rows = list(Review.objects.values("house_id").order_by().annotate(**aggregates))
+    rows.append(dict(Review.objects.aggregate(**aggregates), house_id=None))
+    ReviewStats.objects.bulk_create(
+        ReviewStats(**dict(row, rating_sum=row["rating_sum"] or 0)) for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "recreation",
+            "0021_employee_email_employee_hire_date_employee_phone_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReviewStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "rating_1",
+                    models.PositiveIntegerField(default=0, verbose_name="Оценок 1"),
+                ),
+                (
+                    "rating_2",
+                    models.PositiveIntegerField(default=0, verbose_name="Оценок 2"),
+                ),
+                (
+                    "rating_3",
+                    models.PositiveIntegerField(default=0, verbose_name="Оценок 3"),
+                ),
+                (
+                    "rating_4",
+                    models.PositiveIntegerField(default=0, verbose_name="Оценок 4"),
+                ),
+                (
+                    "rating_5",
+                    models.PositiveIntegerField(default=0, verbose_name="Оценок 5"),
+                ),
+                (
+                    "total",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Всего отзывов"
+                    ),
+                ),
+                (
+                    "rating_sum",
+                    models.PositiveIntegerField(default=0, verbose_name="Сумма оценок"),
+                ),
+                (
+                    "last_review_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Последний отзыв"
+                    ),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(auto_now=True, verbose_name="Дата обновления"),
+                ),
+                (
+                    "house",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="review_stats",
+                        to="recreation.house",
+                        verbose_name="Коттедж",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Статистика отзывов",
+                "verbose_name_plural": "Статистика отзывов",
+            },
+        ),
+        migrations.RunPython(fill_review_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recreation", "0022_reviewstats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HouseReviewInsights",
+            fields=[
+                (
+                    "house",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="review_insights",
+                        serialize=False,
+                        to="recreation.house",
+                        verbose_name="Коттедж",
+                    ),
+                ),
+                (
+                    "keywords",
+                    models.JSONField(default=dict, verbose_name="Облако слов"),
+                ),
+                (
+                    "avg_sentiment",
+                    models.FloatField(default=0, verbose_name="Средняя тональность"),
+                ),
+                (
+                    "reviews_analyzed",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Проанализировано отзывов"
+                    ),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(auto_now=True, verbose_name="Дата обновления"),
+                ),
+            ],
+            options={
+                "verbose_name": "Сводка по отзывам",
+                "verbose_name_plural": "Сводки по отзывам",
+            },
+        ),
+        migrations.CreateModel(
+            name="ReviewAnalysis",
+            fields=[
+                (
+                    "review",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="analysis",
+                        serialize=False,
+                        to="recreation.review",
+                        verbose_name="Отзыв",
+                    ),
+                ),
+                ("sentiment", models.FloatField(verbose_name="Тональность")),
+                ("token_count", models.PositiveIntegerField(verbose_name="Число слов")),
+                (
+                    "keywords",
+                    models.JSONField(default=dict, verbose_name="Ключевые слова"),
+                ),
+                (
+                    "analyzed_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Дата анализа"),
+                ),
+                (
+                    "house",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="review_analyses",
+                        to="recreation.house",
+                        verbose_name="Коттедж",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Анализ отзыва",
+                "verbose_name_plural": "Анализ отзывов",
+            },
+        ),
+    ]
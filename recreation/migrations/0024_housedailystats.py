@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recreation", "0023_reviewanalysis_housereviewinsights"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HouseDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Дата")),
+                (
+                    "nights_sold",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Продано ночей"
+                    ),
+                ),
+                (
+                    "room_revenue",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Выручка за проживание",
+                    ),
+                ),
+                (
+                    "service_revenue",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Выручка за услуги",
+                    ),
+                ),
+                (
+                    "payments",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Поступления",
+                    ),
+                ),
+                (
+                    "bookings_started",
+                    models.PositiveIntegerField(default=0, verbose_name="Заездов"),
+                ),
+                (
+                    "house",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="recreation.house",
+                        verbose_name="Коттедж",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Дневная статистика коттеджа",
+                "verbose_name_plural": "Дневная статистика коттеджей",
+                "ordering": ["date", "house"],
+                "indexes": [
+                    models.Index(fields=["date"], name="recreation__date_fcbae9_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("house", "date"), name="unique_house_daily_stats"
+                    )
+                ],
+            },
+        ),
+    ]
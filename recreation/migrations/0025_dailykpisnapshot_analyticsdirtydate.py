@@ -0,0 +1,114 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recreation", "0024_housedailystats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnalyticsDirtyDate",
+            fields=[
+                (
+                    "date",
+                    models.DateField(
+                        primary_key=True, serialize=False, verbose_name="Дата"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Дата для пересчёта",
+                "verbose_name_plural": "Даты для пересчёта",
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyKpiSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(unique=True, verbose_name="Дата")),
+                (
+                    "bookings_created",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Новых бронирований"
+                    ),
+                ),
+                (
+                    "bookings_value",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=14,
+                        verbose_name="Сумма бронирований",
+                    ),
+                ),
+                (
+                    "nights_available",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Доступно ночей"
+                    ),
+                ),
+                (
+                    "nights_sold",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Продано ночей"
+                    ),
+                ),
+                (
+                    "room_revenue",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=14,
+                        verbose_name="Выручка за проживание",
+                    ),
+                ),
+                (
+                    "service_revenue",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=14,
+                        verbose_name="Выручка за услуги",
+                    ),
+                ),
+                (
+                    "payments",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=14,
+                        verbose_name="Поступления",
+                    ),
+                ),
+                (
+                    "reviews",
+                    models.PositiveIntegerField(default=0, verbose_name="Отзывов"),
+                ),
+                (
+                    "rating_sum",
+                    models.PositiveIntegerField(default=0, verbose_name="Сумма оценок"),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(auto_now=True, verbose_name="Дата обновления"),
+                ),
+            ],
+            options={
+                "verbose_name": "Панель показателей",
+                "verbose_name_plural": "Панель показателей",
+                "ordering": ["-date"],
+            },
+        ),
+    ]
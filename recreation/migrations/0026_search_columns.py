@@ -0,0 +1,159 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:17
+
+import re
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+# Копии recreation.normalizers на момент миграции: дальнейшие правки
+# нормализации не должны менять результат уже написанной миграции
+_SPACES_RE = re.compile(r"\s+")
+_NON_DIGITS_RE = re.compile(r"\D")
+
+
+def normalize_text(value):
+    return _SPACES_RE.sub(" ", str(value or "")).strip().lower().replace("ё", "е")
+
+
+def normalize_phone(value):
+    digits = _NON_DIGITS_RE.sub("", str(value or ""))
+    if len(digits) == 11 and digits.startswith("8"):
+        digits = "7" + digits[1:]
+    return digits
+
+
+def normalize_email(value):
+    return str(value or "").strip().lower()
+
+
+def full_name(*parts):
+    return normalize_text(" ".join(part for part in parts if part))
+
+
+def _backfill(model, values):
+    batch = []
+    for obj in model.objects.order_by("pk").iterator(chunk_size=BATCH_SIZE):
+        for name, value in values(obj).items():
+            setattr(obj, name, value)
+        batch.append(obj)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_update(
+                batch, ["search_name", "search_phone", "search_email"]
+            )
+            batch = []
+    if batch:
+        model.objects.bulk_update(
+            batch, ["search_name", "search_phone", "search_email"]
+        )
+
+
+def fill_search_columns(apps, schema_editor):
+    _backfill(
+        apps.get_model("recreation", "Client"),
+        lambda client: {
+            "search_name": full_name(
+                client.last_name, client.first_name, client.patronymic
+            ),
+            "search_phone": normalize_phone(client.phone_number),
+            "search_email": normalize_email(client.email),
+        },
+    )
+    _backfill(
+        apps.get_model("recreation", "CustomUser"),
+        lambda user: {
+            "search_name": full_name(user.last_name, user.username, user.patronymic),
+            "search_phone": normalize_phone(user.phone),
+            "search_email": normalize_email(user.email),
+        },
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("recreation", "0025_dailykpisnapshot_analyticsdirtydate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="client",
+            name="search_email",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="client",
+            name="search_name",
+            field=models.CharField(blank=True, editable=False, max_length=310),
+        ),
+        migrations.AddField(
+            model_name="client",
+            name="search_phone",
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name="customuser",
+            name="search_email",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="customuser",
+            name="search_name",
+            field=models.CharField(blank=True, editable=False, max_length=310),
+        ),
+        migrations.AddField(
+            model_name="customuser",
+            name="search_phone",
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.RunPython(fill_search_columns, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="client",
+            index=models.Index(
+                fields=["search_name"],
+                name="client_search_name_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="client",
+            index=models.Index(
+                fields=["search_phone"],
+                name="client_search_phone_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="client",
+            index=models.Index(
+                fields=["search_email"],
+                name="client_search_email_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="customuser",
+            index=models.Index(
+                fields=["search_name"],
+                name="user_search_name_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="customuser",
+            index=models.Index(
+                fields=["search_phone"],
+                name="user_search_phone_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="customuser",
+            index=models.Index(
+                fields=["search_email"],
+                name="user_search_email_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:18
+
+import re
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+# Копии recreation.normalizers на момент миграции: дальнейшие правки
+# нормализации не должны менять результат уже написанной миграции
+_NON_DIGITS_RE = re.compile(r"\D")
+
+
+def normalize_email(value):
+    return str(value or "").strip().lower()
+
+
+def to_e164(value):
+    digits = _NON_DIGITS_RE.sub("", str(value or ""))
+    if len(digits) == 11 and digits.startswith("8"):
+        digits = "7" + digits[1:]
+    if len(digits) == 10:
+        digits = "7" + digits
+    if not 11 <= len(digits) <= 15 or not digits[1:].strip("0"):
+        return None
+    return "+" + digits
+
+
+def fill_login_keys(apps, schema_editor):
+    """Заполняет ключи входа. При дублях (одинаковый email или телефон
+    в разном написании) ключ получает самая ранняя учётная запись, у
+    остальных он остаётся пустым — они входят по имени пользователя."""
+    CustomUser = apps.get_model("recreation", "CustomUser")
+    seen_emails, seen_phones = set(), set()
+    batch = []
+    for user in CustomUser.objects.order_by("pk").iterator(chunk_size=BATCH_SIZE):
+        email = normalize_email(user.email) or None
+        phone = to_e164(user.phone)
+        user.email_normalized = email if email not in seen_emails else None
+        user.phone_e164 = phone if phone not in seen_phones else None
+        seen_emails.add(email)
+        seen_phones.add(phone)
+        batch.append(user)
+        if len(batch) >= BATCH_SIZE:
+            CustomUser.objects.bulk_update(batch, ["email_normalized", "phone_e164"])
+            batch = []
+    if batch:
+        CustomUser.objects.bulk_update(batch, ["email_normalized", "phone_e164"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recreation", "0026_search_columns"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="email_normalized",
+            field=models.CharField(
+                blank=True, editable=False, max_length=254, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="customuser",
+            name="phone_e164",
+            field=models.CharField(
+                blank=True, editable=False, max_length=16, null=True
+            ),
+        ),
+        migrations.RunPython(fill_login_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="customuser",
+            name="email_normalized",
+            field=models.CharField(
+                blank=True, editable=False, max_length=254, null=True, unique=True
+            ),
+        ),
+        migrations.AlterField(
+            model_name="customuser",
+            name="phone_e164",
+            field=models.CharField(
+                blank=True, editable=False, max_length=16, null=True, unique=True
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recreation", "0027_login_lookup_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="service",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=1, editable=False, verbose_name="Версия"
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:46
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recreation", "0028_service_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeLog",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("model", models.CharField(max_length=20, verbose_name="Модель")),
+                (
+                    "object_id",
+                    models.PositiveBigIntegerField(verbose_name="ID объекта"),
+                ),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("created", "Создан"),
+                            ("updated", "Изменён"),
+                            ("deleted", "Удалён"),
+                        ],
+                        max_length=10,
+                        verbose_name="Действие",
+                    ),
+                ),
+                (
+                    "changed_at",
+                    models.DateTimeField(
+                        db_index=True,
+                        default=django.utils.timezone.now,
+                        verbose_name="Время изменения",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Изменение",
+                "verbose_name_plural": "Журнал изменений",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        fields=["model", "id"], name="recreation__model_eff52a_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:06
+
+import django.db.models.deletion
+import django.utils.timezone
+import recreation.storage
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recreation", "0029_changelog"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RequestProfile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        db_index=True,
+                        default=django.utils.timezone.now,
+                        verbose_name="Время запроса",
+                    ),
+                ),
+                ("method", models.CharField(max_length=10, verbose_name="Метод")),
+                ("path", models.CharField(max_length=500, verbose_name="Путь")),
+                (
+                    "view_name",
+                    models.CharField(
+                        blank=True,
+                        db_index=True,
+                        max_length=200,
+                        verbose_name="Представление",
+                    ),
+                ),
+                (
+                    "status_code",
+                    models.PositiveSmallIntegerField(verbose_name="Статус"),
+                ),
+                (
+                    "trigger",
+                    models.CharField(
+                        choices=[
+                            ("staff", "Флаг персонала"),
+                            ("header", "Подписанный заголовок"),
+                            ("sampled", "Выборка 1 из N"),
+                        ],
+                        max_length=10,
+                        verbose_name="Причина профилирования",
+                    ),
+                ),
+                ("duration_ms", models.FloatField(verbose_name="Время, мс")),
+                ("db_ms", models.FloatField(verbose_name="Время в БД, мс")),
+                (
+                    "query_count",
+                    models.PositiveIntegerField(verbose_name="Запросов к БД"),
+                ),
+                (
+                    "sample_count",
+                    models.PositiveIntegerField(verbose_name="Снимков стека"),
+                ),
+                (
+                    "queries",
+                    models.JSONField(default=list, verbose_name="Запросы к БД"),
+                ),
+                (
+                    "profile",
+                    models.FileField(
+                        storage=recreation.storage.profile_storage,
+                        upload_to="%Y/%m/",
+                        verbose_name="Файл speedscope",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Профиль запроса",
+                "verbose_name_plural": "Профили запросов",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:29
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+COUNTERS = [f"rating_{rating}" for rating in range(1, 6)] + ["total", "rating_sum"]
+
+
+def merge_global_rows(apps, schema_editor):
+    """Сливает дубликаты общей строки (house IS NULL) в самую раннюю.
+
+    Каждый дубликат создавался с нуля и считал свою часть отзывов,
+    поэтому счётчики складываются.
+    """
+    ReviewStats = apps.get_model("recreation", "ReviewStats")
+    rows = list(ReviewStats.objects.filter(house__isnull=True).order_by("pk"))
+    if len(rows) < 2:
+        return
+    kept, duplicates = rows[0], rows[1:]
+    for row in duplicates:
+        for name in COUNTERS:
+            setattr(kept, name, getattr(kept, name) + getattr(row, name))
+        if row.last_review_at and (
+            kept.last_review_at is None or row.last_review_at > kept.last_review_at
+        ):
+            kept.last_review_at = row.last_review_at
+    kept.save()
+    ReviewStats.objects.filter(pk__in=[row.pk for row in duplicates]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recreation", "0030_requestprofile"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_global_rows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="reviewstats",
+            constraint=models.UniqueConstraint(
+                django.db.models.functions.comparison.Coalesce("house", 0),
+                condition=models.Q(("house__isnull", True)),
+                name="unique_global_review_stats",
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:38
+
+import ckeditor.fields
+from django.db import migrations
+
+# Поля description и amenities убраны из модели House без миграции.
+# Из состояния миграций они удаляются, а колонки с данными остаются и
+# становятся NULL-допустимыми: иначе вставка коттеджа (в модели их нет)
+# нарушает NOT NULL
+UNUSED_FIELDS = [
+    (model_name, name, verbose_name)
+    for model_name in ("house", "historicalhouse")
+    for name, verbose_name in (("description", "Описание"), ("amenities", "Удобства"))
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recreation", "0031_reviewstats_unique_global"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="historicalhouse",
+            options={
+                "get_latest_by": ("history_date", "history_id"),
+                "ordering": ("-history_date", "-history_id"),
+                "verbose_name": "historical house",
+                "verbose_name_plural": "historical houses",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="house",
+            options={},
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.AlterField(
+                    model_name=model_name,
+                    name=name,
+                    field=ckeditor.fields.RichTextField(
+                        blank=True, null=True, verbose_name=verbose_name
+                    ),
+                )
+                for model_name, name, verbose_name in UNUSED_FIELDS
+            ],
+            state_operations=[
+                migrations.RemoveField(model_name=model_name, name=name)
+                for model_name, name, _ in UNUSED_FIELDS
+            ],
+        ),
+    ]
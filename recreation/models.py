@@ -5,8 +5,9 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models import Count
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import Coalesce
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.html import strip_tags
@@ -14,6 +15,10 @@ from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 from simple_history.models import HistoricalRecords
 
+from .metrics import timed
+from .normalizers import SearchFieldsMixin, normalize_email, to_e164
+from .storage import profile_storage
+
 
 class Tag(models.Model):
     name = models.CharField(max_length=50, verbose_name="Название тега")
@@ -111,7 +116,12 @@ class Post(models.Model):
 
     @classmethod
     def update_post_status(cls, post_id, new_status):
-        return cls.objects.filter(id=post_id).update(status=new_status)
+        # update() не вызывает сигналы — запись в журнал изменений вручную
+        with transaction.atomic():
+            updated = cls.objects.filter(id=post_id).update(status=new_status)
+            if updated:
+                ChangeLog.record_many(cls, [post_id], "updated")
+        return updated
 
     @classmethod
     def delete_post_by_id(cls, post_id):
@@ -158,7 +168,30 @@ class PostTag(models.Model):
         return f"{self.post.title} - {self.tag.name}"
 
 
-class CustomUser(AbstractUser):
+def _search_indexes(prefix):
+    """Индексы поиска по началу строки (для PostgreSQL — varchar_pattern_ops)."""
+    return [
+        models.Index(
+            fields=[field],
+            name=f"{prefix}_{field}_idx",
+            opclasses=["varchar_pattern_ops"],
+        )
+        for field in ("search_name", "search_phone", "search_email")
+    ]
+
+
+class SearchColumns(models.Model):
+    """Нормализованные колонки для быстрого поиска (см. recreation.normalizers)."""
+
+    search_name = models.CharField(max_length=310, blank=True, editable=False)
+    search_phone = models.CharField(max_length=20, blank=True, editable=False)
+    search_email = models.CharField(max_length=255, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+
+class CustomUser(SearchFieldsMixin, SearchColumns, AbstractUser):
     phone = models.CharField(
         _("Телефон"),
         max_length=12,
@@ -170,13 +203,29 @@ class CustomUser(AbstractUser):
 
     patronymic = models.CharField(_("Отчество"), max_length=100, blank=True, null=True)
 
+    # Ключи для входа по email или телефону (EmailPhoneBackend), заполняются
+    # при сохранении; NULL — значение не задано или не является номером
+    email_normalized = models.CharField(
+        max_length=254, unique=True, null=True, blank=True, editable=False
+    )
+    phone_e164 = models.CharField(
+        max_length=16, unique=True, null=True, blank=True, editable=False
+    )
+
     REQUIRED_FIELDS = ["email", "phone", "last_name", "patronymic"]
 
+    search_source_fields = {
+        "search_name": ("last_name", "username", "patronymic"),  # username — имя
+        "search_phone": ("phone",),
+        "search_email": ("email",),
+    }
+
     class Meta:
         db_table = "recreation_customuser"
         verbose_name = _("Пользователь")
         verbose_name_plural = _("Пользователи")
         ordering = ["last_name", "username"]
+        indexes = _search_indexes("user")
 
     def __str__(self):
         return self.get_full_name() or self.username
@@ -188,6 +237,40 @@ class CustomUser(AbstractUser):
             full_name += f" {self.patronymic}"
         return full_name.strip()
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._login_origin = (
+            instance.__dict__.get("email"),
+            instance.__dict__.get("phone"),
+        )
+        return instance
+
+    def get_client_profile(self):
+        """Профиль клиента пользователя; создаётся при первом обращении.
+
+        Профиль создаётся при регистрации (старым учётным записям — командой
+        backfill_client_profiles), так что создание здесь — редкий запасной
+        путь. Результат кешируется на объекте пользователя.
+        """
+        try:
+            return self.client_profile
+        except Client.DoesNotExist:
+            client, _ = Client.objects.get_or_create(
+                user=self, defaults=Client.fields_from_user(self)
+            )
+            self.client_profile = client
+            return client
+
+    def get_search_values(self):
+        values = super().get_search_values()
+        # Ключи входа пересчитываются только при смене email/телефона: у старых
+        # дублей ключ пуст и не должен конфликтовать при обычном сохранении
+        if getattr(self, "_login_origin", None) != (self.email, self.phone):
+            values["email_normalized"] = normalize_email(self.email) or None
+            values["phone_e164"] = to_e164(self.phone)
+        return values
+
     def save(self, *args, **kwargs):
         # Если username не задан, используем email
         if not self.username:
@@ -195,7 +278,7 @@ class CustomUser(AbstractUser):
         super().save(*args, **kwargs)
 
 
-class Client(models.Model):
+class Client(SearchFieldsMixin, SearchColumns):
     client_id = models.AutoField(primary_key=True, verbose_name="ID клиента")
     user = models.OneToOneField(
         CustomUser,
@@ -218,13 +301,32 @@ class Client(models.Model):
         help_text="Загрузите сканы документов (паспорт, водительские права и т.д.)",
     )
 
+    search_source_fields = {
+        "search_name": ("last_name", "first_name", "patronymic"),
+        "search_phone": ("phone_number",),
+        "search_email": ("email",),
+    }
+
     class Meta:
         verbose_name = "Клиент"
         verbose_name_plural = "Клиенты"
+        indexes = _search_indexes("client")
 
     def __str__(self):
         return f"{self.last_name} {self.first_name} {self.patronymic}"
 
+    @staticmethod
+    def fields_from_user(user, **overrides):
+        """Поля профиля клиента, заполненные из учётной записи."""
+        return {
+            "last_name": user.last_name or "",
+            "first_name": user.username or "",  # username используется как имя
+            "patronymic": user.patronymic or "",
+            "email": user.email,
+            "phone_number": user.phone or "",
+            **overrides,
+        }
+
     def save(self, *args, **kwargs):
         # При создании нового клиента автоматически создаём пользователя
         if not self.pk and not self.user:
@@ -302,6 +404,7 @@ class House(models.Model):
     history = HistoricalRecords()  # Добавляем историю
 
     @property
+    @timed("house_image_url")
     def get_image_url(self):
         """Возвращает URL изображения коттеджа"""
         if self.image and hasattr(self.image, "url"):
@@ -322,6 +425,7 @@ class House(models.Model):
         # Возвращаем изображение по умолчанию
         return os.path.join(settings.STATIC_URL, "images/no-image.jpg")
 
+    @timed("house_image_exists")
     def image_exists(self):
         """Проверяет существование файла изображения"""
         if self.image and hasattr(self.image, "url"):
@@ -375,10 +479,24 @@ class Review(models.Model):
             .order_by("-created_at")
         )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем исходные коттедж и рейтинг для пересчёта ReviewStats,
+        # коттедж и текст — чтобы сбрасывать ReviewAnalysis только при их смене
+        loaded = instance.__dict__
+        if "house_id_id" in loaded and "rating" in loaded:
+            instance._stats_origin = (instance.house_id_id, instance.rating)
+        if "house_id_id" in loaded and "comment" in loaded:
+            instance._analysis_origin = (instance.house_id_id, instance.comment)
+        return instance
+
     def save(self, *args, **kwargs):
         # Очищаем текст от тегов перед сохранением
         self.comment = strip_tags(self.comment)
-        super().save(*args, **kwargs)
+        # Статистика отзывов обновляется в той же транзакции (post_save)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     class Meta:
         verbose_name = "Отзыв"
@@ -389,6 +507,230 @@ class Review(models.Model):
         return f"Отзыв от {self.client_id} для {self.house_id}"
 
 
+class ReviewStats(models.Model):
+    """Накопленная статистика отзывов: гистограмма оценок, сумма и дата.
+
+    Строка с пустым коттеджем хранит общую статистику по всем отзывам.
+    Обновляется инкрементально сигналами Review; ``rebuild`` пересчитывает
+    всё с нуля (команда rebuild_review_stats).
+    """
+
+    RATINGS = range(1, 6)
+
+    house = models.OneToOneField(
+        House,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="review_stats",
+        verbose_name="Коттедж",
+    )
+    rating_1 = models.PositiveIntegerField(default=0, verbose_name="Оценок 1")
+    rating_2 = models.PositiveIntegerField(default=0, verbose_name="Оценок 2")
+    rating_3 = models.PositiveIntegerField(default=0, verbose_name="Оценок 3")
+    rating_4 = models.PositiveIntegerField(default=0, verbose_name="Оценок 4")
+    rating_5 = models.PositiveIntegerField(default=0, verbose_name="Оценок 5")
+    total = models.PositiveIntegerField(default=0, verbose_name="Всего отзывов")
+    rating_sum = models.PositiveIntegerField(default=0, verbose_name="Сумма оценок")
+    last_review_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Последний отзыв"
+    )
+    updated = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
+
+    class Meta:
+        verbose_name = "Статистика отзывов"
+        verbose_name_plural = "Статистика отзывов"
+        constraints = [
+            # NULL в уникальном house не повторяется — общая строка должна
+            # быть одна, иначе её одновременное создание даст дубликаты
+            models.UniqueConstraint(
+                Coalesce("house", 0),
+                condition=Q(house__isnull=True),
+                name="unique_global_review_stats",
+            )
+        ]
+
+    def __str__(self):
+        return f"Статистика отзывов: {self.house or 'все коттеджи'}"
+
+    @property
+    def average(self):
+        return self.rating_sum / self.total if self.total else 0
+
+    @property
+    def histogram(self):
+        return {rating: getattr(self, f"rating_{rating}") for rating in self.RATINGS}
+
+    @classmethod
+    def _bucket(cls, rating):
+        return f"rating_{min(max(int(rating), 1), 5)}"
+
+    @classmethod
+    def get_global(cls):
+        return cls.objects.filter(house__isnull=True).first() or cls()
+
+    @classmethod
+    def _locked(cls, key, create=True):
+        """Строка статистики коттеджа key (None — общая) под select_for_update.
+
+        Отсутствующую строку создаёт: если её одновременно создала другая
+        транзакция, уникальное ограничение отклонит вставку, и блокируется
+        уже созданная строка.
+        """
+        queryset = cls.objects.select_for_update()
+        lookup = {"house__isnull": True} if key is None else {"house_id": key}
+        stats = queryset.filter(**lookup).first()
+        if stats is None and create:
+            try:
+                with transaction.atomic():
+                    stats = cls.objects.create(house_id=key)
+            except IntegrityError:
+                stats = queryset.get(**lookup)
+        return stats
+
+    @classmethod
+    def record(cls, house_id, rating, created_at, delta):
+        """Учитывает добавленный (delta=1) или удалённый (delta=-1) отзыв.
+
+        Строки блокируются select_for_update, поэтому параллельные отзывы
+        не теряют обновлений. Должно вызываться внутри транзакции.
+        """
+        for key in (None, house_id):
+            # Коттедж удаляется каскадно вместе со своей статистикой,
+            # поэтому при удалении отзыва строку не создаём
+            stats = cls._locked(key, create=delta > 0)
+            if stats is None:
+                continue
+
+            bucket = cls._bucket(rating)
+            setattr(stats, bucket, max(getattr(stats, bucket) + delta, 0))
+            stats.total = max(stats.total + delta, 0)
+            stats.rating_sum = max(stats.rating_sum + delta * rating, 0)
+            if delta > 0 and created_at:
+                if stats.last_review_at is None or created_at > stats.last_review_at:
+                    stats.last_review_at = created_at
+            elif delta < 0 and created_at == stats.last_review_at:
+                reviews = Review.objects.all()
+                if key is not None:
+                    reviews = reviews.filter(house_id=key)
+                stats.last_review_at = reviews.aggregate(last=Max("created_at"))[
+                    "last"
+                ]
+            stats.save()
+
+    @classmethod
+    def record_batch(cls, reviews):
+        """Учитывает пачку новых отзывов (после bulk_create): одно
+        обновление строки на коттедж и одно для общей статистики вместо
+        record на каждый отзыв. Должно вызываться внутри транзакции."""
+        groups = {None: list(reviews)}
+        for review in groups[None]:
+            groups.setdefault(review.house_id_id, []).append(review)
+        house_ids = [key for key in groups if key is not None]
+        existing = {
+            stats.house_id: stats
+            for stats in cls.objects.select_for_update().filter(
+                Q(house__isnull=True) | Q(house_id__in=house_ids)
+            )
+        }
+        for key, items in groups.items():
+            stats = existing.get(key) or cls._locked(key)
+            for review in items:
+                bucket = cls._bucket(review.rating)
+                setattr(stats, bucket, getattr(stats, bucket) + 1)
+            stats.total += len(items)
+            stats.rating_sum += sum(review.rating for review in items)
+            latest = max(review.created_at for review in items)
+            if stats.last_review_at is None or latest > stats.last_review_at:
+                stats.last_review_at = latest
+            stats.save()
+
+    @classmethod
+    def rebuild(cls):
+        """Полностью пересчитывает статистику по таблице отзывов."""
+        aggregates = {
+            f"rating_{rating}": Count("review_id", filter=Q(rating=rating))
+            for rating in cls.RATINGS
+        }
+        # Оценки вне диапазона 1–5 попадают в крайние столбцы гистограммы
+        aggregates["rating_1"] = Count("review_id", filter=Q(rating__lte=1))
+        aggregates["rating_5"] = Count("review_id", filter=Q(rating__gte=5))
+        aggregates.update(
+            total=Count("review_id"),
+            rating_sum=Sum("rating"),
+            last_review_at=Max("created_at"),
+        )
+
+        rows = [
+            cls(house_id=row.pop("house_id"), **row)
+            for row in Review.objects.values("house_id")
+            .order_by()
+            .annotate(**aggregates)
+        ]
+        rows.append(cls(house_id=None, **Review.objects.aggregate(**aggregates)))
+        for row in rows:
+            row.rating_sum = row.rating_sum or 0
+
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(rows)
+        return len(rows) - 1
+
+
+class ReviewAnalysis(models.Model):
+    """Результат разбора текста отзыва (команда analyze_reviews)."""
+
+    review = models.OneToOneField(
+        Review,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="analysis",
+        verbose_name="Отзыв",
+    )
+    house = models.ForeignKey(
+        House,
+        on_delete=models.CASCADE,
+        related_name="review_analyses",
+        verbose_name="Коттедж",
+    )
+    sentiment = models.FloatField(verbose_name="Тональность")
+    token_count = models.PositiveIntegerField(verbose_name="Число слов")
+    keywords = models.JSONField(default=dict, verbose_name="Ключевые слова")
+    analyzed_at = models.DateTimeField(auto_now=True, verbose_name="Дата анализа")
+
+    class Meta:
+        verbose_name = "Анализ отзыва"
+        verbose_name_plural = "Анализ отзывов"
+
+    def __str__(self):
+        return f"Анализ отзыва {self.review_id}"
+
+
+class HouseReviewInsights(models.Model):
+    """Сводка анализа отзывов по коттеджу: облако слов и средняя тональность."""
+
+    house = models.OneToOneField(
+        House,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="review_insights",
+        verbose_name="Коттедж",
+    )
+    keywords = models.JSONField(default=dict, verbose_name="Облако слов")
+    avg_sentiment = models.FloatField(default=0, verbose_name="Средняя тональность")
+    reviews_analyzed = models.PositiveIntegerField(
+        default=0, verbose_name="Проанализировано отзывов"
+    )
+    updated = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
+
+    class Meta:
+        verbose_name = "Сводка по отзывам"
+        verbose_name_plural = "Сводки по отзывам"
+
+    def __str__(self):
+        return f"Сводка по отзывам: {self.house}"
+
+
 class Service(models.Model):
     SERVICE_TYPES = [
         ("entertainment", "Развлечения"),
@@ -406,10 +748,22 @@ class Service(models.Model):
     type = models.CharField(
         max_length=20, choices=SERVICE_TYPES, verbose_name="Тип услуги"
     )
+    # Увеличивается при каждом сохранении; используется как ETag в API услуг
+    version = models.PositiveIntegerField(
+        default=1, editable=False, verbose_name="Версия"
+    )
 
     def get_absolute_url(self):
         return f"/services/{self.pk}/"
 
+    def save(self, *args, **kwargs):
+        if self.pk:
+            self.version += 1
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "version"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
 
@@ -490,6 +844,16 @@ class Booking(models.Model):
     comment = RichTextField(verbose_name="Комментарий", blank=True, null=True)
     history = HistoricalRecords(excluded_fields=["total_cost"])  # Исключаем поле
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Исходные даты нужны, чтобы пометить для пересчёта и старый период
+        instance._analytics_origin = tuple(
+            instance.__dict__.get(name)
+            for name in ("check_in_date", "check_out_date", "created_at")
+        )
+        return instance
+
     @property
     def nights(self):
         return (self.check_out_date - self.check_in_date).days
@@ -567,6 +931,12 @@ class Payment(models.Model):
     payment_date = models.DateField(verbose_name="Дата платежа")
     payment_method = models.CharField(max_length=50, verbose_name="Способ оплаты")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._analytics_origin = instance.__dict__.get("payment_date")
+        return instance
+
     class Meta:
         verbose_name = "Платеж"
         verbose_name_plural = "Платежи"
@@ -575,6 +945,219 @@ class Payment(models.Model):
         return f"Платеж {self.payment_id} для бронирования {self.booking.booking_id}"
 
 
+class HouseDailyStats(models.Model):
+    """Дневной снимок загрузки и выручки коттеджа (см. recreation.analytics)."""
+
+    house = models.ForeignKey(
+        House,
+        on_delete=models.CASCADE,
+        related_name="daily_stats",
+        verbose_name="Коттедж",
+    )
+    date = models.DateField(verbose_name="Дата")
+    nights_sold = models.PositiveSmallIntegerField(
+        default=0, verbose_name="Продано ночей"
+    )
+    room_revenue = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, verbose_name="Выручка за проживание"
+    )
+    service_revenue = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, verbose_name="Выручка за услуги"
+    )
+    payments = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, verbose_name="Поступления"
+    )
+    bookings_started = models.PositiveIntegerField(
+        default=0, verbose_name="Заездов"
+    )
+
+    class Meta:
+        verbose_name = "Дневная статистика коттеджа"
+        verbose_name_plural = "Дневная статистика коттеджей"
+        ordering = ["date", "house"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["house", "date"], name="unique_house_daily_stats"
+            )
+        ]
+        indexes = [models.Index(fields=["date"])]
+
+    def __str__(self):
+        return f"{self.house} — {self.date}"
+
+
+class DailyKpiSnapshot(models.Model):
+    """Сводные показатели базы отдыха за день для панели администратора."""
+
+    date = models.DateField(unique=True, verbose_name="Дата")
+    bookings_created = models.PositiveIntegerField(
+        default=0, verbose_name="Новых бронирований"
+    )
+    bookings_value = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, verbose_name="Сумма бронирований"
+    )
+    nights_available = models.PositiveIntegerField(
+        default=0, verbose_name="Доступно ночей"
+    )
+    nights_sold = models.PositiveIntegerField(default=0, verbose_name="Продано ночей")
+    room_revenue = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, verbose_name="Выручка за проживание"
+    )
+    service_revenue = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, verbose_name="Выручка за услуги"
+    )
+    payments = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, verbose_name="Поступления"
+    )
+    reviews = models.PositiveIntegerField(default=0, verbose_name="Отзывов")
+    rating_sum = models.PositiveIntegerField(default=0, verbose_name="Сумма оценок")
+    updated = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
+
+    class Meta:
+        verbose_name = "Панель показателей"
+        verbose_name_plural = "Панель показателей"
+        ordering = ["-date"]
+
+    def __str__(self):
+        return f"Показатели за {self.date}"
+
+    @property
+    def occupancy(self):
+        return self.nights_sold / self.nights_available if self.nights_available else 0
+
+    @property
+    def average_rating(self):
+        return self.rating_sum / self.reviews if self.reviews else 0
+
+
+class AnalyticsDirtyDate(models.Model):
+    """Дата, снимки которой устарели из-за изменения бронирований или платежей."""
+
+    date = models.DateField(primary_key=True, verbose_name="Дата")
+
+    class Meta:
+        verbose_name = "Дата для пересчёта"
+        verbose_name_plural = "Даты для пересчёта"
+
+    def __str__(self):
+        return str(self.date)
+
+
+class ChangeLog(models.Model):
+    """Запись журнала изменений для инкрементальной синхронизации API.
+
+    id служит курсором: клиент запрашивает изменения с id больше последнего
+    полученного (/api/changes/?cursor=). Коттеджи попадают в журнал из
+    истории simple_history, отзывы, услуги и посты — из сигналов
+    сохранения и удаления (см. signals.py), пакетный импорт пишет записи
+    сам через ``record_many``.
+
+    Записи вставляются после коммита транзакции изменения, каждая пачка —
+    отдельной короткой транзакцией: id и changed_at выдаются в момент
+    коммита, а не в начале долгой транзакции (bulk_response, restore).
+    Поэтому задержки CHANGE_FEED_SETTLE_SECONDS достаточно, чтобы курсор
+    ленты не обогнал ещё не видимые записи.
+    """
+
+    RECORD_BATCH_SIZE = 1000
+
+    ACTIONS = [
+        ("created", "Создан"),
+        ("updated", "Изменён"),
+        ("deleted", "Удалён"),
+    ]
+    # Модель → имя в журнале и в ответе API
+    MODELS = {"House": "house", "Review": "review", "Service": "service", "Post": "post"}
+
+    id = models.BigAutoField(primary_key=True)
+    model = models.CharField(max_length=20, verbose_name="Модель")
+    object_id = models.PositiveBigIntegerField(verbose_name="ID объекта")
+    action = models.CharField(max_length=10, choices=ACTIONS, verbose_name="Действие")
+    changed_at = models.DateTimeField(
+        default=timezone.now, db_index=True, verbose_name="Время изменения"
+    )
+
+    class Meta:
+        verbose_name = "Изменение"
+        verbose_name_plural = "Журнал изменений"
+        ordering = ["id"]
+        indexes = [models.Index(fields=["model", "id"])]
+
+    def __str__(self):
+        return f"#{self.pk} {self.model} {self.object_id}: {self.action}"
+
+    @classmethod
+    def record(cls, instance, action):
+        """Запись об изменении объекта после коммита (вне транзакции — сразу)."""
+        cls.record_many(type(instance), [instance.pk], action)
+
+    @classmethod
+    def record_many(cls, model, object_ids, action):
+        """Записи для пачки объектов одной модели (после bulk_create/update)."""
+        name = cls.MODELS[model.__name__]
+        object_ids = list(object_ids)
+
+        def insert():
+            for start in range(0, len(object_ids), cls.RECORD_BATCH_SIZE):
+                now = timezone.now()
+                cls.objects.bulk_create(
+                    cls(model=name, object_id=object_id, action=action, changed_at=now)
+                    for object_id in object_ids[start : start + cls.RECORD_BATCH_SIZE]
+                )
+
+        transaction.on_commit(insert)
+
+
+class RequestProfile(models.Model):
+    """Профиль одного запроса (см. recreation.profiling).
+
+    Стеки хранятся файлом в формате speedscope в PROFILE_ROOT, запросы
+    к БД с местом вызова — в ``queries``.
+    """
+
+    TRIGGERS = [
+        ("staff", "Флаг персонала"),
+        ("header", "Подписанный заголовок"),
+        ("sampled", "Выборка 1 из N"),
+    ]
+
+    created_at = models.DateTimeField(
+        default=timezone.now, db_index=True, verbose_name="Время запроса"
+    )
+    method = models.CharField(max_length=10, verbose_name="Метод")
+    path = models.CharField(max_length=500, verbose_name="Путь")
+    view_name = models.CharField(
+        max_length=200, blank=True, db_index=True, verbose_name="Представление"
+    )
+    status_code = models.PositiveSmallIntegerField(verbose_name="Статус")
+    trigger = models.CharField(
+        max_length=10, choices=TRIGGERS, verbose_name="Причина профилирования"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name="Пользователь",
+    )
+    duration_ms = models.FloatField(verbose_name="Время, мс")
+    db_ms = models.FloatField(verbose_name="Время в БД, мс")
+    query_count = models.PositiveIntegerField(verbose_name="Запросов к БД")
+    sample_count = models.PositiveIntegerField(verbose_name="Снимков стека")
+    queries = models.JSONField(default=list, verbose_name="Запросы к БД")
+    profile = models.FileField(
+        storage=profile_storage, upload_to="%Y/%m/", verbose_name="Файл speedscope"
+    )
+
+    class Meta:
+        verbose_name = "Профиль запроса"
+        verbose_name_plural = "Профили запросов"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} мс)"
+
+
 User = get_user_model()
 
 
@@ -0,0 +1,128 @@
+"""Нормализация ФИО, телефонов и email для поиска и входа.
+
+Поисковые колонки (``search_name``, ``search_phone``, ``search_email``)
+заполняются при сохранении клиента или пользователя и ищутся по началу
+строки: такой поиск обслуживается обычным B-tree индексом, в отличие от
+``icontains`` по нескольким полям, который читает всю таблицу. Поиск
+по имени или части ФИО (``contains=True`` в search_q, так ищет админка)
+читает таблицу, но только одну нормализованную колонку.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+_SPACES_RE = re.compile(r"\s+")
+_NON_DIGITS_RE = re.compile(r"\D")
+
+MIN_PHONE_DIGITS = 3
+
+
+def normalize_text(value):
+    """Нижний регистр, ё → е, одиночные пробелы."""
+    return _SPACES_RE.sub(" ", str(value or "")).strip().lower().replace("ё", "е")
+
+
+def normalize_phone(value):
+    """Только цифры; российский номер 8XXXXXXXXXX приводится к 7XXXXXXXXXX."""
+    digits = _NON_DIGITS_RE.sub("", str(value or ""))
+    if len(digits) == 11 and digits.startswith("8"):
+        digits = "7" + digits[1:]
+    return digits
+
+
+def normalize_email(value):
+    return str(value or "").strip().lower()
+
+
+def to_e164(value):
+    """Телефон в формате E.164 (+79991234567) или None, если это не номер.
+
+    Десятизначный номер считается российским без кода страны; номер-заглушка
+    из одних нулей (+70000000000 по умолчанию у пользователя) даёт None.
+    """
+    digits = normalize_phone(value)
+    if len(digits) == 10:
+        digits = "7" + digits
+    if not 11 <= len(digits) <= 15 or not digits[1:].strip("0"):
+        return None
+    return "+" + digits
+
+
+def full_name(*parts):
+    return normalize_text(" ".join(part for part in parts if part))
+
+
+def prefix_q(field, value, using="default"):
+    """Условие «начинается с value», которое использует индекс.
+
+    В SQLite LIKE без COLLATE NOCASE не использует индекс, поэтому там
+    префикс выражается диапазоном (значения уже в нижнем регистре).
+    """
+    if connections[using].vendor == "sqlite":
+        return Q(**{f"{field}__gte": value, f"{field}__lt": value + "\uffff"})
+    return Q(**{f"{field}__startswith": value})
+
+
+def search_q(query, using="default", contains=False):
+    """Условие поиска по началу ФИО, email или телефона (None — пустой запрос).
+
+    contains=True добавляет поиск подстроки в ФИО (имя, отчество, часть
+    фамилии); индекс он не использует.
+    """
+    text = normalize_text(query)
+    if not text:
+        return None
+    condition = prefix_q("search_name", text, using) | prefix_q(
+        "search_email", text, using
+    )
+    if contains:
+        condition |= Q(search_name__contains=text)
+    digits = normalize_phone(text)
+    if digits.startswith("8"):  # начало номера вида 8 999 ...
+        digits = "7" + digits[1:]
+    if len(digits) >= MIN_PHONE_DIGITS:
+        condition |= prefix_q("search_phone", digits, using)
+    return condition
+
+
+class SearchFieldsMixin:
+    """Поддерживает поисковые колонки модели при сохранении.
+
+    ``search_source_fields`` — {поисковая колонка: поля модели}; значение
+    колонки — нормализатор из ``search_normalizers``, применённый к этим
+    полям. ``get_search_values`` переопределяют модели с особыми колонками.
+    Изменение любого из полей при save(update_fields=...) обновляет и
+    поисковые колонки.
+    """
+
+    search_source_fields = {}
+    search_normalizers = {
+        "search_name": full_name,
+        "search_phone": normalize_phone,
+        "search_email": normalize_email,
+    }
+
+    def get_search_values(self):
+        """{поисковая колонка: значение}."""
+        return {
+            column: self.search_normalizers[column](
+                *(getattr(self, field) for field in fields)
+            )
+            for column, fields in self.search_source_fields.items()
+        }
+
+    def update_search_fields(self):
+        for name, value in self.get_search_values().items():
+            setattr(self, name, value)
+
+    def save(self, *args, **kwargs):
+        self.update_search_fields()
+        update_fields = kwargs.get("update_fields")
+        sources = {
+            field for fields in self.search_source_fields.values() for field in fields
+        }
+        if update_fields is not None and sources.intersection(update_fields):
+            kwargs["update_fields"] = {*update_fields, *self.get_search_values()}
+        super().save(*args, **kwargs)
@@ -0,0 +1,290 @@
+"""Профилирование отдельных запросов в рабочей среде.
+
+ProfilingMiddleware включает профилирование для одного запроса:
+
+* персоналу — параметром ``?_profile=1``;
+* по заголовку ``X-Profile-Token`` с подписанным токеном
+  (``manage.py profile_token``, действует PROFILE_TOKEN_MAX_AGE секунд);
+* для каждого N-го запроса в среднем, если задан PROFILE_SAMPLE_EVERY.
+
+Пока запрос выполняется, отдельный поток раз в PROFILE_INTERVAL секунд
+снимает стек потока запроса (``sys._current_frames``). Каждый снимок
+весит столько, сколько прошло с предыдущего, поэтому время распределяется
+верно, даже если поток запроса держит GIL дольше интервала. Запросы
+к БД записываются с местом вызова в коде проекта.
+
+Результат — файл speedscope (https://www.speedscope.app) в PROFILE_ROOT
+и запись RequestProfile; профили смотрят и скачивают (также в формате
+collapsed stacks для flamegraph.pl) в админке. В ответ добавляется
+заголовок ``X-Profile-Id``. Остальные запросы не профилируются и почти
+ничего не платят.
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.db import connections
+
+from .metrics import view_label
+from .models import RequestProfile
+
+FLAG = "_profile"
+HEADER = "X-Profile-Token"
+TOKEN_SALT = "recreation.profiling"
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+MAX_QUERIES = 1000  # сколько запросов к БД сохранять с текстом
+MAX_SQL_LENGTH = 2000
+
+_PROJECT_DIRS = tuple(
+    str(Path(settings.BASE_DIR) / name) for name in ("recreation", "base_relaction")
+)
+# Обёртки execute (метрики и этот модуль) — не место вызова
+_SKIP_FILES = (__file__, str(Path(__file__).with_name("metrics.py")))
+
+
+def _qualname(code):
+    # co_qualname (Класс.метод) появился в Python 3.11
+    return getattr(code, "co_qualname", code.co_name)
+
+
+def make_token():
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign("profile")
+
+
+def valid_token(token):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=settings.PROFILE_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def profile_trigger(request):
+    """Причина профилировать запрос (см. RequestProfile.TRIGGERS) или None."""
+    if FLAG in request.GET and request.user.is_staff:
+        return "staff"
+    token = request.headers.get(HEADER)
+    if token and valid_token(token):
+        return "header"
+    every = settings.PROFILE_SAMPLE_EVERY
+    if every and random.randrange(every) == 0:
+        return "sampled"
+    return None
+
+
+class StackSampler:
+    """Снимает стек одного потока из отдельного потока-сэмплера.
+
+    Пока работает хотя бы один сэмплер, интервал переключения GIL
+    (sys.setswitchinterval, по умолчанию 5 мс) уменьшается до интервала
+    снимков, иначе поток запроса не отдаёт GIL сэмплеру чаще.
+    """
+
+    _lock = threading.Lock()
+    _active = 0
+    _switch_interval = None
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = {}  # кортеж кадров от корня → суммарный вес, секунды
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        with StackSampler._lock:
+            if not StackSampler._active:
+                StackSampler._switch_interval = sys.getswitchinterval()
+                sys.setswitchinterval(min(self.interval, self._switch_interval))
+            StackSampler._active += 1
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        with StackSampler._lock:
+            StackSampler._active -= 1
+            if not StackSampler._active:
+                sys.setswitchinterval(StackSampler._switch_interval)
+
+    def _run(self):
+        previous = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if self._stop.is_set():
+                break  # поток запроса уже ждёт завершения сэмплера
+            now = time.perf_counter()
+            weight, previous = now - previous, now
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((_qualname(code), code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                key = tuple(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0.0) + weight
+                self.samples += 1
+
+
+def call_site():
+    """Ближайший к запросу к БД кадр из кода проекта: ``файл:строка в функции``."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_PROJECT_DIRS) and filename not in _SKIP_FILES:
+            relative = Path(filename).relative_to(settings.BASE_DIR)
+            return f"{relative}:{frame.f_lineno} in {_qualname(frame.f_code)}"
+        frame = frame.f_back
+    return ""
+
+
+class SQLRecorder:
+    """Обёртка execute: текст запроса (без параметров), время и место вызова."""
+
+    def __init__(self):
+        self.queries = []
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            if len(self.queries) < MAX_QUERIES:
+                self.queries.append(
+                    {
+                        "sql": sql[:MAX_SQL_LENGTH],
+                        "ms": round(elapsed * 1000, 3),
+                        "site": call_site(),
+                        "alias": context["connection"].alias,
+                    }
+                )
+
+    def install(self):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+
+def speedscope(stacks, name):
+    """Профиль в формате speedscope (sampled, веса в миллисекундах)."""
+    frames, index = [], {}
+    samples, weights = [], []
+    for stack, seconds in stacks.items():
+        sample = []
+        for frame in stack:
+            if frame not in index:
+                index[frame] = len(frames)
+                function, filename, line = frame
+                frames.append({"name": function, "file": filename, "line": line})
+            sample.append(index[frame])
+        samples.append(sample)
+        weights.append(round(seconds * 1000, 3))
+    return {
+        "$schema": SPEEDSCOPE_SCHEMA,
+        "name": name,
+        "exporter": "recreation.profiling",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 3),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+    }
+
+
+def _frame_label(frame):
+    label = f"{frame['name']} ({Path(frame['file']).name}:{frame['line']})"
+    return label.replace(";", ":")
+
+
+def collapsed(document):
+    """Профиль speedscope в формате collapsed stacks (веса в микросекундах)."""
+    frames = document["shared"]["frames"]
+    profile = document["profiles"][0]
+    lines = []
+    for sample, weight in zip(profile["samples"], profile["weights"]):
+        stack = ";".join(_frame_label(frames[index]) for index in sample)
+        lines.append(f"{stack} {round(weight * 1000)}")
+    return "\n".join(lines) + "\n"
+
+
+def top_functions(document, limit=15):
+    """Функции с наибольшим собственным временем: [(кадр, мс)]."""
+    frames = document["shared"]["frames"]
+    profile = document["profiles"][0]
+    own = {}
+    for sample, weight in zip(profile["samples"], profile["weights"]):
+        if sample:
+            own[sample[-1]] = own.get(sample[-1], 0.0) + weight
+    ranked = sorted(own.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [(_frame_label(frames[index]), round(ms, 2)) for index, ms in ranked]
+
+
+def queries_by_site(queries):
+    """Запросы к БД по месту вызова: [(место, число, мс)] по убыванию времени."""
+    sites = {}
+    for query in queries:
+        count, ms = sites.get(query["site"], (0, 0.0))
+        sites[query["site"]] = (count + 1, ms + query["ms"])
+    return sorted(
+        ((site, count, round(ms, 2)) for site, (count, ms) in sites.items()),
+        key=lambda row: row[2],
+        reverse=True,
+    )
+
+
+def save_profile(request, response, trigger, sampler, recorder, duration):
+    name = f"{request.method} {request.get_full_path()}"
+    document = speedscope(sampler.stacks, name)
+    profile = RequestProfile(
+        method=request.method,
+        path=request.get_full_path()[:500],
+        view_name=view_label(request)[:200],
+        status_code=response.status_code,
+        trigger=trigger,
+        user=request.user if request.user.is_authenticated else None,
+        duration_ms=round(duration * 1000, 2),
+        db_ms=round(recorder.seconds * 1000, 2),
+        query_count=recorder.count,
+        sample_count=sampler.samples,
+        queries=recorder.queries,
+    )
+    profile.profile.save(
+        f"{time.strftime('%Y%m%d-%H%M%S')}.speedscope.json",
+        ContentFile(json.dumps(document).encode()),
+        save=False,
+    )
+    profile.save()
+    prune(settings.PROFILE_KEEP)
+    return profile
+
+
+def prune(keep):
+    """Оставляет keep последних профилей (файлы удаляет сигнал post_delete)."""
+    stale = RequestProfile.objects.order_by("-created_at", "-pk")[keep:]
+    for profile in stale:
+        profile.delete()
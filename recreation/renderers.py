@@ -0,0 +1,94 @@
+"""Быстрая сериализация JSON для API и AJAX-ответов.
+
+Если установлен orjson (кодировщик на Rust), ответы кодируются и разбираются
+им: это в несколько раз быстрее модуля json и сразу даёт байты в UTF-8.
+Даты и время orjson кодирует сам, остальные типы (Decimal, ленивые строки,
+QuerySet) передаются тому же кодировщику, что и раньше, поэтому ответ
+не меняется. Без orjson и при ``FAST_JSON = False`` используются
+стандартные JSONRenderer/JSONParser DRF и JsonResponse Django.
+"""
+
+import codecs
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson не обязателен: без него работает модуль json
+    orjson = None
+
+# Символы, которые JSONRenderer экранирует для безопасной вставки в <script>
+_LINE_SEPARATORS = ((b"\xe2\x80\xa8", b"\\u2028"), (b"\xe2\x80\xa9", b"\\u2029"))
+
+
+def fast_json_enabled():
+    return orjson is not None and getattr(settings, "FAST_JSON", True)
+
+
+def dumps(data, default=JSONEncoder().default, option=0):
+    """Компактный JSON в байтах (UTF-8); ``default`` — для типов, которых
+    orjson не знает (по умолчанию как в DRF)."""
+    content = orjson.dumps(
+        data,
+        default=default,
+        option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | option,
+    )
+    for raw, escaped in _LINE_SEPARATORS:
+        if raw in content:
+            content = content.replace(raw, escaped)
+    return content
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson; с отступами (например, ?indent в Accept)
+    и без orjson работает как обычный JSONRenderer."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if not fast_json_enabled() or self.get_indent(
+            accepted_media_type, renderer_context
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data, default=self.encoder_class().default)
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser на orjson; тело не в UTF-8 разбирается стандартно."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if not fast_json_enabled() or codecs.lookup(encoding).name != "utf-8":
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+def json_response(data, encoder=DjangoJSONEncoder, safe=True, **kwargs):
+    """Замена JsonResponse: тот же ответ, но кодирование через orjson.
+
+    datetime тоже передаётся DjangoJSONEncoder (он округляет время до
+    миллисекунд), чтобы формат ответа не зависел от наличия orjson.
+    """
+    if not fast_json_enabled():
+        return JsonResponse(data, encoder=encoder, safe=safe, **kwargs)
+    if safe and not isinstance(data, dict):
+        raise TypeError(
+            "In order to allow non-dict objects to be serialized set the "
+            "safe parameter to False."
+        )
+    kwargs.setdefault("content_type", "application/json")
+    content = dumps(
+        data, default=encoder().default, option=orjson.OPT_PASSTHROUGH_DATETIME
+    )
+    return HttpResponse(content, **kwargs)
@@ -1,6 +1,17 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.functional import cached_property
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
 
-from .models import Booking, House, Review
+from .models import Booking, Client, House, Post, Review, ReviewStats, Service
+
+# Поля, у которых to_representation не меняет значение из БД
+_PLAIN_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+)
 
 
 class HouseSerializer(serializers.ModelSerializer):
@@ -25,3 +36,181 @@ class ReviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = ["review_id", "house_id", "client_id", "rating", "comment"]
+
+
+class ReviewStatsSerializer(serializers.ModelSerializer):
+    average = serializers.FloatField(read_only=True)
+    histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+
+    class Meta:
+        model = ReviewStats
+        fields = ["house", "total", "average", "histogram", "last_review_at"]
+
+
+class ClientSerializer(serializers.ModelSerializer):
+    """Клиент в ответах API (для ?expand=client): только то, что видно
+    на сайте рядом с отзывом."""
+
+    class Meta:
+        model = Client
+        fields = ["client_id", "last_name", "first_name"]
+
+
+class ServiceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Service
+        fields = ["service_id", "name", "type", "price", "quantity", "is_active"]
+
+
+class PostSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Post
+        fields = ["id", "title", "slug", "publish", "updated"]
+
+
+def _reject_unknown(param, names, what="поля"):
+    raise ValidationError({param: [f"Неизвестные {what}: {', '.join(sorted(names))}"]})
+
+
+class ValuesReader:
+    """Чтение списков без ModelSerializer: строки берутся из
+    ``values_list()`` и превращаются в словари тем же набором полей.
+
+    Колонки и преобразования вычисляются один раз по полям сериализатора:
+    простые значения (числа, строки, первичные ключи связей) переносятся
+    как есть, для дат и Decimal вызывается ``to_representation`` поля
+    DRF, поэтому ответ совпадает с ответом ModelSerializer. Поддерживаются
+    только поля модели и связи по первичному ключу; запись по-прежнему идёт
+    через ModelSerializer с проверкой данных.
+
+    ``expandable`` — связи, которые можно вложить в ответ (?expand=):
+    имя → (lookup внешнего ключа, ValuesReader связанной модели). Их поля
+    выбираются тем же запросом через JOIN.
+    """
+
+    def __init__(self, serializer_class, expandable=None, columns=None):
+        self.serializer_class = serializer_class
+        self.expandable = expandable or {}
+        if columns is not None:
+            self.__dict__["columns"] = columns
+
+    @cached_property
+    def columns(self):
+        """[(путь ключа в ответе, lookup в БД, преобразование или None)]"""
+        columns = []
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if field.source == "*" or "." in field.source:
+                raise ImproperlyConfigured(
+                    f"{self.serializer_class.__name__}.{name}: ValuesReader "
+                    "поддерживает только поля модели"
+                )
+            plain = isinstance(field, _PLAIN_FIELDS) or (
+                isinstance(field, serializers.PrimaryKeyRelatedField)
+                and field.pk_field is None
+            )
+            transform = None if plain else field.to_representation
+            columns.append(((name,), field.source, transform))
+        return columns
+
+    @property
+    def field_names(self):
+        return {path[0] for path, _, _ in self.columns}
+
+    def shape(self, fields=None, expand=()):
+        """Reader с частью полей и вложенными связями.
+
+        ``fields`` — имена полей ответа (None — все); «связь.поле» выбирает
+        поле вложенного объекта, а упоминание связи в fields раскрывает её
+        так же, как ``expand``. Неизвестные имена — ValidationError (400).
+        """
+        expand = list(expand)
+        nested = {}
+        names = self.field_names
+        top = names if fields is None else set()
+        for name in fields or ():
+            relation, dot, subfield = name.partition(".")
+            if relation in self.expandable:
+                expand.append(relation)
+                if dot:
+                    if subfield not in self.expandable[relation][1].field_names:
+                        _reject_unknown("fields", [name])
+                    nested.setdefault(relation, set()).add(subfield)
+                else:
+                    nested[relation] = None
+            elif name in names:
+                top.add(name)
+            else:
+                _reject_unknown("fields", [name])
+        unknown = set(expand) - set(self.expandable)
+        if unknown:
+            _reject_unknown("expand", unknown, what="связи")
+
+        columns = [column for column in self.columns if column[0][0] in top]
+        for relation in dict.fromkeys(expand):
+            lookup, reader = self.expandable[relation]
+            subfields = nested.get(relation)
+            for path, sublookup, transform in reader.shape(subfields).columns:
+                columns.append(((relation, *path), f"{lookup}__{sublookup}", transform))
+        return ValuesReader(self.serializer_class, columns=columns)
+
+    def values(self, queryset):
+        """queryset кортежей значений в порядке columns."""
+        return queryset.values_list(*(lookup for _, lookup, _ in self.columns))
+
+    def to_dicts(self, rows):
+        paths = [path for path, _, _ in self.columns]
+        transforms = [
+            (index, transform)
+            for index, (_, _, transform) in enumerate(self.columns)
+            if transform is not None
+        ]
+        if transforms:
+            rows = (self._transform(row, transforms) for row in rows)
+        if all(len(path) == 1 for path in paths):
+            keys = [path[0] for path in paths]
+            return [dict(zip(keys, row)) for row in rows]
+
+        relations = {path[0] for path in paths if len(path) > 1}
+        result = []
+        for row in rows:
+            item = {}
+            for path, value in zip(paths, row):
+                node = item
+                for key in path[:-1]:
+                    node = node.setdefault(key, {})
+                node[path[-1]] = value
+            for relation in relations:
+                # Пустой внешний ключ — null вместо объекта из одних null
+                if all(value is None for value in item[relation].values()):
+                    item[relation] = None
+            result.append(item)
+        return result
+
+    @staticmethod
+    def _transform(row, transforms):
+        row = list(row)
+        for index, transform in transforms:
+            if row[index] is not None:
+                row[index] = transform(row[index])
+        return row
+
+    def read(self, queryset):
+        return self.to_dicts(self.values(queryset))
+
+
+house_reader = ValuesReader(HouseSerializer)
+client_reader = ValuesReader(ClientSerializer)
+service_reader = ValuesReader(ServiceSerializer)
+post_reader = ValuesReader(PostSerializer)
+booking_reader = ValuesReader(
+    BookingSerializer, expandable={"house": ("house", house_reader)}
+)
+review_reader = ValuesReader(
+    ReviewSerializer,
+    expandable={
+        "house": ("house_id", house_reader),
+        "client": ("client_id", client_reader),
+    },
+)
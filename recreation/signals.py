@@ -0,0 +1,170 @@
+from django.contrib.auth.signals import user_logged_in, user_login_failed
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from simple_history.signals import post_create_historical_record
+
+from .analytics import mark_dirty
+from .events import BOOKING_CANCELLED, BOOKING_CREATED, booking_event, publish_on_commit
+from .hashers import record_event
+from .models import (
+    Booking,
+    ChangeLog,
+    House,
+    Payment,
+    Post,
+    RequestProfile,
+    Review,
+    ReviewAnalysis,
+    ReviewStats,
+    Service,
+)
+from .throttling import login_throttle
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_origin(sender, instance, **kwargs):
+    """Подгружает исходные значения, если объект создан не из базы."""
+    if not instance.pk or (
+        hasattr(instance, "_stats_origin") and hasattr(instance, "_analysis_origin")
+    ):
+        return
+    origin = (
+        Review.objects.filter(pk=instance.pk)
+        .values_list("house_id", "rating", "comment")
+        .first()
+    )
+    if not hasattr(instance, "_stats_origin"):
+        instance._stats_origin = origin and origin[:2]
+    if not hasattr(instance, "_analysis_origin"):
+        instance._analysis_origin = origin and (origin[0], origin[2])
+
+
+@receiver(post_save, sender=Review)
+def update_review_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    analyzed = (instance.house_id_id, instance.comment)
+    if not created and getattr(instance, "_analysis_origin", None) != analyzed:
+        # Текст или коттедж изменились — анализ пересчитает analyze_reviews
+        ReviewAnalysis.objects.filter(review_id=instance.pk).delete()
+    instance._analysis_origin = analyzed
+    origin = None if created else getattr(instance, "_stats_origin", None)
+    current = (instance.house_id_id, instance.rating)
+    if origin == current:
+        return
+    if origin and origin[0] is not None:
+        ReviewStats.record(origin[0], origin[1], instance.created_at, -1)
+    ReviewStats.record(current[0], current[1], instance.created_at, 1)
+    instance._stats_origin = current
+
+
+@receiver(post_delete, sender=Review)
+def update_review_stats_on_delete(sender, instance, **kwargs):
+    ReviewStats.record(instance.house_id_id, instance.rating, instance.created_at, -1)
+
+
+# Пометка дат для инкрементального пересчёта аналитики (rebuild_dirty)
+
+
+def _mark_booking_dates(check_in, check_out, created_at):
+    if check_in and check_out:
+        mark_dirty(created_at, check_in, start=check_in, end=check_out)
+    else:
+        mark_dirty(created_at)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def mark_booking_dirty(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    origin = getattr(instance, "_analytics_origin", None)
+    current = (instance.check_in_date, instance.check_out_date, instance.created_at)
+    if origin and origin != current:
+        _mark_booking_dates(*origin)
+    _mark_booking_dates(*current)
+    instance._analytics_origin = current
+
+
+@receiver(m2m_changed, sender=Booking.services.through)
+def mark_booking_services_dirty(sender, instance, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear") and isinstance(
+        instance, Booking
+    ):
+        mark_dirty(instance.check_in_date)
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def mark_payment_dirty(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    mark_dirty(getattr(instance, "_analytics_origin", None), instance.payment_date)
+    instance._analytics_origin = instance.payment_date
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def mark_review_dirty(sender, instance, raw=False, **kwargs):
+    if not raw:
+        mark_dirty(instance.created_at)
+
+
+# Журнал изменений для /api/changes/
+
+HISTORY_ACTIONS = {"+": "created", "~": "updated", "-": "deleted"}
+
+
+@receiver(post_create_historical_record, sender=House.history.model)
+def log_house_change(sender, instance, history_instance, **kwargs):
+    ChangeLog.record(instance, HISTORY_ACTIONS[history_instance.history_type])
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=Post)
+def log_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        ChangeLog.record(instance, "created" if created else "updated")
+
+
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Service)
+@receiver(post_delete, sender=Post)
+def log_deleted(sender, instance, **kwargs):
+    ChangeLog.record(instance, "deleted")
+
+
+# События для открытых страниц (/events/bookings/)
+
+
+@receiver(post_save, sender=Booking)
+def publish_booking_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.house_id is not None:
+        publish_on_commit(booking_event(BOOKING_CREATED, instance))
+
+
+@receiver(post_delete, sender=Booking)
+def publish_booking_cancelled(sender, instance, **kwargs):
+    if instance.house_id is not None:
+        publish_on_commit(booking_event(BOOKING_CANCELLED, instance))
+
+
+@receiver(post_delete, sender=RequestProfile)
+def delete_profile_file(sender, instance, **kwargs):
+    instance.profile.delete(save=False)
+
+
+@receiver(user_login_failed)
+def count_login_failure(sender, credentials, request=None, **kwargs):
+    if getattr(request, "login_throttled", False):
+        return
+    record_event("login_failed")
+    username = credentials.get("username")
+    if username:
+        login_throttle.register_failure(request, username)
+
+
+@receiver(user_logged_in)
+def reset_login_throttle(sender, request, user, **kwargs):
+    login_throttle.register_success(user.email, user.phone, user.get_username())
@@ -0,0 +1,154 @@
+"""Хранилище статики с хешированными именами и предсжатыми копиями."""
+
+import gzip
+import logging
+import mimetypes
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.static import serve
+
+try:
+    import brotli
+except ImportError:  # brotli не обязателен: без него пишутся только .gz
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".svg", ".json", ".txt", ".map", ".ttf")
+MIN_COMPRESS_SIZE = 512
+# Кодировка в Accept-Encoding → суффикс сжатой копии (в порядке предпочтения)
+COMPRESSED_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+MUTABLE_MAX_AGE = 60
+_HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{12}\.\w+$")
+
+logger = logging.getLogger(__name__)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage, который при collectstatic пишет рядом с
+    хешированными файлами сжатые копии .gz и .br (если установлен brotli).
+
+    Веб-сервер (nginx gzip_static/brotli_static, WhiteNoise) отдаёт их без
+    сжатия на лету. Копия не пишется, если она не меньше исходного файла.
+    """
+
+    def url_converter(self, name, hashed_files, template=None):
+        converter = super().url_converter(name, hashed_files, template)
+
+        def convert(matchobj):
+            # Старые темы в static/ ссылаются на отсутствующие файлы: такую
+            # ссылку оставляем как есть, а не прерываем collectstatic
+            try:
+                return converter(matchobj)
+            except ValueError as error:
+                logger.warning("%s: %s", name, error)
+                return matchobj["matched"]
+
+        return convert
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_files = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_files.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for hashed_name in sorted(hashed_files):
+            if hashed_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                for compressed in self.compress(hashed_name):
+                    yield hashed_name, compressed, True
+
+    def compress(self, name):
+        with self.open(name) as original:
+            content = original.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return []
+        variants = {".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants[".br"] = brotli.compress(content)
+        written = []
+        for suffix, data in variants.items():
+            if len(data) >= len(content):
+                continue
+            path = name + suffix
+            if self.exists(path):
+                self.delete(path)
+            self._save(path, ContentFile(data))
+            written.append(path)
+        return written
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding с ненулевым весом (``gzip;q=0`` —
+    явный отказ от gzip; ``*`` — любая не перечисленная кодировка)."""
+    accepted, refused = set(), set()
+    for item in header.split(","):
+        name, *params = (part.strip() for part in item.split(";"))
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        (accepted if quality > 0 else refused).add(name.lower())
+    if "*" in accepted:
+        accepted.update(name for name, _ in COMPRESSED_SUFFIXES if name not in refused)
+    return accepted
+
+
+def serve_static(request, path):
+    """Отдаёт файл из STATIC_ROOT, когда WhiteNoise не установлен.
+
+    Файлы с хешем в имени не меняются и кешируются на год; если клиент
+    принимает br или gzip и рядом лежит сжатая копия, отдаётся она.
+    Остальные файлы отдаются django.views.static.serve с коротким кешем.
+    """
+    if not _HASHED_NAME_RE.search(path):
+        response = serve(request, path, document_root=settings.STATIC_ROOT)
+        patch_cache_control(response, public=True, max_age=MUTABLE_MAX_AGE)
+        return response
+    try:
+        fullpath = Path(safe_join(settings.STATIC_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404(path)
+    if not fullpath.is_file():
+        raise Http404(path)
+    content_type, _ = mimetypes.guess_type(fullpath.name)
+    accepted = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+    encoding = None
+    for name, suffix in COMPRESSED_SUFFIXES:
+        compressed = fullpath.with_name(fullpath.name + suffix)
+        if name in accepted and compressed.is_file():
+            fullpath, encoding = compressed, name
+            break
+    response = FileResponse(
+        fullpath.open("rb"), content_type=content_type or "application/octet-stream"
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    patch_vary_headers(response, ["Accept-Encoding"])
+    patch_cache_control(
+        response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+    )
+    return response
+
+
+def profile_storage():
+    """Хранилище профилей запросов (recreation.profiling): каталог
+    PROFILE_ROOT вне MEDIA_ROOT, файлы отдаются только через админку."""
+    return FileSystemStorage(location=settings.PROFILE_ROOT)
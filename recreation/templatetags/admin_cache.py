@@ -0,0 +1,41 @@
+import hashlib
+
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+from django.core.cache import cache
+from django.utils import timezone
+
+register = template.Library()
+
+
+def cached_date_hierarchy(cl):
+    """date_hierarchy с кешированием списка лет/месяцев/дней.
+
+    Каждый уровень иерархии — это SELECT DISTINCT по всей выборке, поэтому
+    результат хранится в кеше ``date_hierarchy_cache_timeout`` секунд
+    отдельно для каждого набора фильтров (и часового пояса).
+    """
+    timeout = getattr(cl.model_admin, "date_hierarchy_cache_timeout", None)
+    if not timeout or not getattr(cl.model_admin, "estimated_count", False):
+        return date_hierarchy(cl)
+    digest = hashlib.md5(
+        f"{cl.get_query_string()}|{timezone.get_current_timezone_name()}".encode()
+    ).hexdigest()
+    key = f"admin-date-hierarchy:{cl.opts.label_lower}:{digest}"
+    context = cache.get(key)
+    if context is None:
+        context = date_hierarchy(cl)
+        cache.set(key, context, timeout)
+    return context
+
+
+@register.tag(name="cached_date_hierarchy")
+def cached_date_hierarchy_tag(parser, token):
+    return InclusionAdminNode(
+        parser,
+        token,
+        func=cached_date_hierarchy,
+        template_name="date_hierarchy.html",
+        takes_context=False,
+    )
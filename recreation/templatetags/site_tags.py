@@ -0,0 +1,58 @@
+"""Общие элементы страниц сайта: меню, рейтинг в звёздах и бандлы статики."""
+
+from django import template
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.html import format_html_join
+
+from ..assets import bundle_paths
+
+register = template.Library()
+
+# (имя URL, заголовок) пунктов главного меню
+NAV_ITEMS = (
+    ("home", "Главная"),
+    ("cottages", "Коттеджи"),
+    ("all_reviews", "Отзывы"),
+    ("post_list", "Блог"),
+    ("account", "Личный кабинет"),
+)
+EXAMS_ITEM = ("dzexam", "Экзамены")
+
+
+@register.inclusion_tag("includes/navbar.html", takes_context=True)
+def site_navbar(context, rating=None, reviews=None, exams=False):
+    """Главное меню; активный пункт определяется по текущему URL.
+
+    rating и reviews — средняя оценка и число отзывов рядом с логотипом,
+    exams — показать пункт «Экзамены».
+    """
+    request = context.get("request")
+    match = getattr(request, "resolver_match", None)
+    current = match.url_name if match else None
+    entries = [*NAV_ITEMS, EXAMS_ITEM] if exams else NAV_ITEMS
+    items = [(reverse(name), title, name == current) for name, title in entries]
+    return {"items": items, "rating": rating, "reviews": reviews}
+
+
+@register.inclusion_tag("includes/star_rating.html")
+def star_rating(value, count=None):
+    """Пять звёзд: целые, половина (от .5) и пустые."""
+    value = float(value or 0)
+    stars = [
+        "full" if value >= i else "half" if value >= i - 0.5 else "empty"
+        for i in range(1, 6)
+    ]
+    return {"value": value, "count": count, "stars": stars}
+
+
+@register.simple_tag
+def bundle(name):
+    """Теги <link>/<script> бандла из dist/ или, пока он не собран, его исходников."""
+    urls = [
+        (path if path.startswith("https:") else static(path),)
+        for path in bundle_paths(name)
+    ]
+    if name.endswith(".css"):
+        return format_html_join("\n", '<link rel="stylesheet" href="{}">', urls)
+    return format_html_join("\n", '<script src="{}"></script>', urls)
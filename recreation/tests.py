@@ -0,0 +1,759 @@
+import gc
+import gzip
+import json
+import tempfile
+import threading
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import identify_hasher
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import QuerySet
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .admin import ListQueryMixin
+from .backup import read_backup, write_backup
+from .hashers import TimedPBKDF2PasswordHasher, auth_metrics_per_minute
+from .ingest import ingest_bookings
+from .metrics import OPERATION_LATENCY, REGISTRY, Counter, Registry
+from .models import (
+    Booking,
+    BookingService,
+    ChangeLog,
+    Client,
+    CustomUser,
+    Employee,
+    Event,
+    Facility,
+    House,
+    Payment,
+    Position,
+    Post,
+    RequestProfile,
+    Review,
+    ReviewAnalysis,
+    ReviewStats,
+    Service,
+)
+from .storage import serve_static
+from .text_analysis import analyze
+
+OLD_DATE = datetime(2001, 1, 1, 12, 0, tzinfo=dt_timezone.utc)
+
+
+def create_house(**kwargs):
+    fields = {"name": "Сосны", "location": "Озеро", "capacity": 4}
+    fields.update(kwargs)
+    fields.setdefault("price_per_night", 5000)
+    return House.objects.create(**fields)
+
+
+def create_client(**kwargs):
+    fields = {
+        "last_name": "Петров",
+        "first_name": "Иван",
+        "patronymic": "Сергеевич",
+        "phone_number": "+79991234567",
+        "email": "ivan@example.com",
+    }
+    fields.update(kwargs)
+    return Client.objects.create(**fields)
+
+
+def _hash_count():
+    cells = REGISTRY.collect().get((OPERATION_LATENCY.name, ("password_hash",)))
+    return sum(cells[:-1]) if cells else 0
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class PasswordHashTimingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            username="Иван",
+            last_name="Петров",
+            email="ivan@example.com",
+            phone="+79991234567",
+            password="верный-пароль",
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_stored_hash_is_verified_by_timed_hasher(self):
+        self.assertIsInstance(
+            identify_hasher(self.user.password), TimedPBKDF2PasswordHasher
+        )
+
+    def test_failed_login_is_counted(self):
+        # Вход по имени: пароль проверяет ModelBackend.authenticate, без
+        # холостого хеширования для неизвестного пользователя
+        before = _hash_count()
+        response = self.client.post(
+            reverse("login"), {"username": "Иван", "password": "неверный"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(_hash_count(), before)
+        self.assertGreater(sum(row["hashes"] for row in auth_metrics_per_minute(2)), 0)
+
+    def test_unknown_login_costs_one_hash(self):
+        for username in ("ivan@example.com", "nobody@example.com", "+79990000001"):
+            with self.subTest(username=username):
+                before = _hash_count()
+                self.assertIsNone(authenticate(username=username, password="x"))
+                self.assertEqual(_hash_count() - before, 1)
+
+    def test_login_by_email_phone_and_name(self):
+        for username in ("IVAN@example.com ", "8 999 123-45-67", "Иван"):
+            with self.subTest(username=username):
+                user = authenticate(username=username, password="верный-пароль")
+                self.assertEqual(user, self.user)
+
+
+class BackupRestoreTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        house = create_house()
+        client = create_client()
+        cls.old = Review.objects.create(
+            client_id=client, house_id=house, rating=5, comment="Отлично"
+        )
+        cls.other = Review.objects.create(
+            client_id=client, house_id=house, rating=4, comment="Хорошо"
+        )
+        # auto_now_add не даёт задать дату при создании
+        Review.objects.filter(pk=cls.old.pk).update(created_at=OLD_DATE)
+
+    def backup(self, since=None):
+        fileobj = BytesIO()
+        write_backup(fileobj, since=since)
+        fileobj.seek(0)
+        return fileobj
+
+    def test_restore_keeps_timestamps(self):
+        copy = self.backup()
+        Review.objects.filter(pk=self.old.pk).update(
+            created_at=timezone.now(), rating=1
+        )
+        read_backup(copy)
+        read_backup(self.backup())  # повторное восстановление ничего не меняет
+
+        review = Review.objects.get(pk=self.old.pk)
+        self.assertEqual(review.created_at, OLD_DATE)
+        self.assertEqual(review.rating, 5)
+
+    def test_incremental_restore_applies_edits_and_deletes(self):
+        full = self.backup()
+        since = timezone.now()
+        review = Review.objects.get(pk=self.old.pk)
+        review.rating = 2
+        review.save()
+        Review.objects.filter(pk=self.other.pk).delete()
+        incremental = self.backup(since=since)
+
+        read_backup(full)
+        self.assertTrue(Review.objects.filter(pk=self.other.pk).exists())
+        read_backup(incremental)
+
+        review = Review.objects.get(pk=self.old.pk)
+        self.assertEqual(review.rating, 2)
+        self.assertEqual(review.created_at, OLD_DATE)
+        self.assertFalse(Review.objects.filter(pk=self.other.pk).exists())
+
+    def test_full_restore_deletes_rows_missing_from_copy_in_chunks(self):
+        copy = self.backup(since=timezone.now())
+        client = Client.objects.get()
+        extra = [
+            Review.objects.create(
+                client_id=client, house_id=self.old.house_id, rating=3, comment="Ещё"
+            ).pk
+            for _ in range(3)
+        ]
+        read_backup(copy, chunk_size=1)
+
+        self.assertFalse(Review.objects.filter(pk__in=extra).exists())
+        self.assertEqual(Review.objects.count(), 2)
+
+
+class KpiDashboardPermissionTests(TestCase):
+    def test_staff_without_view_permission_is_denied(self):
+        staff = CustomUser.objects.create_user(
+            username="Мария", last_name="Иванова", password="x", is_staff=True
+        )
+        self.client.force_login(staff, "recreation.backends.EmailPhoneBackend")
+        url = reverse("admin:recreation_dailykpisnapshot_changelist")
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        staff.user_permissions.add(
+            Permission.objects.get(codename="view_dailykpisnapshot")
+        )
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class HouseConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_house()
+
+    def test_invalid_pk_returns_404(self):
+        self.assertEqual(self.client.get("/api/houses/abc/").status_code, 404)
+
+    def test_etag_depends_on_format(self):
+        json_response = self.client.get("/api/houses/", HTTP_ACCEPT="application/json")
+        html_response = self.client.get("/api/houses/", HTTP_ACCEPT="text/html")
+        self.assertNotEqual(json_response["ETag"], html_response["ETag"])
+        self.assertIn("Accept", json_response["Vary"])
+        self.assertEqual(
+            self.client.get(
+                "/api/houses/",
+                HTTP_ACCEPT="text/html",
+                HTTP_IF_NONE_MATCH=json_response["ETag"],
+            ).status_code,
+            200,
+        )
+
+
+class PostDetailTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUser.objects.create_user(username="author", password="x")
+        cls.post = Post.objects.create(
+            title="Пост", slug="post", author=author, body="Текст"
+        )
+        cls.numeric = Post.objects.create(
+            title="2024", slug="999999", author=author, body="Текст"
+        )
+
+    def test_post_found_by_id_and_slug(self):
+        for url in (f"/posts/{self.post.pk}/", "/posts/post/"):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertEqual(response.context["post"], self.post)
+
+    def test_numeric_slug_still_resolves(self):
+        response = self.client.get("/posts/999999/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["post"], self.numeric)
+        self.assertEqual(self.client.get("/posts/888888/").status_code, 404)
+
+
+class MetricsTests(TestCase):
+    def test_localhost_is_not_trusted_by_default(self):
+        # За прокси на той же машине все запросы приходят с 127.0.0.1
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_bearer_token(self):
+        url = reverse("metrics")
+        self.assertEqual(
+            self.client.get(url, HTTP_AUTHORIZATION="Bearer wrong").status_code, 403
+        )
+        self.assertEqual(
+            self.client.get(url, HTTP_AUTHORIZATION="Bearer secret").status_code, 200
+        )
+
+    def test_finished_thread_shards_are_folded(self):
+        registry = Registry()
+        counter = Counter("test_total", "Тест.", registry=registry)
+        threads = [threading.Thread(target=counter.inc) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        gc.collect()
+        self.assertEqual(len(registry._shards), 0)
+        self.assertEqual(registry.collect()[("test_total", ())], 20)
+
+
+class RequestProfileAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = CustomUser.objects.create_user(
+            username="Мария", last_name="Иванова", password="x", is_staff=True
+        )
+        # Файла профиля нет: например, его удалили с диска вручную
+        cls.profile = RequestProfile.objects.create(
+            method="GET",
+            path="/cottages/",
+            status_code=200,
+            trigger="staff",
+            duration_ms=1,
+            db_ms=0,
+            query_count=0,
+            sample_count=0,
+            profile="missing.speedscope.json",
+        )
+
+    def setUp(self):
+        self.client.force_login(self.staff, "recreation.backends.EmailPhoneBackend")
+
+    def test_downloads_require_view_permission(self):
+        for name in ("speedscope", "collapsed"):
+            url = reverse(
+                f"admin:recreation_requestprofile_{name}", args=[self.profile.pk]
+            )
+            self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_missing_file(self):
+        self.staff.user_permissions.add(
+            Permission.objects.get(codename="view_requestprofile")
+        )
+        change_url = reverse(
+            "admin:recreation_requestprofile_change", args=[self.profile.pk]
+        )
+        self.assertContains(self.client.get(change_url), "Файл профиля не найден")
+        for name in ("speedscope", "collapsed"):
+            url = reverse(
+                f"admin:recreation_requestprofile_{name}", args=[self.profile.pk]
+            )
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class ChangelistQueryCountTests(TestCase):
+    """Число запросов списка в админке не зависит от числа строк."""
+
+    rows = 100
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_superuser(
+            username="Админ",
+            last_name="Админов",
+            email="admin@example.com",
+            phone="+79990000000",
+            patronymic="",
+            password="x",
+        )
+        cls.house = create_house(slug="base")
+        cls.client_obj = create_client()
+        cls.position = Position.objects.create(name="Администратор")
+        cls.service = Service.objects.create(
+            name="Баня",
+            description="—",
+            price=1000,
+            quantity=1,
+            image="services/x.jpg",
+            type="relax",
+        )
+        cls.booking = Booking.objects.create(
+            house=cls.house,
+            client_id=cls.client_obj,
+            check_in_date=date(2030, 1, 1),
+            check_out_date=date(2030, 1, 3),
+            guests=2,
+            phone_number="+79991234567",
+            email="ivan@example.com",
+            total_cost=10000,
+            created_at=timezone.now(),
+        )
+
+    def make_rows(self, model, start, stop):
+        """Несохранённые объекты model с номерами start..stop-1."""
+        day = date(2030, 1, 1)
+        factories = {
+            Post: lambda i: Post(
+                title=f"Пост {i}", slug=f"post-{i}", author=self.user, body="Текст"
+            ),
+            Client: lambda i: Client(
+                last_name=f"Петров{i}",
+                first_name="Иван",
+                patronymic="Сергеевич",
+                phone_number="+79991234567",
+                email=f"c{i}@example.com",
+            ),
+            House: lambda i: House(
+                name=f"Дом {i}",
+                slug=f"house-{i}",
+                location="Озеро",
+                capacity=4,
+                price_per_night=5000,
+            ),
+            Facility: lambda i: Facility(
+                house_id=self.house,
+                name=f"Мангал {i}",
+                location="Двор",
+                description="—",
+                status="исправен",
+            ),
+            Review: lambda i: Review(
+                client_id=self.client_obj,
+                house_id=self.house,
+                rating=5,
+                comment=f"Отзыв {i}",
+            ),
+            Employee: lambda i: Employee(
+                position_id=self.position,
+                last_name=f"Сидоров{i}",
+                first_name="Пётр",
+                patronymic="Ильич",
+                contact_info="—",
+            ),
+            Booking: lambda i: Booking(
+                house=self.house,
+                client_id=self.client_obj,
+                check_in_date=day,
+                check_out_date=day + timedelta(days=2),
+                guests=2,
+                phone_number="+79991234567",
+                email=f"b{i}@example.com",
+                total_cost=10000,
+            ),
+            Event: lambda i: Event(
+                booking_id=self.booking,
+                name=f"Праздник {i}",
+                date=day,
+                location="Беседка",
+                image="event_images/x.jpg",
+            ),
+            Service: lambda i: Service(
+                name=f"Услуга {i}",
+                description="—",
+                price=100,
+                quantity=1,
+                image="services/x.jpg",
+                type="relax",
+            ),
+            BookingService: lambda i: BookingService(
+                service_id=self.service,
+                booking_id=self.booking,
+                booking_date=day,
+                return_date=day,
+            ),
+            Payment: lambda i: Payment(
+                booking=self.booking,
+                amount=100,
+                payment_date=day,
+                payment_method="card",
+            ),
+        }
+        return [factories[model](i) for i in range(start, stop)]
+
+    def get_changelist(self, model):
+        cache.clear()  # иерархия дат кешируется: считаем запросы без кеша
+        url = reverse(
+            f"admin:{model._meta.app_label}_{model._meta.model_name}_changelist"
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_list_query_changelists(self):
+        self.client.force_login(self.user, "recreation.backends.EmailPhoneBackend")
+        list_query_admins = [
+            (model, model_admin)
+            for model, model_admin in admin.site._registry.items()
+            if isinstance(model_admin, ListQueryMixin)
+        ]
+        self.assertTrue(list_query_admins)
+        for model, model_admin in list_query_admins:
+            with self.subTest(model=model._meta.label):
+                model.objects.bulk_create(self.make_rows(model, 0, 2))
+                with CaptureQueriesContext(connection) as few_rows:
+                    self.get_changelist(model)
+                model.objects.bulk_create(self.make_rows(model, 2, self.rows))
+                with self.assertNumQueries(len(few_rows)):
+                    response = self.get_changelist(model)
+                self.assertEqual(
+                    len(response.context["cl"].result_list),
+                    min(self.rows, model_admin.list_per_page),
+                )
+
+
+class ChangeLogTests(TestCase):
+    def test_entries_are_written_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                house = create_house()
+                self.assertFalse(ChangeLog.objects.exists())
+        self.assertTrue(callbacks)
+        self.assertEqual(
+            list(ChangeLog.objects.values_list("model", "object_id", "action")),
+            [("house", house.pk, "created")],
+        )
+
+
+class ServeStaticTests(SimpleTestCase):
+    name = "app.0123456789ab.js"
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        content = b"console.log(1);" * 100
+        Path(root.name, self.name).write_bytes(content)
+        Path(root.name, self.name + ".gz").write_bytes(gzip.compress(content))
+        settings_override = override_settings(STATIC_ROOT=root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def encoding(self, accept_encoding):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+        response = serve_static(request, self.name)
+        response.close()
+        return response.headers.get("Content-Encoding")
+
+    def test_compressed_copy_follows_accept_encoding(self):
+        cases = {
+            "gzip, deflate": "gzip",
+            "br;q=1.0, gzip;q=0.5": "gzip",  # .br нет
+            "*": "gzip",
+            "gzip;q=0": None,
+            "gzip;q=0, *": None,
+            "x-gzip": None,
+            "": None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(self.encoding(header), expected)
+
+
+class BackfillClientProfilesTests(TestCase):
+    def test_profiles_created_concurrently_are_not_counted(self):
+        users = [
+            CustomUser.objects.create_user(username=f"user{i}", password="x")
+            for i in range(3)
+        ]
+        fields_from_user = Client.fields_from_user
+        raced = []
+
+        def racing_fields_from_user(user, **overrides):
+            if not raced:
+                # Пользователь вошёл и получил профиль между выборкой и вставкой
+                raced.append(user)
+                CustomUser.objects.get(pk=users[0].pk).get_client_profile()
+            return fields_from_user(user, **overrides)
+
+        out = StringIO()
+        with mock.patch.object(
+            Client, "fields_from_user", side_effect=racing_fields_from_user
+        ):
+            call_command("backfill_client_profiles", stdout=out)
+        self.assertIn("Создано профилей: 2", out.getvalue())
+        self.assertEqual(Client.objects.filter(user__in=users).count(), 3)
+
+
+class ClientAdminSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.petrov = create_client()
+        cls.sidorova = create_client(
+            last_name="Сидорова",
+            first_name="Анна",
+            patronymic="",
+            phone_number="+79997654321",
+            email="anna@example.com",
+        )
+        cls.admin = CustomUser.objects.create_superuser(
+            username="Админ", last_name="Админов", email="a@example.com", password="x"
+        )
+
+    def search(self, term):
+        self.client.force_login(self.admin, "recreation.backends.EmailPhoneBackend")
+        response = self.client.get(
+            reverse("admin:recreation_client_changelist"), {"q": term}
+        )
+        return set(response.context["cl"].result_list)
+
+    def test_search_by_prefix_first_name_and_substring(self):
+        cases = {
+            "петр": {self.petrov},
+            "Иван": {self.petrov},  # имя
+            "дорова": {self.sidorova},  # часть фамилии
+            "anna@": {self.sidorova},
+            "8 999 765": {self.sidorova},
+        }
+        for term, expected in cases.items():
+            with self.subTest(term=term):
+                self.assertEqual(self.search(term), expected)
+
+    def test_search_columns_follow_source_fields(self):
+        client = Client.objects.get(pk=self.sidorova.pk)
+        client.first_name = "Ёлка"
+        client.phone_number = "8 (999) 111-22-33"
+        client.save(update_fields=["first_name", "phone_number"])
+        client.refresh_from_db()
+        self.assertEqual(client.search_name, "сидорова елка")
+        self.assertEqual(client.search_phone, "79991112233")
+        self.assertEqual(client.search_email, "anna@example.com")
+        self.assertEqual(self.admin.search_name, "админов админ")
+
+
+class IngestBookingCostTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.house = create_house()
+
+    def ingest(self, **fields):
+        check_in = timezone.localdate() + timedelta(days=10)
+        row = {
+            "house": self.house.pk,
+            "check_in_date": check_in.isoformat(),
+            "check_out_date": (check_in + timedelta(days=2)).isoformat(),
+            "guests": 2,
+            "email": "guest@example.com",
+            **fields,
+        }
+        return ingest_bookings(StringIO(json.dumps(row)), fmt="jsonl")
+
+    def test_total_cost_is_rounded_to_cents(self):
+        report = self.ingest(total_cost="9000.005")
+        self.assertEqual(report.created, 1)
+        booking = Booking.objects.get()
+        self.assertEqual(booking.total_cost, Decimal("9000.01"))
+        self.assertEqual(booking.base_cost, Decimal("10000.00"))
+
+    def test_invalid_total_cost_is_rejected(self):
+        for value in ("-1", "100000000", "99999999.999", "1e30", "NaN", "много"):
+            with self.subTest(total_cost=value):
+                report = self.ingest(total_cost=value)
+                self.assertEqual(report.created, 0)
+                self.assertIn("Общая стоимость", report.errors[0]["errors"][0])
+        self.assertFalse(Booking.objects.exists())
+
+    def test_bulk_dry_run_validates_without_creating(self):
+        staff = CustomUser.objects.create_superuser(
+            username="Админ", last_name="Админов", email="a@example.com", password="x"
+        )
+        self.client.force_login(staff, "recreation.backends.EmailPhoneBackend")
+        check_in = timezone.localdate() + timedelta(days=10)
+        row = {
+            "house": self.house.pk,
+            "check_in_date": check_in.isoformat(),
+            "check_out_date": (check_in + timedelta(days=2)).isoformat(),
+            "guests": 2,
+            "email": "guest@example.com",
+        }
+        url = "/api/bookings/bulk/"
+
+        response = self.client.post(
+            url + "?dry_run=1", [row, {}], content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["created"], response.data["validated"]), (0, 1))
+        self.assertEqual(response.data["results"][0], {"index": 0, "validated": True})
+        self.assertFalse(Booking.objects.exists())
+
+        response = self.client.post(url, [row], content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            response.data["results"], [{"index": 0, "id": Booking.objects.get().pk}]
+        )
+
+
+class ReviewAnalysisTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.house = create_house()
+        cls.review = Review.objects.create(
+            client_id=create_client(), house_id=cls.house, rating=5, comment="Уютно"
+        )
+
+    def setUp(self):
+        ReviewAnalysis.objects.create(
+            review=self.review, house=self.house, sentiment=1.0, token_count=1
+        )
+
+    def test_analysis_survives_edits_that_keep_the_text(self):
+        review = Review.objects.get(pk=self.review.pk)
+        review.rating = 3
+        review.save()
+        Review(
+            pk=self.review.pk,
+            client_id=self.review.client_id,
+            house_id=self.house,
+            rating=4,
+            comment="Уютно",
+            created_at=self.review.created_at,
+        ).save()
+        self.assertTrue(ReviewAnalysis.objects.filter(review=self.review).exists())
+
+    def test_analysis_is_dropped_when_text_changes(self):
+        review = Review.objects.get(pk=self.review.pk)
+        review.comment = "Шумно"
+        review.save()
+        self.assertFalse(ReviewAnalysis.objects.filter(review=self.review).exists())
+
+    def test_road_is_not_expensive(self):
+        self.assertEqual(analyze("Хорошая дорога до озера")[0], 1.0)
+        self.assertEqual(analyze("Дорого и шумно")[0], -1.0)
+
+
+class ReviewStatsTests(TestCase):
+    def test_single_global_row(self):
+        ReviewStats.objects.get_or_create(house=None)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ReviewStats.objects.create(house=None)
+
+    def test_concurrently_created_global_row_is_reused(self):
+        existing, _ = ReviewStats.objects.get_or_create(house=None)
+        # Строки ещё не было при выборке, но её вставила другая транзакция
+        with mock.patch.object(QuerySet, "first", return_value=None):
+            stats = ReviewStats._locked(None)
+        self.assertEqual(stats.pk, existing.pk)
+
+    def test_first_review_creates_global_row_once(self):
+        house = create_house()
+        client = create_client()
+        for rating in (5, 3):
+            Review.objects.create(
+                client_id=client, house_id=house, rating=rating, comment="Текст"
+            )
+        stats = ReviewStats.objects.get(house__isnull=True)
+        self.assertEqual((stats.total, stats.rating_sum), (2, 8))
+
+
+class ReviewStatsMigrationTests(TransactionTestCase):
+    before = [("recreation", "0030_requestprofile")]
+    after = [("recreation", "0031_reviewstats_unique_global")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        self.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicate_global_rows_are_merged(self):
+        apps = self.migrate(self.before)
+        ReviewStats = apps.get_model("recreation", "ReviewStats")
+        ReviewStats.objects.filter(house__isnull=True).delete()
+        later = OLD_DATE + timedelta(days=1)
+        ReviewStats.objects.create(
+            rating_5=2, total=2, rating_sum=10, last_review_at=OLD_DATE
+        )
+        ReviewStats.objects.create(
+            rating_1=1, total=1, rating_sum=1, last_review_at=later
+        )
+
+        apps = self.migrate(self.after)
+        ReviewStats = apps.get_model("recreation", "ReviewStats")
+        self.assertEqual(
+            list(
+                ReviewStats.objects.filter(house__isnull=True).values_list(
+                    "rating_1", "rating_5", "total", "rating_sum", "last_review_at"
+                )
+            ),
+            [(1, 2, 3, 11, later)],
+        )
+        with self.assertRaises(IntegrityError):
+            ReviewStats.objects.create()
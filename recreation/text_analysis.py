@@ -0,0 +1,134 @@
+"""Разбор текстов отзывов: токенизация, ключевые слова и тональность.
+
+Модуль не зависит от Django и ORM, чтобы функции можно было выполнять
+в отдельных процессах (ProcessPoolExecutor) пачками отзывов.
+
+Тональность считается по словарю основ слов: каждое положительное
+слово даёт +1, отрицательное −1, частица «не» перед словом меняет знак.
+Итог нормируется в диапазон [-1, 1].
+"""
+
+import re
+from collections import Counter
+
+TOKEN_RE = re.compile(r"[а-яёa-z]+", re.IGNORECASE)
+
+STOP_WORDS = frozenset(
+    """
+    а без более бы был была были было быть в вам вас весь во вот все всего
+    всех вы где да даже для до его ее ей ему если есть еще же за здесь и из
+    или им их к как какой когда кто ли либо меня мне много может мы на над
+    надо наш нас не него нее нет ни них но ну о об однако он она они оно от
+    очень по под после при про раз с сам свой себя так также такой там те
+    тем то того тоже той только том ты у уже хотя чего чей чем что чтобы
+    чуть эта эти это этот я день дня дней раз нам наши нашей был всё ещё
+    """.split()
+)
+
+# Основы слов (после stem) с положительной и отрицательной окраской
+POSITIVE_STEMS = frozenset(
+    """
+    отличн прекрасн хорош замечательн великолепн чудесн уютн чист вкусн
+    красив удобн приятн вежлив внимательн дружелюбн рекоменд понравил
+    понрав спасиб благодар довольн восторг супер класс идеальн лучш
+    тих спокойн свеж комфортн просторн милы радушн гостеприимн
+    """.split()
+)
+NEGATIVE_STEMS = frozenset(
+    """
+    плох ужасн грязн холодн шумн неудобн разочарова хамств хамск грубы
+    груб сломан сломал воня вонь запах жалоб кошмар отвратительн худш
+    тесн сыр плесен клоп комар дорог невкусн неприятн неуютн скучн
+    проблем обман испорчен нехорош отказа
+    """.split()
+)
+
+# Слова, чья основа совпадает с оценочной, но сами оценки не несут:
+# «дорога» (путь) — не «дорого», «сыр» (еда) — не «сырой». Неоднозначные
+# формы («дорогой», «сыром») остаются оценочными.
+NEUTRAL_WORDS = frozenset(
+    """
+    дорога дороги дороге дорогу дорогою дорогам дорогами дорогах
+    сыр сыра сыру сыре сыры сыров сырам сырами сырах
+    """.split()
+)
+
+NEGATIONS = frozenset({"не", "нет", "ни", "без"})
+
+# Окончания для грубого стемминга, от длинных к коротким
+_ENDINGS = sorted(
+    """
+    иями ями ами ией ого его ому ему ыми ими ых их ую юю ая яя ое ее ой ей
+    ий ый ые ие ов ев ом ем ам ям ах ях ую ть ла ло ли ет ут ют ит ат ят
+    ся сь а я о е ы и у ю ь й
+    """.split(),
+    key=len,
+    reverse=True,
+)
+MIN_STEM = 3
+KEYWORDS_PER_REVIEW = 20
+
+
+def tokenize(text):
+    """Возвращает список слов в нижнем регистре (ё заменяется на е)."""
+    return [token.lower().replace("ё", "е") for token in TOKEN_RE.findall(text or "")]
+
+
+def stem(word):
+    """Отсекает типичное окончание, оставляя не меньше MIN_STEM букв."""
+    for ending in _ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[: -len(ending)]
+    return word
+
+
+def _polarity(word_stem):
+    # Основа может быть длиннее словарной (рекомендую -> рекоменд)
+    for size in range(len(word_stem), MIN_STEM - 1, -1):
+        prefix = word_stem[:size]
+        if prefix in POSITIVE_STEMS:
+            return 1
+        if prefix in NEGATIVE_STEMS:
+            return -1
+    return 0
+
+
+def analyze(text):
+    """Возвращает (тональность, число слов, Counter ключевых слов)."""
+    tokens = tokenize(text)
+    keywords = Counter()
+    score = hits = 0
+    negate = False
+    for token in tokens:
+        if token in NEGATIONS:
+            negate = True
+            continue
+        polarity = 0 if token in NEUTRAL_WORDS else _polarity(stem(token))
+        if polarity:
+            score += -polarity if negate else polarity
+            hits += 1
+        negate = False
+        if token not in STOP_WORDS and len(token) > 2:
+            keywords[token] += 1
+    sentiment = score / hits if hits else 0.0
+    return round(sentiment, 4), len(tokens), keywords
+
+
+def analyze_chunk(rows):
+    """Разбирает пачку [(review_id, текст), ...] — выполняется в процессе пула.
+
+    Возвращает список кортежей (review_id, тональность, число слов, ключевые
+    слова), где ключевые слова — словарь из KEYWORDS_PER_REVIEW самых частых.
+    """
+    results = []
+    for review_id, text in rows:
+        sentiment, token_count, keywords = analyze(text)
+        results.append(
+            (
+                review_id,
+                sentiment,
+                token_count,
+                dict(keywords.most_common(KEYWORDS_PER_REVIEW)),
+            )
+        )
+    return results
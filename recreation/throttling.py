@@ -0,0 +1,134 @@
+"""Ограничение частоты неудачных попыток входа.
+
+Неудачные попытки считаются в кеше двумя счётчиками со скользящим окном:
+по IP-адресу клиента и по логину (email, телефон или имя пользователя
+в нормализованном виде). Окно приближается двумя соседними интервалами
+фиксированной длины: значение предыдущего берётся с весом оставшейся
+доли окна. Это два ключа кеша на счётчик вместо журнала всех попыток.
+
+Проверка выполняется до проверки пароля (см. LoginThrottleBackend), так
+что перебор паролей не расходует процессор на PBKDF2. Для нескольких
+процессов или серверов нужен общий кеш (Redis, Memcached).
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .normalizers import normalize_email, normalize_text, to_e164
+
+# (число неудачных попыток, окно в секундах)
+DEFAULT_RATES = {
+    "ip": (50, 300),
+    "identifier": (5, 300),
+}
+
+
+class SlidingWindow:
+    """Счётчик событий за последние ``window`` секунд."""
+
+    def __init__(self, prefix, limit, window):
+        self.prefix = prefix
+        self.limit = limit
+        self.window = window
+
+    def _key(self, ident, bucket):
+        return f"throttle:{self.prefix}:{ident}:{bucket}"
+
+    def _position(self, now):
+        bucket, offset = divmod(now, self.window)
+        return int(bucket), offset / self.window
+
+    def count(self, ident, now=None):
+        bucket, elapsed = self._position(time.time() if now is None else now)
+        current, previous = self._key(ident, bucket), self._key(ident, bucket - 1)
+        values = cache.get_many([current, previous])
+        return values.get(previous, 0) * (1 - elapsed) + values.get(current, 0)
+
+    def is_exceeded(self, ident, now=None):
+        return self.count(ident, now) >= self.limit
+
+    def retry_after(self, ident, now=None):
+        """Через сколько секунд (не больше) счётчик опустится ниже лимита."""
+        _, elapsed = self._position(time.time() if now is None else now)
+        return int(self.window * (1 - elapsed)) + 1
+
+    def hit(self, ident, now=None):
+        bucket, _ = self._position(time.time() if now is None else now)
+        key = self._key(ident, bucket)
+        # Ключ живёт два окна: пока он нужен как «предыдущий» интервал
+        if not cache.add(key, 1, timeout=self.window * 2):
+            try:
+                cache.incr(key)
+            except ValueError:  # ключ истёк между add и incr
+                cache.set(key, 1, timeout=self.window * 2)
+
+    def reset(self, ident, now=None):
+        bucket, _ = self._position(time.time() if now is None else now)
+        cache.delete_many([self._key(ident, bucket), self._key(ident, bucket - 1)])
+
+
+def login_identifier(username):
+    """Нормализованный логин, чтобы «A@b.ru» и «a@b.ru » считались одним."""
+    username = str(username or "")
+    if "@" in username:
+        value = normalize_email(username)
+    else:
+        value = to_e164(username) or normalize_text(username)
+    # В ключе кеша не храним персональные данные в открытом виде
+    return hashlib.sha256(value.encode()).hexdigest()[:32]
+
+
+def client_ip(request):
+    """IP клиента; LOGIN_THROTTLE_PROXY_COUNT — число доверенных прокси."""
+    proxies = getattr(settings, "LOGIN_THROTTLE_PROXY_COUNT", 0)
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR")
+    if proxies and forwarded:
+        addresses = [address.strip() for address in forwarded.split(",")]
+        return addresses[-min(proxies, len(addresses))]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+class LoginThrottle:
+    """Пара счётчиков (IP и логин) с лимитами из settings.LOGIN_THROTTLE_RATES."""
+
+    @property
+    def windows(self):
+        rates = {**DEFAULT_RATES, **getattr(settings, "LOGIN_THROTTLE_RATES", {})}
+        return {
+            scope: SlidingWindow(f"login-{scope}", limit, window)
+            for scope, (limit, window) in rates.items()
+        }
+
+    def _idents(self, request, username):
+        idents = {"identifier": login_identifier(username)}
+        if request is not None:
+            idents["ip"] = client_ip(request)
+        return idents
+
+    def retry_after(self, request, username):
+        """None, если попытка разрешена, иначе сколько секунд ждать."""
+        windows = self.windows
+        waits = [
+            windows[scope].retry_after(ident)
+            for scope, ident in self._idents(request, username).items()
+            if windows[scope].is_exceeded(ident)
+        ]
+        return max(waits) if waits else None
+
+    def register_failure(self, request, username):
+        windows = self.windows
+        for scope, ident in self._idents(request, username).items():
+            windows[scope].hit(ident)
+
+    def register_success(self, *usernames):
+        # Успешный вход снимает ограничение с логина, но не с IP
+        window = self.windows["identifier"]
+        for username in usernames:
+            if username:
+                window.reset(login_identifier(username))
+
+
+login_throttle = LoginThrottle()
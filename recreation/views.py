@@ -10,16 +10,18 @@ from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.db import transaction
-from django.db.models import Avg, Count, Q
+from django.db.models import Count, Q
 from django.http import FileResponse, Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
+from django.utils.decorators import method_decorator
 # from django.utils.text import slugify
 from django.views.decorators.http import require_GET, require_POST
 from django.views.generic import ListView
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .conditional import conditional_get, house_version, post_version, service_version
 from .forms import (
     BookingForm,
     ClientForm,
@@ -33,32 +35,42 @@ from .forms import (
     ReviewForm,
     UserProfileForm,
 )
-from .models import Booking, Client, DZexam, House, Post, Review, Service, Tag
+from .models import (
+    Booking,
+    Client,
+    DZexam,
+    House,
+    Post,
+    Review,
+    ReviewStats,
+    Service,
+    Tag,
+)
+from .renderers import json_response
 
 logger = logging.getLogger(__name__)
 
 
 # Главная страница
 def home(request):
-    rating_stats = Review.objects.aggregate(
-        global_avg=Avg("rating"), total=Count("review_id")
-    )
+    rating_stats = ReviewStats.get_global()
     try:
-        # 1. Получаем активные коттеджи с их рейтингами
-        houses = House.objects.filter(is_active=True).order_by("name")
+        # 1. Получаем активные коттеджи с их рейтингами (из ReviewStats)
+        houses = (
+            House.objects.filter(is_active=True)
+            .select_related("review_stats")
+            .order_by("name")
+        )
         cottages_data = []
 
         for house in houses:
-            # Получаем средний рейтинг и количество отзывов для каждого коттеджа
-            avg_rating = house.review_set.aggregate(Avg("rating"))["rating__avg"] or 0
-            review_count = house.review_set.count()
-
+            stats = getattr(house, "review_stats", None)
             cottages_data.append(
                 {
                     "obj": house,
                     "image_url": house.get_image_url,  # Используем свойство без вызова ()
-                    "avg_rating": avg_rating,
-                    "review_count": review_count,
+                    "avg_rating": stats.average if stats else 0,
+                    "review_count": stats.total if stats else 0,
                 }
             )
 
@@ -84,8 +96,8 @@ def home(request):
                 "services": services,
                 "STATIC_URL": settings.STATIC_URL,
                 "debug": settings.DEBUG,
-                "global_avg_rating": rating_stats["global_avg"] or 0,
-                "global_total_reviews": rating_stats["total"],
+                "global_avg_rating": rating_stats.average,
+                "global_total_reviews": rating_stats.total,
             },
         )
 
@@ -106,6 +118,7 @@ def home(request):
 
 
 @require_GET
+@conditional_get(service_version)
 def service_data(request, pk):
     service = get_object_or_404(Service, pk=pk)
 
@@ -125,7 +138,7 @@ def service_data(request, pk):
             image_url = os.path.join(settings.STATIC_URL, "images/no-image.jpg")
 
     response_data = {
-        "id": service.id,
+        "id": service.pk,
         "name": service.name,
         "description": service.description,
         "price": str(service.price),
@@ -134,23 +147,13 @@ def service_data(request, pk):
         "icon": service.get_icon(),
     }
 
-    return JsonResponse(response_data)
+    return json_response(response_data)
 
 
 # Личный кабинет
 @login_required
 def account_view(request):
-    try:
-        client = request.user.client_profile
-    except Client.DoesNotExist:
-        client = Client.objects.create(
-            user=request.user,
-            last_name=request.user.last_name or "",
-            first_name=request.user.username or "",
-            patronymic=request.user.patronymic or "",
-            email=request.user.email,
-            phone_number=request.user.phone or "",
-        )
+    client = request.client_profile
 
     if request.method == "POST" and "logout" in request.POST:
         logout(request)
@@ -188,7 +191,7 @@ def account(request):
 
     if request.method == "POST":
         form = UserProfileForm(request.POST, instance=request.user)
-        client_form = ClientForm(request.POST, instance=request.user.client_profile)
+        client_form = ClientForm(request.POST, instance=request.client_profile)
 
         if form.is_valid() and client_form.is_valid():
             form.save()
@@ -197,7 +200,7 @@ def account(request):
             return redirect("account")
     else:
         form = UserProfileForm(instance=request.user)
-        client_form = ClientForm(instance=request.user.client_profile)
+        client_form = ClientForm(instance=request.client_profile)
 
     # Добавляем текущую дату в контекст для отображения статуса бронирований
     context = {
@@ -212,8 +215,12 @@ def account(request):
 
 # def post_detail(request, slug, id=None):
 # Посты
-def post_detail(request, slug):
-    post = get_object_or_404(Post, slug__iexact=slug)
+@conditional_get(post_version, per_user=True)
+def post_detail(request, slug=None, id=None):
+    post = Post.objects.filter(pk=id).first() if id is not None else None
+    if post is None:
+        # posts/<int:id>/ перехватывает и slug из одних цифр
+        post = get_object_or_404(Post, slug__iexact=slug or str(id))
     return render(request, "blog/post_detail.html", {"post": post})
 
 
@@ -404,7 +411,7 @@ def cottage_detail(request, slug):
             "amenities": cottage.amenities,
             "image_url": cottage.get_image_url(),
         }
-        return JsonResponse(data)
+        return json_response(data)
 
     amenities_list = cottage.amenities.split("\n") if cottage.amenities else []
     return render(
@@ -540,7 +547,7 @@ def all_reviews(request):
         form = ReviewForm(request.POST)
         if form.is_valid():
             review = form.save(commit=False)
-            review.client_id = request.user.client_profile
+            review.client_id = request.client_profile
             review.save()
             messages.success(request, "Ваш отзыв успешно добавлен!")
             return redirect("all_reviews")
@@ -561,7 +568,7 @@ def all_reviews(request):
         "all_reviews.html",
         {
             "page_obj": page_obj,
-            "total_reviews": reviews_list.count(),
+            "total_reviews": paginator.count,
             "form": form,
             "houses": House.objects.all(),
         },
@@ -574,7 +581,7 @@ def create_review(request):
         form = ReviewForm(request.POST)
         if form.is_valid():
             review = form.save(commit=False)
-            review.client_id = request.user.client_profile
+            review.client_id = request.client_profile
             review.save()
             messages.success(request, "Ваш отзыв успешно добавлен!")
             return redirect("all_reviews")
@@ -641,6 +648,7 @@ def delete_review(request, pk):
 
 
 class HouseDetailAPI(APIView):
+    @method_decorator(conditional_get(house_version))
     def get(self, request, pk):
         house = get_object_or_404(House, pk=pk)
         data = {
@@ -739,6 +747,13 @@ class CustomLoginView(auth_views.LoginView):
     form_class = CustomAuthenticationForm
     template_name = "registration/login.html"
 
+    def form_invalid(self, form):
+        response = super().form_invalid(form)
+        if form.retry_after:
+            response.status_code = 429
+            response["Retry-After"] = str(form.retry_after)
+        return response
+
 
 @login_required
 def download_document(request, client_id):
@@ -0,0 +1,26 @@
+// Живые обновления занятости: события бронирований с /events/bookings/.
+// liveBookings(houseIds, checkIn, checkOut, onChange) вызывает
+// onChange(houseId, busy) при каждом изменении числа бронирований коттеджа,
+// пересекающихся с выбранными датами (даты в формате YYYY-MM-DD).
+// Событие reset (сервер сбросил непрочитанные события) вызывает onReset.
+function liveBookings(houseIds, checkIn, checkOut, onChange, onReset) {
+    if (!window.EventSource || !houseIds.length || !checkIn || !checkOut) {
+        return null;
+    }
+    const overlapping = {};
+    const source = new EventSource('/events/bookings/?house=' + houseIds.join(','));
+
+    function update(event, delta) {
+        const data = JSON.parse(event.data);
+        if (data.check_in >= checkOut || data.check_out <= checkIn) {
+            return;
+        }
+        overlapping[data.house] = Math.max(0, (overlapping[data.house] || 0) + delta);
+        onChange(data.house, overlapping[data.house] > 0);
+    }
+
+    source.addEventListener('booking-created', event => update(event, 1));
+    source.addEventListener('booking-cancelled', event => update(event, -1));
+    source.addEventListener('reset', () => onReset && onReset());
+    return source;
+}